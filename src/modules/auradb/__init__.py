@@ -1,3 +1,6 @@
 from .knowledge_graph import KnowledgeGraph, Relationship, Node, Property
 from .utils import graph_to_frame, combine_graph_documents
 from .auradb import AuraDB
+from .driver_registry import DriverRegistry
+from .schema_cache import SchemaCache
+from .shared_neo4j_graph import SharedNeo4jGraph
@@ -1,22 +1,464 @@
 # pylint: disable=E1129
 import os
+import gzip
 import json
+import hashlib
+import time
 import warnings
-from typing import List
-from neo4j import GraphDatabase, Driver
+from collections import defaultdict
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Set, TextIO, Union
+from neo4j import Driver, ManagedTransaction, Session
+from neo4j.exceptions import Neo4jError
 from neo4j.graph import Node as Neo4JNode, Relationship as Neo4JRelationship
 from langchain_community.graphs.graph_document import GraphDocument, Node, Relationship
+from .driver_registry import DriverRegistry
+from .graph_diff import GraphDiff
+from .import_checkpoint import ImportCheckpoint
+
+
+def _escape_name(name: str) -> str:
+    """Escapes a label or relationship type so it can be used in a Cypher query."""
+    return "`" + str(name).replace("`", "``") + "`"
+
+
+def _node_pattern(variable: str, label: str = None) -> str:
+    """Returns a node pattern, labelled when a label is known so the id index can be used."""
+    if label:
+        return f"({variable}:{_escape_name(label)})"
+    return f"({variable})"
+
+
+def _graph_labels(graph_objs: Iterable[Union[Node, Relationship]]) -> Set[str]:
+    """Collects the node labels used by the nodes and relationship endpoints."""
+    labels = set()
+    for obj in graph_objs:
+        if isinstance(obj, Node):
+            labels.add(obj.type)
+        elif isinstance(obj, Relationship):
+            labels.add(obj.source.type)
+            labels.add(obj.target.type)
+    labels.discard(None)
+    labels.discard("")
+    return labels
+
+
+def _batched(rows: List[dict], batch_size: int) -> Iterator[List[dict]]:
+    """Yields consecutive slices of at most batch_size rows."""
+    for start in range(0, len(rows), batch_size):
+        yield rows[start : start + batch_size]
+
+
+def _merge_node_query(label: str, replace: bool = False) -> str:
+    """
+    Returns the UNWIND statement that merges a batch of nodes with the same label.
+    With replace, the properties of existing nodes are overwritten instead of added to.
+    """
+    on_match = (
+        "SET n = row.properties, n.id = row.id"
+        if replace
+        else "SET n += row.properties"
+    )
+    return (
+        "UNWIND $rows AS row "
+        f"MERGE (n:{_escape_name(label)} {{id: row.id}}) "
+        "ON CREATE SET n = row.properties, n.id = row.id, n._created = true "
+        f"ON MATCH {on_match} "
+        "RETURN count(n) AS merged"
+    )
+
+
+def _merge_relationship_query(
+    rel_type: str,
+    source_label: str = None,
+    target_label: str = None,
+    replace: bool = False,
+) -> str:
+    """
+    Returns the UNWIND statement that merges a batch of relationships with the same type.
+    With replace, the properties of existing relationships are overwritten.
+    """
+    on_match = "SET r = row.properties" if replace else "SET r += row.properties"
+    return (
+        "UNWIND $rows AS row "
+        f"MATCH {_node_pattern('a', source_label)} WHERE a.id = row.start_id "
+        f"MATCH {_node_pattern('b', target_label)} WHERE b.id = row.end_id "
+        "WITH a, b, row "
+        f"MERGE (a)-[r:{_escape_name(rel_type)}]->(b) "
+        "ON CREATE SET r = row.properties "
+        f"ON MATCH {on_match} "
+        "RETURN count(r) AS merged"
+    )
+
+
+def _merge_node_rows(
+    tx: ManagedTransaction, label: str, rows: List[dict], replace: bool = False
+) -> dict:
+    """Merges a batch of nodes with the same label using a single UNWIND statement."""
+    result = tx.run(_merge_node_query(label, replace), rows=rows)
+    merged = result.single()["merged"]
+    created = result.consume().counters.nodes_created
+    return {"merged": merged, "created": created}
+
+
+def _merge_relationship_rows(
+    tx: ManagedTransaction,
+    rel_type: str,
+    rows: List[dict],
+    source_label: str = None,
+    target_label: str = None,
+    replace: bool = False,
+) -> dict:
+    """Merges a batch of relationships with the same type using a single UNWIND statement."""
+    result = tx.run(
+        _merge_relationship_query(rel_type, source_label, target_label, replace),
+        rows=rows,
+    )
+    merged = result.single()["merged"]
+    created = result.consume().counters.relationships_created
+    return {"merged": merged, "created": created}
+
+
+def _delete_node_rows(tx: ManagedTransaction, label: str, rows: List[dict]) -> int:
+    """Detach deletes a batch of nodes with the same label by id."""
+    query = (
+        "UNWIND $rows AS row "
+        f"MATCH (n:{_escape_name(label)}) WHERE n.id = row.id "
+        "DETACH DELETE n"
+    )
+    return tx.run(query, rows=rows).consume().counters.nodes_deleted
+
+
+def _delete_relationship_rows(
+    tx: ManagedTransaction,
+    rel_type: str,
+    rows: List[dict],
+    source_label: str = None,
+    target_label: str = None,
+) -> int:
+    """Deletes a batch of relationships with the same type by their endpoint ids."""
+    query = (
+        "UNWIND $rows AS row "
+        f"MATCH {_node_pattern('a', source_label)} WHERE a.id = row.start_id "
+        f"MATCH {_node_pattern('b', target_label)} WHERE b.id = row.end_id "
+        f"MATCH (a)-[r:{_escape_name(rel_type)}]->(b) "
+        "DELETE r"
+    )
+    return tx.run(query, rows=rows).consume().counters.relationships_deleted
+
+
+# The pages are ordered on n.id, so the id constraint or index of prepare_schema() is
+# used to seek to the cursor instead of scanning and sorting every node for each page.
+# A node with several of the paged labels is only read for the first of them.
+_NODE_PAGE_QUERY = """
+    MATCH (n:{label})
+    WHERE n.id > $cursor AND head([l IN labels(n) WHERE l IN $labels]) = $label
+    RETURN n.id AS cursor, n.id AS id, head(labels(n)) AS type, properties(n) AS properties
+    ORDER BY n.id
+    LIMIT $limit
+"""
+
+# Pages over the source nodes like _NODE_PAGE_QUERY and collects their outgoing
+# relationships, so a page holds the relationships of at most $limit nodes.
+_RELATIONSHIP_PAGE_QUERY = """
+    MATCH (a:{label})
+    WHERE a.id > $cursor AND head([l IN labels(a) WHERE l IN $labels]) = $label
+    WITH a ORDER BY a.id LIMIT $limit
+    OPTIONAL MATCH (a)-[r]->(b)
+    WHERE ($types IS NULL OR type(r) IN $types)
+        AND ($target_labels IS NULL OR any(l IN labels(b) WHERE l IN $target_labels))
+    WITH a, collect(CASE WHEN r IS NULL THEN NULL ELSE {{
+        type: type(r), properties: properties(r),
+        target: {{id: b.id, type: head(labels(b)), properties: properties(b)}}
+    }} END) AS relationships
+    RETURN a.id AS cursor, relationships,
+        {{id: a.id, type: head(labels(a)), properties: properties(a)}} AS source
+    ORDER BY cursor
+"""
+
+_LABELS_QUERY = "CALL db.labels() YIELD label RETURN label ORDER BY label"
+
+
+_ID_CONSTRAINT_QUERY = (
+    "CREATE CONSTRAINT IF NOT EXISTS FOR (n:{label}) REQUIRE n.id IS UNIQUE"
+)
+
+_ID_INDEX_QUERY = "CREATE INDEX IF NOT EXISTS FOR (n:{label}) ON (n.id)"
+
+# The errors of an id constraint that can't be created, a range index is used instead.
+_INDEX_FALLBACK_CODES = frozenset(
+    [
+        # The existing data has duplicate ids.
+        "Neo.DatabaseError.Schema.ConstraintCreationFailed",
+        "Neo.ClientError.Schema.ConstraintCreationFailed",
+        # There already is an index on the same schema.
+        "Neo.ClientError.Schema.IndexAlreadyExists",
+        "Neo.ClientError.Schema.EquivalentSchemaRuleAlreadyExists",
+        # The edition doesn't support the constraint.
+        "Neo.ClientError.Statement.UnsupportedAdministrationCommand",
+    ]
+)
+
+_EXPORT_QUERY = """
+    CALL apoc.export.json.all(null, {stream: true, batchSize: $batch_size, writeNodeDetails: true})
+    YIELD data
+    RETURN data
+"""
+
+_CLEANUP_COUNT_QUERY = "MATCH {pattern} RETURN count(*) AS total"
+
+_CLEANUP_BATCH_QUERY = (
+    "MATCH {pattern} WITH x LIMIT $batch_size {action} RETURN count(*) AS deleted"
+)
+
+
+def _cleanup_steps(labels: List[str] = None, relationship_types: List[str] = None):
+    """Returns the (phase, pattern, action) steps of a cleanup, see AuraDB.cleanup()."""
+    steps = []
+    if relationship_types:
+        steps += [
+            ("relationships", f"()-[x:{_escape_name(rel_type)}]->()", "DELETE x")
+            for rel_type in relationship_types
+        ]
+    if labels:
+        steps += [
+            ("nodes", f"(x:{_escape_name(label)})", "DETACH DELETE x")
+            for label in labels
+        ]
+    if not relationship_types and not labels:
+        steps.append(("nodes", "(x)", "DETACH DELETE x"))
+    return steps
+
+
+def _node_row(node: Node) -> dict:
+    """Converts a node to a row for the UNWIND statements."""
+    return {"id": node.id, "properties": node.properties or {}}
+
+
+def _relationship_row(rel: Relationship) -> dict:
+    """Converts a relationship to a row for the UNWIND statements."""
+    return {
+        "start_id": rel.source.id,
+        "end_id": rel.target.id,
+        "properties": rel.properties or {},
+    }
+
+
+def _write_nodes(tx: ManagedTransaction, nodes: List[Node]) -> int:
+    """Merges a batch of nodes, grouped by label, in one transaction."""
+    rows = defaultdict(list)
+    for node in nodes:
+        rows[node.type].append(_node_row(node))
+
+    return sum(
+        _merge_node_rows(tx, label, label_rows)["created"]
+        for label, label_rows in rows.items()
+    )
+
+
+def _write_relationships(tx: ManagedTransaction, rels: List[Relationship]) -> int:
+    """Merges a batch of relationships, grouped by type, in one transaction."""
+    rows = defaultdict(list)
+    for rel in rels:
+        rows[(rel.source.type, rel.type, rel.target.type)].append(
+            _relationship_row(rel)
+        )
+
+    created = 0
+    for (source_label, rel_type, target_label), type_rows in rows.items():
+        counts = _merge_relationship_rows(
+            tx, rel_type, type_rows, source_label, target_label
+        )
+        missing = max(len(type_rows) - counts["merged"], 0)
+        if missing > 0:
+            warnings.warn(
+                f"🔴 Cannot create {missing} relationship(s) {rel_type} because one or both nodes do not exist"
+            )
+        created += counts["created"]
+
+    return created
+
+
+def _jsonl_to_node(data: dict) -> Node:
+    """Converts a node line of an APOC JSON export to a Node."""
+    if not data.get("labels"):
+        warnings.warn(f"🔴 Skipping node {data['id']} without a label")
+        return None
+
+    properties = _clean_properties(data.get("properties"))
+    return Node(
+        id=properties.get("id", data["id"]),
+        type=data["labels"][0],
+        properties=properties,
+    )
+
+
+def _jsonl_to_relationship(data: dict, exported_nodes: dict) -> Relationship:
+    """
+    Converts a relationship line of an APOC JSON export to a Relationship. The
+    endpoints are looked up in the exported nodes when the line has no node details.
+    """
+    endpoints = []
+    for endpoint in (data["start"], data["end"]):
+        if endpoint.get("properties") and endpoint.get("labels"):
+            endpoints.append(_jsonl_to_node(endpoint))
+        else:
+            endpoints.append(exported_nodes.get(endpoint["id"]))
+
+    if None in endpoints:
+        warnings.warn(
+            f"🔴 Cannot create relationship {data['label']} because one or both nodes do not exist"
+        )
+        return None
+
+    return Relationship(
+        source=endpoints[0],
+        type=data["label"],
+        target=endpoints[1],
+        properties=_clean_properties(data.get("properties")),
+    )
+
+
+def _open_import_file(filename: str) -> TextIO:
+    """Opens a JSONL file for reading, decompressing .gz and .zst files."""
+    if filename.endswith(".gz"):
+        return gzip.open(filename, "rt", encoding="utf-8")
+    if filename.endswith(".zst"):
+        try:
+            import zstandard
+        except ImportError as e:
+            raise ImportError(
+                "Could not import zstandard. Please install it with `pip install zstandard`."
+            ) from e
+        return zstandard.open(filename, "rt", encoding="utf-8")
+
+    return open(filename, "r", encoding="utf-8")
+
+
+def _open_export_file(filename: str, compression: str = None) -> TextIO:
+    """Opens a text file for writing, optionally compressed with gzip or zstd."""
+    if compression is None:
+        return open(filename, "w", encoding="utf-8")
+    if compression == "gzip":
+        return gzip.open(filename, "wt", encoding="utf-8")
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError as e:
+            raise ImportError(
+                "Could not import zstandard. Please install it with `pip install zstandard`."
+            ) from e
+        return zstandard.open(filename, "wt", encoding="utf-8")
+
+    raise ValueError(f"Unknown compression: {compression}")
+
+
+def _clean_properties(properties: dict) -> dict:
+    """Removes the bookkeeping properties that are set during import."""
+    properties = dict(properties or {})
+    properties.pop("_created", None)
+    return properties
+
+
+def _record_to_node(record: dict) -> Node:
+    """Converts a record with id, type and properties to a Node."""
+    return Node(
+        id=record["id"],
+        type=record["type"],
+        properties=_clean_properties(record["properties"]),
+    )
+
+
+def _record_to_relationship(record: dict) -> Relationship:
+    """Converts a record with source, type, target and properties to a Relationship."""
+    return Relationship(
+        source=_record_to_node(record["source"]),
+        type=record["type"],
+        target=_record_to_node(record["target"]),
+        properties=_clean_properties(record["properties"]),
+    )
+
+
+def _graph_hash(graph: dict) -> str:
+    """Returns a sha256 over the nodes and relationships of a graph dict."""
+    digest = hashlib.sha256()
+    for node in graph["nodes"]:
+        row = [node.id, node.type, node.properties]
+        digest.update(json.dumps(row, sort_keys=True, default=str).encode("utf-8"))
+        digest.update(b"\0")
+    for rel in graph["relationships"]:
+        row = [
+            rel.source.id,
+            rel.source.type,
+            rel.type,
+            rel.target.id,
+            rel.target.type,
+            rel.properties,
+        ]
+        digest.update(json.dumps(row, sort_keys=True, default=str).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def _graph_dict(graph_objs: Iterable[Union[Node, Relationship]]) -> dict:
+    """
+    Collects nodes followed by relationships in a dict with "nodes" and
+    "relationships". Relationships of which a node is missing are left out.
+    """
+    node_dict = {}
+    relationship_list = []
+    for obj in graph_objs:
+        if isinstance(obj, Node):
+            node_dict[obj.id] = obj
+        elif obj.source.id in node_dict and obj.target.id in node_dict:
+            # Refer to the same Node objects as the node list.
+            obj.source = node_dict[obj.source.id]
+            obj.target = node_dict[obj.target.id]
+            relationship_list.append(obj)
+
+    return {
+        "nodes": list(node_dict.values()),
+        "relationships": relationship_list,
+    }
 
 
 class AuraDB:
     """A class to interact with the Neo4J AuraDB database"""
 
-    _driver: Driver = None
-
     def __init__(self, uri, user, password):
-        self._driver = GraphDatabase.driver(
-            uri, auth=(user, password), max_connection_lifetime=200
-        )
+        self._uri = uri
+        self._user = user
+        self._password = password
+        # Creates the shared driver now, so a broken uri fails here.
+        DriverRegistry.get_driver(uri, user, password)
+
+    @property
+    def _driver(self) -> Driver:
+        """
+        The shared driver, fetched from the registry on every use. A driver the
+        registry evicted or closed is created again instead of failing the query.
+        """
+        return DriverRegistry.get_driver(self._uri, self._user, self._password)
+
+    @contextmanager
+    def _session(self) -> Iterator[Session]:
+        """Opens a session on the shared driver, leased so it isn't evicted while in use."""
+        with DriverRegistry.lease(self._uri, self._user, self._password) as driver:
+            with driver.session() as session:
+                yield session
+
+    def close(self) -> None:
+        """
+        Closes the shared driver, and with it the connection pool, for this uri and user.
+        """
+        DriverRegistry.close(self._uri, self._user)
+
+    def target_id(self) -> str:
+        """Returns a short id of the database and user, for example for file names."""
+        digest = hashlib.sha256(f"{self._uri}\0{self._user}".encode("utf-8"))
+        return digest.hexdigest()[:12]
 
     def check_status(self):
         """
@@ -26,112 +468,184 @@ class AuraDB:
             Exception: If the connection is not open.
         """
 
-        with self._driver:
-            self._driver.verify_connectivity()
+        self._driver.verify_connectivity()
 
-    def cleanup(self) -> None:
-        """Removes all nodes, relationships and properties from the database.
+    def prepare_schema(self, labels: Iterable[str]) -> dict:
+        """
+        Makes sure every label has an index on `id`, so MERGE and MATCH on id
+        are index lookups instead of label scans.
 
-        Also see:
-        https://aura.support.neo4j.com/hc/en-us/articles/360059882854-Using-APOC-periodic-iterate-to-delete-large-numbers-of-nodes
+        Args:
+            labels (Iterable[str]): The node labels to prepare.
+
+        Returns:
+            dict: Per label whether a uniqueness "constraint" or a range "index" is used.
         """
-        with self._driver:
-            with self._driver.session() as session:
-                session.run(
-                    "MATCH ()-[r]->() CALL { WITH r DELETE r } IN TRANSACTIONS OF 50000 ROWS;"
-                )
-                session.run(
-                    "MATCH (n) CALL { WITH n SET n = {} } IN TRANSACTIONS OF 50000 ROWS;"
+        with self._session() as session:
+            return self._prepare_schema(session, labels)
+
+    def _prepare_schema(self, session: Session, labels: Iterable[str]) -> dict:
+        """
+        Creates a uniqueness constraint on `id` for every label. If the constraint
+        can't be created, see _INDEX_FALLBACK_CODES, a range index is created instead.
+        Only waits for the indexes to come online when one was created.
+        """
+        result = {}
+        created = 0
+        for label in sorted(labels):
+            try:
+                counters = (
+                    session.run(_ID_CONSTRAINT_QUERY.format(label=_escape_name(label)))
+                    .consume()
+                    .counters
                 )
-                session.run(
-                    "MATCH (n) CALL { WITH n DETACH DELETE n } IN TRANSACTIONS OF 50000 ROWS;"
+                created += counters.constraints_added
+                result[label] = "constraint"
+            except Neo4jError as e:
+                if e.code not in _INDEX_FALLBACK_CODES:
+                    raise
+                counters = (
+                    session.run(_ID_INDEX_QUERY.format(label=_escape_name(label)))
+                    .consume()
+                    .counters
                 )
+                created += counters.indexes_added
+                result[label] = "index"
 
-    def export_jsonl(self, filename: str = "tmp/export.jsonl") -> None:
+        if created:
+            session.run("CALL db.awaitIndexes(300)").consume()
+
+        return result
+
+    def cleanup(
+        self,
+        batch_size: int = 10000,
+        labels: List[str] = None,
+        relationship_types: List[str] = None,
+        progress_callback: Callable[[dict], None] = None,
+    ) -> dict:
+        """Removes nodes and relationships from the database in batches.
+
+        Without labels and relationship types, all nodes are detach deleted in a
+        single pass. Every batch is its own transaction, so large graphs don't have
+        to fit in one transaction and the progress can be reported.
+
+        Args:
+            batch_size (int): The number of nodes or relationships per transaction. Defaults to 10000.
+            labels (List[str], optional): Only detach delete the nodes with these labels.
+            relationship_types (List[str], optional): Only delete the relationships of these types.
+            progress_callback (Callable[[dict], None], optional): Called after every
+                batch with the phase ("relationships" or "nodes"), the number of
+                deleted entities and the total.
+
+        Returns:
+            dict: The number of deleted nodes and relationships.
+
+        Also see:
+        https://aura.support.neo4j.com/hc/en-us/articles/360059882854-Using-APOC-periodic-iterate-to-delete-large-numbers-of-nodes
+        """
+        if batch_size < 1:
+            raise ValueError("The batch size should be at least 1.")
+
+        steps = _cleanup_steps(labels, relationship_types)
+
+        def delete_batch(tx: ManagedTransaction, pattern: str, action: str) -> int:
+            result = tx.run(
+                _CLEANUP_BATCH_QUERY.format(pattern=pattern, action=action),
+                batch_size=batch_size,
+            )
+            return result.single()["deleted"]
+
+        deleted = {"nodes": 0, "relationships": 0}
+        with self._session() as session:
+            totals = {"nodes": 0, "relationships": 0}
+            for phase, pattern, _ in steps:
+                totals[phase] += session.run(
+                    _CLEANUP_COUNT_QUERY.format(pattern=pattern)
+                ).single()["total"]
+
+            for phase, pattern, action in steps:
+                while True:
+                    count = session.execute_write(delete_batch, pattern, action)
+                    deleted[phase] += count
+                    if progress_callback is not None:
+                        progress_callback(
+                            {
+                                "phase": phase,
+                                "deleted": deleted[phase],
+                                "total": totals[phase],
+                            }
+                        )
+                    if count < batch_size:
+                        break
+
+        return deleted
+
+    def export_jsonl(
+        self,
+        filename: str = "tmp/export.jsonl",
+        batch_size: int = 10000,
+        compression: str = None,
+        progress_callback: Callable[[dict], None] = None,
+    ) -> dict:
         """
-        Exports the entire database to a JSON file.
+        Exports the entire database to a JSONL file.
+
+        APOC streams the export in batches; every batch is written to the file as
+        soon as it arrives, so the export is never held in memory as a whole.
 
         Args:
-            filename (str): The filename to export to. Defaults to "tmp/export.json".
+            filename (str): The filename to export to. Defaults to "tmp/export.jsonl".
+            batch_size (int): The number of nodes or relationships per streamed batch. Defaults to 10000.
+            compression (str, optional): None, "gzip" or "zstd". Defaults to None.
+            progress_callback (Callable[[dict], None], optional): Called with the
+                statistics after every written batch.
 
         Returns:
-            None
+            dict: The number of batches, lines and (uncompressed) bytes written, the
+                duration in seconds and the throughput in lines per second.
         """
+        stats = {
+            "batches": 0,
+            "lines": 0,
+            "bytes": 0,
+            "seconds": 0.0,
+            "lines_per_second": 0.0,
+        }
+        start = time.perf_counter()
 
-        with self._driver:
-            with self._driver.session() as session:
-                result = session.run(
-                    """
-                        CALL apoc.export.json.all(null, {stream:true})
-                        YIELD file, nodes, relationships, properties, data
-                        RETURN file, nodes, relationships, properties, data
-                    """
-                )
-                result = result.single()
-
-                with open(filename, "w", encoding="utf-8") as file:
-                    file.write(result["data"])
-
-    # def import_jsonl(self, json_lines: List[dict]) -> dict:
-    #     """Imports a list of json objects into the database.
-
-    #     Args:
-    #         json_lines (List[dict]): A list of dictionaries containing the data to import.
-
-    #     Returns:
-    #         dict: A dict with the number of nodes and relationships that were created.
-    #     """
-
-    #     def add_node(tx, node_data) -> int:
-    #         labels = ":".join(node_data["labels"])
-    #         query = (
-    #             f"MERGE (n:{labels} {{id: $id}}) "
-    #             "ON CREATE SET n = $properties, n._created = true "
-    #             "RETURN n._created IS NOT NULL as created"
-    #         )
-    #         result = tx.run(
-    #             query,
-    #             id=node_data["id"],
-    #             properties=node_data["properties"],
-    #         )
-    #         return int(result.single()[0])
-
-    #     def add_relationship(tx, rel_data):
-    #         rel_type = rel_data["label"]
-    #         query = (
-    #             "MATCH (a {id: $start_id}), (b {id: $end_id}) "
-    #             f"MERGE (a)-[r:{rel_type}]->(b) "
-    #             "ON CREATE SET r._created = true "
-    #             "RETURN r._created IS NOT NULL as created"
-    #         )
-    #         result = tx.run(
-    #             query,
-    #             start_id=rel_data["start"]["properties"]["id"],
-    #             end_id=rel_data["end"]["properties"]["id"],
-    #         )
-    #         return int(result.single()[0])
-
-    #     node_count = 0
-    #     relationship_count = 0
-
-    #     for data in json_lines:
-    #         with self._driver:
-    #             with self._driver.session() as session:
-    #                 # Now create nodes and relationships and count them.
-    #                 if data["type"] == "node":
-    #                     node_count += session.execute_write(add_node, data)
-    #                 elif data["type"] == "relationship":
-    #                     relationship_count += session.execute_write(
-    #                         add_relationship, data
-    #                     )
-
-    #     return {"node_count": node_count, "relationship_count": relationship_count}
-
-    def import_list(self, graph_objs: List[dict]) -> None:
+        with _open_export_file(filename, compression) as file:
+            with self._session() as session:
+                result = session.run(_EXPORT_QUERY, batch_size=batch_size)
+
+                for record in result:
+                    data = record["data"]
+                    if not data:
+                        continue
+                    if not data.endswith("\n"):
+                        data += "\n"
+
+                    file.write(data)
+
+                    stats["batches"] += 1
+                    stats["lines"] += data.count("\n")
+                    stats["bytes"] += len(data.encode("utf-8"))
+                    stats["seconds"] = time.perf_counter() - start
+                    stats["lines_per_second"] = stats["lines"] / max(
+                        stats["seconds"], 1e-9
+                    )
+                    if progress_callback is not None:
+                        progress_callback(dict(stats))
+
+        stats["seconds"] = time.perf_counter() - start
+        return stats
+
+    def import_list(self, graph_objs: List[dict], prepare_schema: bool = True) -> None:
         """Imports a list of json objects into the database.
 
         Args:
             json_lines (List[dict]): A list of dictionaries containing the data to import.
+            prepare_schema (bool): Create the id constraints for the labels first. Defaults to True.
 
         Returns:
             dict: A dict with the number of nodes and relationships that were created.
@@ -139,7 +653,7 @@ class AuraDB:
 
         def add_node(tx, node: Node) -> dict:
             query = (
-                f"MERGE (n:{node.type} {{id: $id}}) "
+                f"MERGE (n:{_escape_name(node.type)} {{id: $id}}) "
                 "ON CREATE SET n = $properties, n.id = $id, n._created = true "
                 "ON MATCH SET n += $properties "
                 "RETURN id(n) as node_id, n._created AS created"
@@ -161,10 +675,10 @@ class AuraDB:
 
         def add_relationship(tx, rel: Relationship):
             query = (
-                "MATCH (a) WHERE a.id = $start_id "
-                "MATCH (b) WHERE b.id = $end_id "
+                f"MATCH {_node_pattern('a', rel.source.type)} WHERE a.id = $start_id "
+                f"MATCH {_node_pattern('b', rel.target.type)} WHERE b.id = $end_id "
                 "WITH a, b "
-                f"MERGE (a)-[r:{rel.type}]->(b) "
+                f"MERGE (a)-[r:{_escape_name(rel.type)}]->(b) "
                 "ON CREATE SET r = $properties "
                 "ON MATCH SET r += $properties "
                 "RETURN id(a) as start_id, id(b) as end_id, id(r) as rel_id, r._created as created"
@@ -190,68 +704,541 @@ class AuraDB:
             )
             return None
 
-        with self._driver:
-            with self._driver.session() as session:
-                for obj in graph_objs:
-                    if isinstance(obj, Node):
-                        session.execute_write(add_node, obj)
-                    elif isinstance(obj, Relationship):
-                        session.execute_write(add_relationship, obj)
-
-    # def import_file(self, filename: str) -> dict:
-    #     if not os.path.exists(filename):
-    #         raise FileNotFoundError(f"File {filename} does not exist")
-    #     if not filename.endswith(".json"):
-    #         raise ValueError(f"File {filename} is not a JSON file")
-
-    #     json_lines = []
-    #     with open(filename, "r", encoding="utf-8") as file:
-    #         for line in file:
-    #             # The file contains one JSON object per line, load it.
-    #             json_lines.append(json.loads(line))
-
-    #     return self.import_jsonl(json_lines)
-
-    def get_knowledge_graph(self):
-        with self._driver:
-            with self._driver.session() as session:
-                result = session.run(
-                    """
-                    MATCH (n)
-                    OPTIONAL MATCH (n)-[r]->(m)
-                    RETURN
-                        collect(DISTINCT {id: n.id, type: head(labels(n)), properties: apoc.map.removeKey(COALESCE(properties(n), {}), '_created')}) AS nodes,
-                        collect(DISTINCT {id: id(r), start_node_id: startNode(r).id, end_node_id: endNode(r).id, type: type(r), properties: apoc.map.removeKey(COALESCE(properties(r), {}), '_created')}) AS relationships
-                    """
-                ).single()
-
-        nodes_data = result["nodes"]
-        relationships_data = result["relationships"]
-
-        # Convert nodes to Node objects
-        node_dict = {
-            node["id"]: Node(
-                id=node["id"],
-                type=node["type"],
-                properties=node["properties"],
-            )
-            for node in nodes_data
+        with self._session() as session:
+            if prepare_schema:
+                self._prepare_schema(session, _graph_labels(graph_objs))
+
+            for obj in graph_objs:
+                if isinstance(obj, Node):
+                    session.execute_write(add_node, obj)
+                elif isinstance(obj, Relationship):
+                    session.execute_write(add_relationship, obj)
+
+    def bulk_import_list(
+        self,
+        graph_objs: List[Union[Node, Relationship]],
+        batch_size: int = 1000,
+        prepare_schema: bool = True,
+    ) -> dict:
+        """Imports a list of nodes and relationships in batches.
+
+        Nodes are grouped by label and relationships by type. Every group is written
+        with a parameterised `UNWIND $rows` MERGE statement, one transaction per batch.
+        All nodes are written before the relationships, so relationships can refer
+        to nodes later in the list.
+
+        Args:
+            graph_objs (List[Union[Node, Relationship]]): The nodes and relationships to import.
+            batch_size (int): The maximum number of rows per transaction. Defaults to 1000.
+            prepare_schema (bool): Create the id constraints for the labels first. Defaults to True.
+
+        Returns:
+            dict: The number of created nodes and relationships and the counts per batch.
+        """
+        if batch_size < 1:
+            raise ValueError("The batch size should be at least 1.")
+
+        node_rows = defaultdict(list)
+        relationship_rows = defaultdict(list)
+        for obj in graph_objs:
+            if isinstance(obj, Node):
+                node_rows[obj.type].append(_node_row(obj))
+            elif isinstance(obj, Relationship):
+                relationship_rows[(obj.source.type, obj.type, obj.target.type)].append(
+                    _relationship_row(obj)
+                )
+
+        batches = []
+        with self._session() as session:
+            if prepare_schema:
+                self._prepare_schema(session, _graph_labels(graph_objs))
+
+            for label, rows in node_rows.items():
+                for batch in _batched(rows, batch_size):
+                    counts = session.execute_write(_merge_node_rows, label, batch)
+                    batches.append(
+                        {
+                            "type": "node",
+                            "label": label,
+                            "rows": len(batch),
+                            "created": counts["created"],
+                            "matched": counts["merged"] - counts["created"],
+                        }
+                    )
+
+            for (
+                source_label,
+                rel_type,
+                target_label,
+            ), rows in relationship_rows.items():
+                for batch in _batched(rows, batch_size):
+                    counts = session.execute_write(
+                        _merge_relationship_rows,
+                        rel_type,
+                        batch,
+                        source_label,
+                        target_label,
+                    )
+                    missing = max(len(batch) - counts["merged"], 0)
+                    if missing > 0:
+                        warnings.warn(
+                            f"🔴 Cannot create {missing} relationship(s) {rel_type} because one or both nodes do not exist"
+                        )
+                    batches.append(
+                        {
+                            "type": "relationship",
+                            "label": rel_type,
+                            "rows": len(batch),
+                            "created": counts["created"],
+                            "matched": counts["merged"] - counts["created"],
+                            "missing": missing,
+                        }
+                    )
+
+        return {
+            "node_count": sum(b["created"] for b in batches if b["type"] == "node"),
+            "relationship_count": sum(
+                b["created"] for b in batches if b["type"] == "relationship"
+            ),
+            "batches": batches,
         }
 
-        # Convert relationships to Relationship objects
-        relationship_list = [
-            Relationship(
-                source=node_dict.get(rel["start_node_id"]),
-                type=rel["type"],
-                target=node_dict.get(rel["end_node_id"]),
-                properties=rel["properties"],
-            )
-            for rel in relationships_data
-            if rel["id"] is not None
-        ]
+    def apply_diff(self, diff: GraphDiff, batch_size: int = 1000) -> dict:
+        """
+        Applies the inserts, updates and deletes of a GraphDiff in batches.
+
+        Relationships are deleted first, then nodes; after that nodes and
+        relationships are merged. Updates replace all properties, so removed
+        properties are removed from the database as well.
+
+        Args:
+            diff (GraphDiff): The changes, see GraphDiff.compare().
+            batch_size (int): The maximum number of rows per transaction. Defaults to 1000.
+
+        Returns:
+            dict: The number of deleted, created and updated nodes and relationships.
+        """
+        if batch_size < 1:
+            raise ValueError("The batch size should be at least 1.")
 
-        graph_dict = {
-            "nodes": list(node_dict.values()),
-            "relationships": relationship_list,
+        def group_nodes(nodes: List[Node]) -> dict:
+            rows = defaultdict(list)
+            for node in nodes:
+                rows[node.type].append(_node_row(node))
+            return rows
+
+        def group_relationships(rels: List[Relationship]) -> dict:
+            rows = defaultdict(list)
+            for rel in rels:
+                rows[(rel.source.type, rel.type, rel.target.type)].append(
+                    _relationship_row(rel)
+                )
+            return rows
+
+        stats = {
+            "deleted_relationships": 0,
+            "deleted_nodes": 0,
+            "created_nodes": 0,
+            "updated_nodes": 0,
+            "created_relationships": 0,
+            "updated_relationships": 0,
         }
-        return graph_dict
+
+        with self._session() as session:
+            for (source_label, rel_type, target_label), rows in group_relationships(
+                diff.deleted_relationships
+            ).items():
+                for batch in _batched(rows, batch_size):
+                    stats["deleted_relationships"] += session.execute_write(
+                        _delete_relationship_rows,
+                        rel_type,
+                        batch,
+                        source_label,
+                        target_label,
+                    )
+
+            for label, rows in group_nodes(diff.deleted_nodes).items():
+                for batch in _batched(rows, batch_size):
+                    stats["deleted_nodes"] += session.execute_write(
+                        _delete_node_rows, label, batch
+                    )
+
+            upserted_nodes = diff.inserted_nodes + diff.updated_nodes
+            self._prepare_schema(session, _graph_labels(upserted_nodes))
+
+            for label, rows in group_nodes(upserted_nodes).items():
+                for batch in _batched(rows, batch_size):
+                    counts = session.execute_write(
+                        _merge_node_rows, label, batch, replace=True
+                    )
+                    stats["created_nodes"] += counts["created"]
+                    stats["updated_nodes"] += counts["merged"] - counts["created"]
+
+            for (source_label, rel_type, target_label), rows in group_relationships(
+                diff.inserted_relationships + diff.updated_relationships
+            ).items():
+                for batch in _batched(rows, batch_size):
+                    counts = session.execute_write(
+                        _merge_relationship_rows,
+                        rel_type,
+                        batch,
+                        source_label,
+                        target_label,
+                        replace=True,
+                    )
+                    missing = max(len(batch) - counts["merged"], 0)
+                    if missing > 0:
+                        warnings.warn(
+                            f"🔴 Cannot create {missing} relationship(s) {rel_type} because one or both nodes do not exist"
+                        )
+                    stats["created_relationships"] += counts["created"]
+                    stats["updated_relationships"] += (
+                        counts["merged"] - counts["created"]
+                    )
+
+        return stats
+
+    def sync_graph(self, graph: dict, batch_size: int = 1000) -> dict:
+        """
+        Makes the database equal to a graph dict, for example a snapshot from the
+        GraphFileManager, by writing only what changed.
+
+        Args:
+            graph (dict): The desired graph, with "nodes" and "relationships".
+            batch_size (int): The maximum number of rows per transaction. Defaults to 1000.
+
+        Returns:
+            dict: The number of changes per kind, see GraphDiff.summary().
+        """
+        diff = GraphDiff.compare(source=graph, target=self.get_knowledge_graph())
+        if not diff.is_empty():
+            self.apply_diff(diff, batch_size=batch_size)
+        return diff.summary()
+
+    def import_jsonl(
+        self,
+        filename: str,
+        batch_size: int = 1000,
+        workers: int = 4,
+        checkpoint_path: str = None,
+        progress_callback: Callable[[dict], None] = None,
+    ) -> dict:
+        """
+        Imports a JSONL export, as written by export_jsonl(), into the database.
+
+        The file is streamed from disk twice: first all nodes are written, then all
+        relationships. Batches are written in parallel, one transaction per batch.
+        After every committed batch a checkpoint is saved, so an interrupted import
+        resumes where it stopped when it is started again.
+
+        Args:
+            filename (str): The JSONL file, optionally compressed (.gz or .zst).
+            batch_size (int): The number of lines per transaction. Defaults to 1000.
+            workers (int): The number of parallel transactions. Defaults to 4.
+            checkpoint_path (str, optional): Defaults to
+                "<filename>.<target_id>.checkpoint.json".
+            progress_callback (Callable[[dict], None], optional): Called after every
+                committed batch.
+
+        Returns:
+            dict: The number of created nodes and relationships, the number of
+                written batches and the number of batches skipped because an earlier
+                run committed them.
+        """
+        if not os.path.exists(filename):
+            raise FileNotFoundError(f"File {filename} does not exist")
+
+        checkpoint = ImportCheckpoint(
+            checkpoint_path or f"{filename}.{self.target_id()}.checkpoint.json",
+            fingerprint={
+                "uri": self._uri,
+                "user": self._user,
+                "source": os.path.abspath(filename),
+                "size": os.path.getsize(filename),
+                "modified": os.path.getmtime(filename),
+                "batch_size": batch_size,
+            },
+        )
+
+        # Maps the APOC export id to the node, for relationships without node details.
+        exported_nodes = {}
+
+        def read_lines(line_type: str) -> Iterator[dict]:
+            with _open_import_file(filename) as file:
+                for line in file:
+                    if line.strip():
+                        data = json.loads(line)
+                        if data["type"] == line_type:
+                            yield data
+
+        def node_batches() -> Iterator[List[Node]]:
+            batch = []
+            for data in read_lines("node"):
+                node = _jsonl_to_node(data)
+                if node is None:
+                    continue
+                exported_nodes[data["id"]] = node
+                batch.append(node)
+                if len(batch) == batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+
+        def relationship_batches() -> Iterator[List[Relationship]]:
+            batch = []
+            for data in read_lines("relationship"):
+                rel = _jsonl_to_relationship(data, exported_nodes)
+                if rel is None:
+                    continue
+                batch.append(rel)
+                if len(batch) == batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+
+        return self._run_import_pipeline(
+            node_batches(),
+            relationship_batches,
+            checkpoint,
+            workers,
+            progress_callback,
+        )
+
+    def import_graph(
+        self,
+        graph: dict,
+        batch_size: int = 1000,
+        workers: int = 4,
+        checkpoint_path: str = None,
+        progress_callback: Callable[[dict], None] = None,
+    ) -> dict:
+        """
+        Imports a graph dict with "nodes" and "relationships", for example a snapshot
+        from the GraphFileManager, in parallel batches.
+
+        See import_jsonl() for the arguments. Without a checkpoint_path the progress
+        is not saved and an interrupted import starts over. The checkpoint is only
+        reused for the same database, user and graph contents.
+
+        Returns:
+            dict: See import_jsonl().
+        """
+        checkpoint = ImportCheckpoint(
+            checkpoint_path,
+            fingerprint=self._graph_fingerprint(graph, batch_size),
+        )
+
+        return self._run_import_pipeline(
+            _batched(graph["nodes"], batch_size),
+            lambda: _batched(graph["relationships"], batch_size),
+            checkpoint,
+            workers,
+            progress_callback,
+        )
+
+    def _graph_fingerprint(self, graph: dict, batch_size: int) -> dict:
+        """Identifies an import_graph() run: the target, the contents and the batches."""
+        return {
+            "uri": self._uri,
+            "user": self._user,
+            "graph": _graph_hash(graph),
+            "nodes": len(graph["nodes"]),
+            "relationships": len(graph["relationships"]),
+            "batch_size": batch_size,
+        }
+
+    def _run_import_pipeline(
+        self,
+        node_batches: Iterator[List[Node]],
+        relationship_batches: Callable[[], Iterator[List[Relationship]]],
+        checkpoint: ImportCheckpoint,
+        workers: int,
+        progress_callback: Callable[[dict], None] = None,
+    ) -> dict:
+        """
+        Writes all node batches and then all relationship batches in parallel,
+        skipping the batches the checkpoint marks as done.
+        """
+        if workers < 1:
+            raise ValueError("The number of workers should be at least 1.")
+
+        stats = {"batches": 0, "skipped_batches": 0}
+        prepared_labels = set()
+
+        def write_batch(write_function: Callable, batch: list) -> int:
+            with self._session() as session:
+                return session.execute_write(write_function, batch)
+
+        def run_phase(phase: str, batches: Iterator[list], write_function: Callable):
+            errors = []
+            pending = {}
+
+            def collect(done):
+                for future in done:
+                    index = pending.pop(future)
+                    try:
+                        created = future.result()
+                    except Exception as e:  # pylint: disable=broad-except
+                        errors.append(e)
+                        continue
+
+                    checkpoint.mark_done(phase, index, created)
+                    stats["batches"] += 1
+                    if progress_callback is not None:
+                        progress_callback(
+                            {
+                                "phase": phase,
+                                "batches": checkpoint.done_count(phase),
+                                "created": checkpoint.created_count(phase),
+                            }
+                        )
+
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for index, batch in enumerate(batches):
+                    if errors:
+                        break
+                    if checkpoint.is_done(phase, index):
+                        stats["skipped_batches"] += 1
+                        continue
+
+                    # Schema commands can't run inside the write transactions.
+                    new_labels = _graph_labels(batch) - prepared_labels
+                    if new_labels:
+                        self.prepare_schema(new_labels)
+                        prepared_labels.update(new_labels)
+
+                    pending[executor.submit(write_batch, write_function, batch)] = index
+                    if len(pending) >= workers * 2:
+                        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        collect(done)
+
+                collect(wait(pending).done)
+
+            if errors:
+                raise errors[0]
+
+        run_phase("nodes", node_batches, _write_nodes)
+        run_phase("relationships", relationship_batches(), _write_relationships)
+
+        checkpoint.remove()
+
+        return {
+            "node_count": checkpoint.created_count("nodes"),
+            "relationship_count": checkpoint.created_count("relationships"),
+            **stats,
+        }
+
+    def iter_knowledge_graph(
+        self,
+        labels: List[str] = None,
+        relationship_types: List[str] = None,
+        page_size: int = 1000,
+        max_nodes: int = None,
+        max_relationships: int = None,
+    ) -> Iterator[Union[Node, Relationship]]:
+        """
+        Streams the graph page by page: first all nodes, then all relationships.
+
+        Pages are fetched per label with an id cursor in separate read transactions,
+        so neither Neo4J nor Python has to hold the whole graph in memory. Each page
+        seeks on the id constraint or index of prepare_schema(), which assumes that
+        the ids are strings, as they are for imported graphs. Nodes without an id
+        are skipped.
+
+        Args:
+            labels (List[str], optional): Only nodes with one of these labels, and
+                relationships between them. Defaults to all labels.
+            relationship_types (List[str], optional): Only relationships of these types.
+                Defaults to all types.
+            page_size (int): The number of nodes per query. The relationships are
+                paged by their source node. Defaults to 1000.
+            max_nodes (int, optional): Stop after this many nodes. Defaults to no limit.
+            max_relationships (int, optional): Stop after this many relationships.
+                Defaults to no limit.
+
+        Yields:
+            Union[Node, Relationship]: The nodes followed by the relationships.
+        """
+        if page_size < 1:
+            raise ValueError("The page size should be at least 1.")
+
+        paged_labels = sorted(set(labels)) if labels else self._labels()
+        node_page_size = min(page_size, max_nodes or page_size)
+
+        def nodes() -> Iterator[Node]:
+            for label in paged_labels:
+                query = _NODE_PAGE_QUERY.format(label=_escape_name(label))
+                params = {"label": label, "labels": paged_labels}
+                for record in self._paginate(query, params, node_page_size):
+                    yield _record_to_node(record)
+
+        def relationships() -> Iterator[Relationship]:
+            for label in paged_labels:
+                query = _RELATIONSHIP_PAGE_QUERY.format(label=_escape_name(label))
+                params = {
+                    "label": label,
+                    "labels": paged_labels,
+                    "types": relationship_types,
+                    "target_labels": labels,
+                }
+                for record in self._paginate(query, params, page_size):
+                    for rel in record["relationships"]:
+                        yield _record_to_relationship(
+                            {**rel, "source": record["source"]}
+                        )
+
+        yield from islice(nodes(), max_nodes)
+        yield from islice(relationships(), max_relationships)
+
+    def _labels(self) -> List[str]:
+        """Returns the node labels in the database."""
+
+        def read_labels(tx: ManagedTransaction) -> List[str]:
+            return [record["label"] for record in tx.run(_LABELS_QUERY)]
+
+        with self._session() as session:
+            return session.execute_read(read_labels)
+
+    def _paginate(self, query: str, params: dict, page_size: int) -> Iterator[dict]:
+        """Runs a query that is ordered by its cursor column page by page."""
+
+        def read_page(tx: ManagedTransaction, cursor: str, limit: int) -> List[dict]:
+            result = tx.run(query, cursor=cursor, limit=limit, **params)
+            return [record.data() for record in result]
+
+        cursor = ""
+        with self._session() as session:
+            while True:
+                page = session.execute_read(read_page, cursor, page_size)
+                yield from page
+
+                if len(page) < page_size:
+                    break
+                cursor = page[-1]["cursor"]
+
+    def get_knowledge_graph(
+        self,
+        labels: List[str] = None,
+        relationship_types: List[str] = None,
+        max_nodes: int = None,
+        max_relationships: int = None,
+    ) -> dict:
+        """
+        Returns the graph as a dict with lists of nodes and relationships.
+
+        See iter_knowledge_graph() for the arguments. Relationships of which a node
+        is not part of the result, for example because of max_nodes, are left out.
+
+        Returns:
+            dict: A dict with "nodes" and "relationships".
+        """
+        return _graph_dict(
+            self.iter_knowledge_graph(
+                labels=labels,
+                relationship_types=relationship_types,
+                max_nodes=max_nodes,
+                max_relationships=max_relationships,
+            )
+        )
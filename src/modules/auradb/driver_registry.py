@@ -0,0 +1,227 @@
+import os
+import time
+import atexit
+import hashlib
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, Tuple
+from neo4j import GraphDatabase, Driver
+from neo4j.exceptions import DriverError, Neo4jError
+
+
+class DriverRegistry:
+    """
+    A process-wide registry of Neo4J drivers, keyed by (uri, user).
+
+    A driver holds a connection pool, so sharing one driver between Streamlit
+    sessions and reruns means the TLS/Bolt handshakes are done once instead of on
+    every click. Drivers are health checked when they haven't been checked for a
+    while, evicted when they have been idle for too long and closed on shutdown.
+    Hold on to the uri and credentials rather than the driver, and call
+    get_driver() on every use, so an evicted driver is created again. Long running
+    work leases the driver instead, a leased driver is never evicted or closed.
+
+    Example:
+    driver = DriverRegistry.get_driver(uri, user, password)
+    with driver.session() as session:
+        session.run("MATCH (n) RETURN count(n)")
+    """
+
+    # Maximum number of connections per driver.
+    max_connection_pool_size: int = int(
+        os.getenv("NEO4J_MAX_CONNECTION_POOL_SIZE", "50")
+    )
+    # Maximum lifetime of a pooled connection in seconds.
+    max_connection_lifetime: int = 200
+    # Seconds after which a driver is verified again before it is handed out.
+    health_check_interval: float = 60
+    # Seconds after which an unused driver is closed.
+    max_idle_time: float = 30 * 60
+
+    _drivers: Dict[Tuple[str, str], dict] = {}
+    # Guards _drivers and _key_locks, never held during network calls.
+    _lock = threading.RLock()
+    # One lock per (uri, user), held while a driver is checked or created.
+    _key_locks: Dict[Tuple[str, str], threading.Lock] = {}
+    # The passwords are compared by a salted hash, the salt is new per process.
+    _salt: bytes = os.urandom(16)
+
+    @classmethod
+    def get_driver(cls, uri: str, user: str, password: str) -> Driver:
+        """
+        Returns the shared driver for the given uri and user, creating it when needed.
+
+        The driver can be evicted once it is idle, use lease() to keep it open for
+        the duration of a long running import or stream.
+
+        Args:
+            uri (str): The Neo4J connection URI.
+            user (str): The username.
+            password (str): The password.
+
+        Returns:
+            Driver: The shared driver.
+
+        Raises:
+            neo4j.exceptions.DriverError: If a health check fails and the driver can't be recreated.
+        """
+        return cls._acquire(uri, user, password, lease=False)["driver"]
+
+    @classmethod
+    @contextmanager
+    def lease(cls, uri: str, user: str, password: str) -> Iterator[Driver]:
+        """
+        Hands out the shared driver and keeps it from being evicted or closed
+        until the block ends.
+
+        Example:
+        with DriverRegistry.lease(uri, user, password) as driver:
+            with driver.session() as session:
+                ...
+        """
+        entry = cls._acquire(uri, user, password, lease=True)
+        try:
+            yield entry["driver"]
+        finally:
+            with cls._lock:
+                entry["leases"] -= 1
+                retired = entry["retired"] and entry["leases"] == 0
+            if retired:
+                entry["driver"].close()
+
+    @classmethod
+    def _acquire(cls, uri: str, user: str, password: str, lease: bool) -> dict:
+        """Returns the checked entry of the driver, leased when asked."""
+        key = (uri, user)
+        password_hash = cls.password_hash(password)
+        cls.evict_idle(exclude=key)
+
+        with cls._lock:
+            key_lock = cls._key_locks.setdefault(key, threading.Lock())
+
+        # Only requests for the same database and user wait for a health check.
+        with key_lock:
+            now = time.monotonic()
+            with cls._lock:
+                entry = cls._drivers.get(key)
+            if entry is not None and entry["password_hash"] != password_hash:
+                # The credentials changed, don't reuse the pool.
+                cls.close(uri, user)
+                entry = None
+
+            if (
+                entry is not None
+                and now - entry["checked_at"] > cls.health_check_interval
+            ):
+                try:
+                    entry["driver"].verify_connectivity()
+                    entry["checked_at"] = now
+                except (DriverError, Neo4jError, OSError):
+                    cls.close(uri, user)
+                    entry = cls._create_entry(uri, user, password, now)
+                    # Raises if the database is still not reachable.
+                    entry["driver"].verify_connectivity()
+
+            if entry is None:
+                entry = cls._create_entry(uri, user, password, now)
+
+            with cls._lock:
+                entry["used_at"] = now
+                if lease:
+                    entry["leases"] += 1
+            return entry
+
+    @classmethod
+    def password_hash(cls, password: str) -> str:
+        """Returns a salted hash of the password, to compare credentials without keeping them."""
+        return hashlib.sha256(cls._salt + str(password).encode("utf-8")).hexdigest()
+
+    @classmethod
+    def _create_entry(cls, uri: str, user: str, password: str, now: float) -> dict:
+        """Creates a new driver and registers it."""
+        entry = {
+            "driver": GraphDatabase.driver(
+                uri,
+                auth=(user, password),
+                max_connection_lifetime=cls.max_connection_lifetime,
+                max_connection_pool_size=cls.max_connection_pool_size,
+            ),
+            "password_hash": cls.password_hash(password),
+            "checked_at": now,
+            "used_at": now,
+            # The number of open leases, a leased driver is never evicted.
+            "leases": 0,
+            # Removed from the registry while leased, closed by the last lease.
+            "retired": False,
+        }
+        with cls._lock:
+            cls._drivers[(uri, user)] = entry
+        return entry
+
+    @classmethod
+    def evict_idle(cls, max_idle_time: float = None, exclude: Tuple = None) -> int:
+        """
+        Closes the drivers that haven't been used for max_idle_time seconds and
+        aren't leased.
+
+        Args:
+            max_idle_time (float, optional): Defaults to DriverRegistry.max_idle_time.
+            exclude (Tuple, optional): A (uri, user) key that should be kept.
+
+        Returns:
+            int: The number of closed drivers.
+        """
+        if max_idle_time is None:
+            max_idle_time = cls.max_idle_time
+
+        now = time.monotonic()
+        with cls._lock:
+            idle = [
+                cls._drivers.pop(key)
+                for key, entry in list(cls._drivers.items())
+                if key != exclude
+                and entry["leases"] == 0
+                and now - entry["used_at"] > max_idle_time
+            ]
+
+        # Closed outside the lock, so other lookups don't wait for it.
+        for entry in idle:
+            entry["driver"].close()
+        return len(idle)
+
+    @classmethod
+    def close(cls, uri: str, user: str) -> None:
+        """
+        Closes the driver for the given uri and user, if it exists. A leased driver
+        is removed from the registry now and closed when the last lease ends.
+
+        Args:
+            uri (str): The Neo4J connection URI.
+            user (str): The username.
+        """
+        with cls._lock:
+            entry = cls._drivers.pop((uri, user), None)
+            if entry is not None and entry["leases"] > 0:
+                entry["retired"] = True
+                entry = None
+
+        if entry is not None:
+            entry["driver"].close()
+
+    @classmethod
+    def close_all(cls) -> None:
+        """Closes all drivers, for example when the process shuts down."""
+        with cls._lock:
+            keys = list(cls._drivers.keys())
+
+        for uri, user in keys:
+            cls.close(uri, user)
+
+    @classmethod
+    def size(cls) -> int:
+        """Returns the number of open drivers."""
+        with cls._lock:
+            return len(cls._drivers)
+
+
+atexit.register(DriverRegistry.close_all)
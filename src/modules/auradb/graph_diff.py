@@ -0,0 +1,138 @@
+import json
+import hashlib
+from typing import Dict, List, Tuple
+from langchain_community.graphs.graph_document import Node, Relationship
+
+
+def _content_hash(*content) -> str:
+    """Returns a stable hash of JSON serialisable content."""
+    return hashlib.sha256(
+        json.dumps(content, sort_keys=True, default=str).encode("utf-8")
+    ).hexdigest()
+
+
+# Properties the import sets itself, so the live graph has them and snapshots don't.
+IMPORT_PROPERTIES = frozenset(["id", "_created"])
+
+
+def _content_properties(properties: dict) -> dict:
+    """Returns the properties without the ones the import sets."""
+    return {
+        key: value
+        for key, value in (properties or {}).items()
+        if key not in IMPORT_PROPERTIES
+    }
+
+
+def node_hash(node: Node) -> str:
+    """Returns the content hash of a node: its label and properties."""
+    return _content_hash(node.type, _content_properties(node.properties))
+
+
+def relationship_hash(rel: Relationship) -> str:
+    """Returns the content hash of a relationship: its properties."""
+    return _content_hash(_content_properties(rel.properties))
+
+
+def relationship_key(rel: Relationship) -> Tuple[str, str, str]:
+    """Returns the key that identifies a relationship: (source id, type, target id)."""
+    return (rel.source.id, rel.type, rel.target.id)
+
+
+class GraphDiff:
+    """
+    The inserts, updates and deletes needed to turn one graph into another.
+
+    Nodes are identified by their id and relationships by (source id, type, target id).
+    Per node and per relationship a content hash is compared, so unchanged entities
+    are left alone. A node that changed label is deleted and inserted again, and so
+    are the relationships of that node.
+
+    Example:
+    diff = GraphDiff.compare(source=saved_graph, target=auradb.get_knowledge_graph())
+    if not diff.is_empty():
+        auradb.apply_diff(diff)
+    """
+
+    def __init__(self):
+        self.inserted_nodes: List[Node] = []
+        self.updated_nodes: List[Node] = []
+        self.deleted_nodes: List[Node] = []
+        self.inserted_relationships: List[Relationship] = []
+        self.updated_relationships: List[Relationship] = []
+        self.deleted_relationships: List[Relationship] = []
+
+    @classmethod
+    def compare(cls, source: dict, target: dict) -> "GraphDiff":
+        """
+        Computes the changes that turn the target graph into the source graph.
+
+        Args:
+            source (dict): The desired graph, with "nodes" and "relationships".
+            target (dict): The current graph, for example the live graph in Neo4J.
+
+        Returns:
+            GraphDiff: The changes to apply to the target.
+        """
+        diff = cls()
+
+        source_nodes: Dict[str, Node] = {node.id: node for node in source["nodes"]}
+        target_nodes: Dict[str, Node] = {node.id: node for node in target["nodes"]}
+
+        # Nodes that are deleted and inserted again lose their relationships.
+        replaced_nodes = set()
+        for node_id, node in source_nodes.items():
+            current = target_nodes.get(node_id)
+            if current is None:
+                diff.inserted_nodes.append(node)
+            elif current.type != node.type:
+                diff.deleted_nodes.append(current)
+                diff.inserted_nodes.append(node)
+                replaced_nodes.add(node_id)
+            elif node_hash(current) != node_hash(node):
+                diff.updated_nodes.append(node)
+
+        deleted_node_ids = set()
+        for node_id, current in target_nodes.items():
+            if node_id not in source_nodes:
+                diff.deleted_nodes.append(current)
+                deleted_node_ids.add(node_id)
+
+        source_rels = {relationship_key(rel): rel for rel in source["relationships"]}
+        target_rels = {relationship_key(rel): rel for rel in target["relationships"]}
+
+        for key, rel in source_rels.items():
+            current = target_rels.get(key)
+            if (
+                current is None
+                or rel.source.id in replaced_nodes
+                or rel.target.id in replaced_nodes
+            ):
+                diff.inserted_relationships.append(rel)
+            elif relationship_hash(current) != relationship_hash(rel):
+                diff.updated_relationships.append(rel)
+
+        for key, current in target_rels.items():
+            # Relationships of deleted nodes are removed by the detach delete.
+            if key not in source_rels and not (
+                {current.source.id, current.target.id}
+                & (deleted_node_ids | replaced_nodes)
+            ):
+                diff.deleted_relationships.append(current)
+
+        return diff
+
+    def is_empty(self) -> bool:
+        """Returns True if the graphs are the same."""
+        return not any(self.summary().values())
+
+    def summary(self) -> dict:
+        """Returns the number of changes per kind."""
+        return {
+            "inserted_nodes": len(self.inserted_nodes),
+            "updated_nodes": len(self.updated_nodes),
+            "deleted_nodes": len(self.deleted_nodes),
+            "inserted_relationships": len(self.inserted_relationships),
+            "updated_relationships": len(self.updated_relationships),
+            "deleted_relationships": len(self.deleted_relationships),
+        }
@@ -0,0 +1,98 @@
+import os
+import json
+import threading
+
+
+class ImportCheckpoint:
+    """
+    Keeps track of the committed batches of an import in a JSON file, so an
+    interrupted import can resume where it stopped.
+
+    The checkpoint is only reused when its fingerprint (for example the source file,
+    its size and the batch size) matches, otherwise the import starts over.
+
+    Example:
+    checkpoint = ImportCheckpoint("tmp/import.checkpoint.json", {"source": "export.jsonl"})
+    if not checkpoint.is_done("nodes", 0):
+        ...
+        checkpoint.mark_done("nodes", 0, created=10)
+    """
+
+    def __init__(self, path: str, fingerprint: dict):
+        """
+        Loads the checkpoint from disk, or starts a new one.
+
+        Args:
+            path (str): The JSON file to store the checkpoint in. When None, the
+                progress is only kept in memory.
+            fingerprint (dict): Identifies the import; a stored checkpoint with a
+                different fingerprint is ignored.
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._state = {"fingerprint": fingerprint, "done": {}, "created": {}}
+
+        if path is not None and os.path.exists(path):
+            with open(path, "r", encoding="utf-8") as file:
+                state = json.load(file)
+            if state.get("fingerprint") == fingerprint:
+                self._state = state
+
+        self._done = {
+            phase: set(indexes) for phase, indexes in self._state["done"].items()
+        }
+
+    def is_done(self, phase: str, index: int) -> bool:
+        """
+        Returns whether the batch was committed by this or a previous run.
+
+        Args:
+            phase (str): The phase of the import, for example "nodes".
+            index (int): The index of the batch within the phase.
+        """
+        return index in self._done.get(phase, set())
+
+    def mark_done(self, phase: str, index: int, created: int = 0) -> None:
+        """
+        Records a committed batch and writes the checkpoint to disk.
+
+        Args:
+            phase (str): The phase of the import, for example "nodes".
+            index (int): The index of the batch within the phase.
+            created (int): The number of entities the batch created.
+        """
+        with self._lock:
+            self._done.setdefault(phase, set()).add(index)
+            self._state["done"][phase] = sorted(self._done[phase])
+            self._state["created"][phase] = (
+                self._state["created"].get(phase, 0) + created
+            )
+            self._save()
+
+    def done_count(self, phase: str) -> int:
+        """Returns the number of committed batches in the phase."""
+        return len(self._done.get(phase, set()))
+
+    def created_count(self, phase: str) -> int:
+        """Returns the number of entities created in the phase, over all runs."""
+        return self._state["created"].get(phase, 0)
+
+    def remove(self) -> None:
+        """Removes the checkpoint file, for example when the import is finished."""
+        with self._lock:
+            if self.path is not None and os.path.exists(self.path):
+                os.remove(self.path)
+
+    def _save(self) -> None:
+        """Writes the checkpoint atomically, so a crash never leaves a broken file."""
+        if self.path is None:
+            return
+
+        directory = os.path.dirname(self.path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as file:
+            json.dump(self._state, file)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,120 @@
+import os
+import time
+import threading
+from typing import Dict, Tuple
+from langchain_community.graphs import Neo4jGraph
+
+
+class SchemaCache:
+    """
+    A process-wide cache of the Neo4J graph schema, keyed by (uri, user).
+
+    Refreshing the schema runs several APOC meta queries, so the schema is cached
+    and copied onto the Neo4jGraph instead of introspected for every question.
+    Entries expire after `ttl` seconds and are invalidated explicitly after the
+    graph is changed, for example by an import in the Graph Manager.
+
+    Example:
+    SchemaCache.apply(graph, (uri, user))
+    ...
+    auradb.import_graph(graph)
+    SchemaCache.invalidate(uri, user)
+    """
+
+    # Seconds after which a cached schema is introspected again.
+    ttl: float = float(os.getenv("NEO4J_SCHEMA_CACHE_TTL", "600"))
+
+    _entries: Dict[Tuple[str, str], dict] = {}
+    _key_locks: Dict[Tuple[str, str], threading.Lock] = {}
+    _lock = threading.RLock()
+    _hits: int = 0
+    _misses: int = 0
+
+    @classmethod
+    def apply(cls, graph: Neo4jGraph, key: Tuple[str, str]) -> bool:
+        """
+        Sets the cached schema on the graph, refreshing it first when it is missing or expired.
+
+        Args:
+            graph (Neo4jGraph): The graph to set the schema on.
+            key (Tuple[str, str]): The (uri, user) of the connection of the graph.
+
+        Returns:
+            bool: True if the cached schema was used, False if it was refreshed.
+        """
+        with cls._lock:
+            key_lock = cls._key_locks.setdefault(key, threading.Lock())
+
+        # One refresh per connection at a time, other sessions wait and reuse it.
+        with key_lock:
+            entry = cls._get_entry(key)
+            hit = entry is not None
+            if not hit:
+                graph.refresh_schema()
+                entry = cls.store(key, graph)
+
+        with cls._lock:
+            if hit:
+                cls._hits += 1
+            else:
+                cls._misses += 1
+
+        graph.schema = entry["schema"]
+        graph.structured_schema = entry["structured_schema"]
+        return hit
+
+    @classmethod
+    def store(cls, key: Tuple[str, str], graph: Neo4jGraph) -> dict:
+        """
+        Stores the current schema of the graph, for example right after connecting.
+
+        Args:
+            key (Tuple[str, str]): The (uri, user) of the connection of the graph.
+            graph (Neo4jGraph): The graph with a refreshed schema.
+
+        Returns:
+            dict: The cache entry.
+        """
+        entry = {
+            "schema": graph.schema,
+            "structured_schema": graph.structured_schema,
+            "refreshed_at": time.monotonic(),
+        }
+        with cls._lock:
+            cls._entries[key] = entry
+        return entry
+
+    @classmethod
+    def _get_entry(cls, key: Tuple[str, str]) -> dict:
+        """Returns the entry for the key, or None when it is missing or expired."""
+        with cls._lock:
+            entry = cls._entries.get(key)
+            if entry is not None and time.monotonic() - entry["refreshed_at"] > cls.ttl:
+                del cls._entries[key]
+                entry = None
+        return entry
+
+    @classmethod
+    def invalidate(cls, uri: str = None, user: str = None) -> None:
+        """
+        Removes the cached schema of a connection, or of all connections when no uri is given.
+
+        Args:
+            uri (str, optional): The Neo4J connection URI.
+            user (str, optional): The username.
+        """
+        with cls._lock:
+            if uri is None:
+                cls._entries.clear()
+            else:
+                cls._entries.pop((uri, user), None)
+
+    @classmethod
+    def stats(cls) -> dict:
+        """Returns the number of cached schemas, hits and misses."""
+        with cls._lock:
+            return {
+                "size": len(cls._entries),
+                "hits": cls._hits,
+                "misses": cls._misses,
+            }
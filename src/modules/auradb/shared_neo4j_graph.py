@@ -0,0 +1,43 @@
+from neo4j import Driver
+from langchain_community.graphs import Neo4jGraph
+from .driver_registry import DriverRegistry
+
+
+class SharedNeo4jGraph(Neo4jGraph):
+    """
+    A Neo4jGraph that runs its queries on the shared driver of the DriverRegistry.
+
+    Neo4jGraph opens its own driver and keeps it for its lifetime. This graph
+    fetches the driver for its uri and user on every query instead, so a graph
+    shared between sessions uses the registry pool and follows credential changes
+    and evictions. The schema is not introspected on creation, use
+    SchemaCache.apply() or refresh_schema().
+
+    Example:
+    graph = SharedNeo4jGraph(uri, user, password)
+    SchemaCache.apply(graph, (uri, user))
+    graph.query("MATCH (n) RETURN count(n)")
+    """
+
+    def __init__(
+        self,
+        url: str,
+        username: str,
+        password: str,
+        database: str = "neo4j",
+        timeout: float = None,
+        sanitize: bool = False,
+    ) -> None:
+        # Neo4jGraph.__init__ would open its own driver, set its attributes instead.
+        self._url = url
+        self._username = username
+        self._password = password
+        self._database = database
+        self.timeout = timeout
+        self.sanitize = sanitize
+        self.schema: str = ""
+        self.structured_schema: dict = {}
+
+    @property
+    def _driver(self) -> Driver:
+        return DriverRegistry.get_driver(self._url, self._username, self._password)
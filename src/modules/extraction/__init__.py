@@ -7,3 +7,5 @@ from .prompts import extraction_prompt, generate_prompt_with_labels, system_prom
 # from .llm_data_extractor import LLMDataExtractor
 from .base_extractor import BaseExtractor
 from .few_shot_data_extractor import FewShotDataExtractor
+from .extraction_cache import ExtractionCache
+from .extraction_job import ExtractionJob
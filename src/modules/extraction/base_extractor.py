@@ -19,18 +19,28 @@ class BaseExtractor(abc.ABC):
     def run(self, data: str) -> List[GraphDocument]:
         pass
 
-    def _chunk_text(self, text: str, llm: BaseChatModel, messages) -> List[Document]:
-        return self._chunk_documents([Document(page_content=text)], llm, messages)
+    def _chunk_text(
+        self, text: str, llm: BaseChatModel, messages, prompt_tokens: int = None
+    ) -> List[Document]:
+        return self._chunk_documents(
+            [Document(page_content=text)], llm, messages, prompt_tokens
+        )
 
     def _chunk_documents(
-        self, documents: List[Document], llm: BaseChatModel, messages
+        self,
+        documents: List[Document],
+        llm: BaseChatModel,
+        messages,
+        prompt_tokens: int = None,
     ) -> List[Document]:
         if llm is None:
             raise ValueError("Either llm must be provided to calculate chunk size.")
 
         gpt_max_tokens = int(os.getenv("AZURE_OPENAI_MODEL_MAX_TOKENS", "4096"))
 
-        prompt_tokens = llm.get_num_tokens_from_messages(messages=messages)
+        # The caller can pass the token count of the messages it computed before.
+        if prompt_tokens is None:
+            prompt_tokens = llm.get_num_tokens_from_messages(messages=messages)
         # Reduce by 400 to reserve room for allowed nodes and rels
         chunk_size = gpt_max_tokens - prompt_tokens - 400
         print("🍪 Chunk size", chunk_size)
@@ -0,0 +1,147 @@
+import os
+import json
+import hashlib
+import threading
+from typing import List, Optional
+from langchain_community.graphs.graph_document import Node, Relationship
+from uwv_toolkit.db import Database, SqliteCache
+from uwv_toolkit.utils import persistent_path
+
+
+def output_to_dict(output: dict) -> dict:
+    """Converts the "nodes" and "relationships" of an extraction to JSON types."""
+
+    def node_dict(node: Node) -> dict:
+        return {"id": node.id, "type": node.type, "properties": node.properties}
+
+    return {
+        "nodes": [node_dict(node) for node in output["nodes"]],
+        "relationships": [
+            {
+                "source": node_dict(relationship.source),
+                "target": node_dict(relationship.target),
+                "type": relationship.type,
+                "properties": relationship.properties,
+            }
+            for relationship in output["relationships"]
+        ],
+    }
+
+
+def output_from_dict(data: dict) -> dict:
+    """Converts the result of output_to_dict() back to nodes and relationships."""
+    nodes = {node["id"]: Node(**node) for node in data["nodes"]}
+    relationships = [
+        Relationship(
+            source=nodes.get(relationship["source"]["id"])
+            or Node(**relationship["source"]),
+            target=nodes.get(relationship["target"]["id"])
+            or Node(**relationship["target"]),
+            type=relationship["type"],
+            properties=relationship["properties"],
+        )
+        for relationship in data["relationships"]
+    ]
+    return {"nodes": list(nodes.values()), "relationships": relationships}
+
+
+class ExtractionCache:
+    """
+    A persistent cache of the parsed extraction output per chunk.
+
+    The key covers everything that changes the output: the chunk text, the
+    system prompt, the labels passed to the LLM, the model and the temperature.
+    Extracting an unchanged chunk again, for example after a crash or a page
+    rerun, doesn't call the LLM.
+
+    Usage example:
+        cache = ExtractionCache.shared()
+        output = cache.get(key)
+        if output is None:
+            ...
+            cache.set(key, output)
+    """
+
+    # The maximum number of cached chunks.
+    max_entries: int = int(os.getenv("EXTRACTION_CACHE_MAX_ENTRIES", "5000"))
+
+    _shared: "ExtractionCache" = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, cache: SqliteCache):
+        """
+        Args:
+            cache (SqliteCache): The cache to store the output in.
+        """
+        self._cache = cache
+
+    @classmethod
+    def shared(cls) -> "ExtractionCache":
+        """Returns the process-wide cache, stored in the persistent storage."""
+        with cls._shared_lock:
+            if cls._shared is None:
+                db_path = persistent_path("cache", force_create=True)
+                cls._shared = cls(
+                    SqliteCache(
+                        Database(f"{db_path}/extraction_cache.db"),
+                        "extraction_cache",
+                        max_entries=cls.max_entries,
+                    )
+                )
+            return cls._shared
+
+    @staticmethod
+    def key(
+        chunk_text: str,
+        system_prompt: str,
+        labels: List[str],
+        model: str,
+        temperature: Optional[float],
+    ) -> str:
+        """Returns the cache key of a chunk extraction."""
+
+        def digest(text: str) -> str:
+            return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+        return digest(
+            json.dumps(
+                [
+                    digest(chunk_text),
+                    digest(system_prompt),
+                    sorted(labels),
+                    model,
+                    temperature,
+                ]
+            )
+        )
+
+    def get(self, key: str) -> Optional[dict]:
+        """
+        Returns the cached "nodes" and "relationships" for the key, or None.
+
+        Args:
+            key (str): The key, see key().
+        """
+        value = self._cache.get(key)
+        if value is None:
+            return None
+
+        return output_from_dict(json.loads(value))
+
+    def set(self, key: str, output: dict) -> None:
+        """
+        Stores the parsed extraction output.
+
+        Args:
+            key (str): The key, see key().
+            output (dict): The "nodes" and "relationships" of the chunk.
+        """
+        self._cache.set(key, json.dumps(output_to_dict(output), ensure_ascii=False))
+
+    def clear(self) -> None:
+        """Removes all cached output."""
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        """Returns the number of cached chunks, hits and misses."""
+        return self._cache.stats()
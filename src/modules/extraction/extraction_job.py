@@ -0,0 +1,312 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+from langchain_core.documents import Document
+from langchain_community.graphs.graph_document import GraphDocument
+from uwv_toolkit.utils import persistent_path
+from .extraction_cache import output_from_dict, output_to_dict
+from .few_shot_data_extractor import FewShotDataExtractor
+
+
+def _document_to_dict(document: Document) -> dict:
+    return {"page_content": document.page_content, "metadata": document.metadata}
+
+
+def _graph_document_to_dict(graph_document: GraphDocument) -> dict:
+    return {
+        **output_to_dict(
+            {
+                "nodes": graph_document.nodes,
+                "relationships": graph_document.relationships,
+            }
+        ),
+        "source": _document_to_dict(graph_document.source),
+    }
+
+
+def _graph_document_from_dict(data: dict) -> GraphDocument:
+    return GraphDocument(**output_from_dict(data), source=Document(**data["source"]))
+
+
+class ExtractionJob:
+    """
+    A document-to-KG extraction that runs in the background and checkpoints every chunk.
+
+    The chunks, the graph document of every finished chunk and the progress are
+    stored on disk as JSON, in a directory per job. A browser refresh doesn't stop the
+    job, and a failed or interrupted job is resumed from the finished chunks:
+    only the remaining chunks are sent to the LLM.
+
+    The job id is derived from the chunks, the extraction settings and the user,
+    so starting the same extraction again picks up the existing job of the user.
+
+    Usage example:
+        chunks = extractor.chunk_list(documents)
+        job = ExtractionJob.create(chunks, settings, username)
+        job.start(extractor)
+        ...
+        job = ExtractionJob(job_id)
+        if job.status()["status"] == ExtractionJob.DONE:
+            graph = job.result()
+    """
+
+    PENDING = "pending"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    # The state on disk says running, but no thread runs it, e.g. after a restart.
+    INTERRUPTED = "interrupted"
+
+    # The running jobs of this process, by directory.
+    _threads: Dict[str, threading.Thread] = {}
+    _lock = threading.RLock()
+
+    def __init__(self, job_id: str, directory: str = None):
+        """
+        Args:
+            job_id (str): The id of the job, see create().
+            directory (str, optional): The directory of all jobs. Defaults to
+                "extraction_jobs" in the persistent storage.
+        """
+        if directory is None:
+            directory = persistent_path("extraction_jobs", force_create=True)
+
+        self.job_id = job_id
+        self.path = os.path.join(directory, job_id)
+
+    @staticmethod
+    def make_id(chunks: List[Document], settings: dict, username: str = None) -> str:
+        """Returns the id of the extraction of the chunks with the settings by the user."""
+        digest = hashlib.sha256(
+            json.dumps([username, settings], sort_keys=True, default=str).encode(
+                "utf-8"
+            )
+        )
+        for chunk in chunks:
+            digest.update(b"\0" + chunk.page_content.encode("utf-8"))
+        return digest.hexdigest()[:16]
+
+    @classmethod
+    def create(
+        cls,
+        chunks: List[Document],
+        settings: dict,
+        username: str = None,
+        name: str = None,
+        directory: str = None,
+    ) -> "ExtractionJob":
+        """
+        Stores a new job, or returns the existing job of the same extraction.
+
+        Args:
+            chunks (List[Document]): The chunks to extract, see
+                FewShotDataExtractor.chunk_list().
+            settings (dict): The settings to recreate the extractor with on resume,
+                for example the system prompt and temperature.
+            username (str, optional): The owner of the job.
+            name (str, optional): The name to show, for example the file name.
+            directory (str, optional): See __init__().
+
+        Returns:
+            ExtractionJob: The job.
+        """
+        if not chunks:
+            raise ValueError("An extraction job needs at least one chunk.")
+
+        job = cls(cls.make_id(chunks, settings, username), directory)
+        if os.path.exists(job._state_path):
+            return job
+
+        os.makedirs(os.path.join(job.path, "chunks"), exist_ok=True)
+        job._write_json("input.json", [_document_to_dict(chunk) for chunk in chunks])
+        job._write_state(
+            {
+                "job_id": job.job_id,
+                "name": name,
+                "username": username,
+                "settings": settings,
+                "status": cls.PENDING,
+                "total": len(chunks),
+                "cache_hits": 0,
+                "error": None,
+                "created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "updated_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            }
+        )
+        return job
+
+    @classmethod
+    def list_jobs(cls, username: str = None, directory: str = None) -> List[dict]:
+        """
+        Returns the state of the stored jobs, the most recent first.
+
+        Args:
+            username (str, optional): Only returns the jobs of this user.
+            directory (str, optional): See __init__().
+        """
+        if directory is None:
+            directory = persistent_path("extraction_jobs", force_create=True)
+
+        jobs = []
+        for job_id in os.listdir(directory):
+            job = cls(job_id, directory)
+            if not os.path.exists(job._state_path):
+                continue
+            state = job.status()
+            if username is None or state["username"] == username:
+                jobs.append(state)
+        return sorted(jobs, key=lambda state: state["created_at"], reverse=True)
+
+    @property
+    def _state_path(self) -> str:
+        return os.path.join(self.path, "state.json")
+
+    def _write_json(self, filename: str, value: object) -> None:
+        # Write to a temporary file first, so a crash never leaves a half written file.
+        filepath = os.path.join(self.path, filename)
+        with open(f"{filepath}.tmp", "w", encoding="utf-8") as file:
+            json.dump(value, file, ensure_ascii=False, default=str)
+        os.replace(f"{filepath}.tmp", filepath)
+
+    def _read_json(self, filename: str) -> object:
+        with open(os.path.join(self.path, filename), encoding="utf-8") as file:
+            return json.load(file)
+
+    def _write_state(self, state: dict) -> None:
+        self._write_json("state.json", state)
+
+    def _update_state(self, **values) -> None:
+        state = self._read_json("state.json")
+        state.update(values, updated_at=datetime.now().strftime("%Y-%m-%d %H:%M:%S"))
+        self._write_state(state)
+
+    def chunks(self) -> List[Document]:
+        """Returns the chunks of the job."""
+        return [Document(**chunk) for chunk in self._read_json("input.json")]
+
+    def completed(self) -> Dict[int, GraphDocument]:
+        """Returns the graph documents of the finished chunks, by chunk index."""
+        completed = {}
+        for filename in os.listdir(os.path.join(self.path, "chunks")):
+            if filename.endswith(".json"):
+                index = int(filename.split(".")[0])
+                completed[index] = _graph_document_from_dict(
+                    self._read_json(os.path.join("chunks", filename))
+                )
+        return completed
+
+    def is_running(self) -> bool:
+        """Returns whether a thread of this process runs the job."""
+        with self._lock:
+            thread = self._threads.get(self.path)
+            return thread is not None and thread.is_alive()
+
+    def status(self) -> dict:
+        """Returns the stored state with the number of finished chunks."""
+        state = self._read_json("state.json")
+        state["done"] = len(
+            [
+                filename
+                for filename in os.listdir(os.path.join(self.path, "chunks"))
+                if filename.endswith(".json")
+            ]
+        )
+        if state["status"] == self.RUNNING and not self.is_running():
+            state["status"] = self.INTERRUPTED
+        return state
+
+    def result(self) -> List[GraphDocument]:
+        """
+        Returns the graph documents of the job.
+
+        For a finished job these are the reconciled graph documents, otherwise the
+        graph documents of the chunks finished so far, in chunk order.
+        """
+        if os.path.exists(os.path.join(self.path, "result.json")):
+            return [
+                _graph_document_from_dict(graph_document)
+                for graph_document in self._read_json("result.json")
+            ]
+
+        completed = self.completed()
+        return [completed[index] for index in sorted(completed)]
+
+    def run(self, extractor: FewShotDataExtractor) -> List[GraphDocument]:
+        """
+        Runs the remaining chunks of the job in the current thread.
+
+        Args:
+            extractor (FewShotDataExtractor): The extractor, created with the
+                settings of the job.
+
+        Returns:
+            List[GraphDocument]: The graph document per chunk.
+        """
+        completed = self.completed()
+        self._update_state(status=self.RUNNING, error=None)
+        # The cache hits of this job, the extractor may have run other chunks before.
+        cache_hits = self.status().get("cache_hits", 0) - extractor.cache_hits
+
+        def checkpoint(index: int, graph_document: GraphDocument) -> None:
+            self._write_json(
+                os.path.join("chunks", f"{index:05d}.json"),
+                _graph_document_to_dict(graph_document),
+            )
+            self._update_state(cache_hits=cache_hits + extractor.cache_hits)
+
+        try:
+            result = extractor.run_chunks(self.chunks(), completed, checkpoint)
+        except Exception as e:
+            self._update_state(status=self.FAILED, error=str(e))
+            raise
+
+        self._write_json(
+            "result.json",
+            [_graph_document_to_dict(graph_document) for graph_document in result],
+        )
+        self._update_state(status=self.DONE)
+        return result
+
+    def start(self, extractor: FewShotDataExtractor) -> bool:
+        """
+        Runs the remaining chunks of the job in a background thread.
+
+        Args:
+            extractor (FewShotDataExtractor): See run().
+
+        Returns:
+            bool: False if the job is already running or done.
+        """
+        with self._lock:
+            thread = self._threads.get(self.path)
+            if thread is not None and thread.is_alive():
+                return False
+            if self.status()["status"] == self.DONE:
+                return False
+
+            def run() -> None:
+                try:
+                    self.run(extractor)
+                except Exception as e:
+                    # The error is stored in the state, the job can be resumed.
+                    logging.error("🔴 Extraction job %s failed: %s", self.job_id, e)
+
+            thread = threading.Thread(
+                target=run, name=f"extraction-job-{self.job_id}", daemon=True
+            )
+            self._threads[self.path] = thread
+            # Mark it running right away, so the page shows the progress on the next run.
+            self._update_state(status=self.RUNNING, error=None)
+            thread.start()
+            return True
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """Waits until the background thread of the job has finished."""
+        with self._lock:
+            thread = self._threads.get(self.path)
+        if thread is not None:
+            thread.join(timeout)
@@ -2,7 +2,9 @@ import json
 import re
 import warnings
 import os
-from typing import List
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, List
 
 from langchain.schema import Document
 from langchain.output_parsers import OutputFixingParser
@@ -17,6 +19,14 @@ from .prompts import (
     generate_extraction_prompt,
 )
 from src.modules.extraction.output_parsers import KnowledgeGraphParser
+from src.modules.extraction.extraction_cache import ExtractionCache
+from src.modules.extraction.label_reconciliation import (
+    count_labels,
+    local_label_mapping,
+    llm_label_mapping,
+    apply_label_mapping,
+    label_agreement,
+)
 from src.modules.extraction import BaseExtractor
 from langchain.globals import set_debug, set_verbose
 from modules.utils.load_env import load_env
@@ -37,10 +47,25 @@ class FewShotDataExtractor(BaseExtractor):
     llm: BaseChatModel
     # Whether to print verbose output.
     verbose: bool
+    # The number of chunks extracted concurrently, 1 extracts them one by one.
+    max_workers: int = 1
+    # Merge synonymous labels with an LLM call after a parallel extraction.
+    reconcile_with_llm: bool = True
+    # Chunks with a lower share of labels used by other chunks are extracted again.
+    rerun_agreement_threshold: float = None
+    # Reuses the output of chunks that were extracted before with the same settings.
+    cache: ExtractionCache = None
     _extraction_prompt: ChatPromptTemplate
 
     def __init__(
-        self, llm: BaseChatModel, system_prompt: str = None, verbose: bool = False
+        self,
+        llm: BaseChatModel,
+        system_prompt: str = None,
+        verbose: bool = False,
+        max_workers: int = None,
+        reconcile_with_llm: bool = None,
+        rerun_agreement_threshold: float = None,
+        cache: ExtractionCache = None,
     ) -> None:
         """
         Creates a new instance of the FewShotDataExtractor class.
@@ -49,56 +74,136 @@ class FewShotDataExtractor(BaseExtractor):
             llm (BaseChatModel): The language model to use for extraction.
             prompt (str, optional): The prompt to use for extraction. Defaults to None.
             verbose (bool, optional): Whether to print verbose output. Defaults to False.
+            max_workers (int, optional): The number of chunks to extract concurrently.
+                Defaults to 1, which passes the labels found so far to every next chunk.
+            reconcile_with_llm (bool, optional): Merge synonymous labels with an LLM
+                call after a parallel extraction. Defaults to True.
+            rerun_agreement_threshold (float, optional): Extract chunks again, with the
+                reconciled labels, when a lower share of their labels is used by other
+                chunks. Defaults to no reruns.
+            cache (ExtractionCache, optional): The cache of the parsed output per
+                chunk, prompt, labels and model. Defaults to no cache.
         """
         self.llm = llm
         self.verbose = verbose
+        if max_workers is not None:
+            self.max_workers = max_workers
+        if reconcile_with_llm is not None:
+            self.reconcile_with_llm = reconcile_with_llm
+        if rerun_agreement_threshold is not None:
+            self.rerun_agreement_threshold = rerun_agreement_threshold
         if system_prompt is not None:
             self._extraction_prompt = generate_extraction_prompt(system_prompt)
         else:
             self._extraction_prompt = extraction_prompt
+        self.cache = cache
+        # The system prompt and examples, as part of the cache key.
+        self._prompt_text = self._extraction_prompt.format(input="")
+        # The chain is built once and reused for every chunk.
+        self._chain = (
+            self._extraction_prompt
+            | self.llm
+            | OutputFixingParser.from_llm(parser=KnowledgeGraphParser(), llm=self.llm)
+        )
+        self._model_name = (
+            getattr(self.llm, "deployment_name", None)
+            or getattr(self.llm, "model_name", None)
+            or type(self.llm).__name__
+        )
+        # The token count of the prompt without input, see _prompt_tokens().
+        self._prompt_token_count = None
+        # The number of chunks this extractor got from the cache.
+        self.cache_hits = 0
+        self._cache_hits_lock = threading.Lock()
 
     def run_list(self, data: List[Document]) -> List[GraphDocument]:
-        chunked_data = self._chunk_documents(
+        return self._run_chunked_data(self.chunk_list(data))
+
+    def chunk_list(self, data: List[Document]) -> List[Document]:
+        """Splits the documents into chunks that fit the token window with the prompt."""
+        return self._chunk_documents(
             documents=data,
             llm=self.llm,
-            messages=self._extraction_prompt.format_messages(input=""),
+            messages=None,
+            prompt_tokens=self._prompt_tokens(),
         )
 
-        return self._run_chunked_data(chunked_data)
+    def _prompt_tokens(self) -> int:
+        """Returns the token count of the prompt without input, counted once."""
+        if self._prompt_token_count is None:
+            self._prompt_token_count = self.llm.get_num_tokens_from_messages(
+                messages=self._extraction_prompt.format_messages(input="")
+            )
+        return self._prompt_token_count
+
+    def run_chunks(
+        self,
+        chunked_data: List[Document],
+        completed: Dict[int, GraphDocument] = None,
+        on_chunk: Callable[[int, GraphDocument], None] = None,
+    ) -> List[GraphDocument]:
+        """
+        Runs the extraction on chunks, skipping the chunks that are already extracted.
+
+        Args:
+            chunked_data (List[Document]): The chunks, see chunk_list().
+            completed (Dict[int, GraphDocument], optional): The graph documents of
+                the chunks extracted before, by chunk index.
+            on_chunk (Callable[[int, GraphDocument], None], optional): Called with the
+                index and graph document of every chunk as soon as it is extracted,
+                before the labels are reconciled.
+
+        Returns:
+            List[GraphDocument]: The graph document per chunk.
+        """
+        return self._run_chunked_data(chunked_data, completed or {}, on_chunk)
 
     def run(self, data: str) -> List[GraphDocument]:
         chunked_data = self._chunk_text(
             text=data,
             llm=self.llm,
-            messages=self._extraction_prompt.format_messages(input=""),
+            messages=None,
+            prompt_tokens=self._prompt_tokens(),
         )
 
         return self._run_chunked_data(chunked_data)
 
-    def _run_chunked_data(self, chunked_data: List[Document]) -> List[GraphDocument]:
+    def _run_chunked_data(
+        self,
+        chunked_data: List[Document],
+        completed: Dict[int, GraphDocument] = None,
+        on_chunk: Callable[[int, GraphDocument], None] = None,
+    ) -> List[GraphDocument]:
         """
         Runs the extraction on the given data.
 
         Args:
             chunked_data (List[Document]): The chunked data to extract from.
+            completed (Dict[int, GraphDocument], optional): See run_chunks().
+            on_chunk (Callable[[int, GraphDocument], None], optional): See run_chunks().
 
         Returns:
             List[str]: The extracted data.
         """
+        completed = completed or {}
+
+        if self.max_workers > 1 and len(chunked_data) > 1:
+            return self._run_chunked_data_parallel(chunked_data, completed, on_chunk)
 
         labels = set()
         result = []
 
         for index, chunk in enumerate(chunked_data):
-            if self.verbose:
-                print(f"🐢 Working on chunk {index+1}/{len(chunked_data)}.")
+            if index in completed:
+                graph_document = completed[index]
+            else:
+                if self.verbose:
+                    print(f"🐢 Working on chunk {index+1}/{len(chunked_data)}.")
 
-            llm_output = self._process_with_labels(chunk, list(labels))
-            graph_document = GraphDocument(
-                nodes=llm_output["nodes"],
-                relationships=llm_output["relationships"],
-                source=chunk,
-            )
+                # Sorted, so the prompt (and cache key) doesn't depend on the set order.
+                graph_document = self._extract_chunk(chunk, sorted(labels))
+                if on_chunk is not None:
+                    on_chunk(index, graph_document)
             result.append(graph_document)
 
             newlabels = [node.type for node in graph_document.nodes]
@@ -115,16 +220,137 @@ class FewShotDataExtractor(BaseExtractor):
 
         return result
 
-    def _process_with_labels(self, chunk: Document, labels: List[str]) -> BaseMessage:
+    def _run_chunked_data_parallel(
+        self,
+        chunked_data: List[Document],
+        completed: Dict[int, GraphDocument] = None,
+        on_chunk: Callable[[int, GraphDocument], None] = None,
+    ) -> List[GraphDocument]:
         """
-        Processes the given chunk with the given labels.
+        Runs the extraction on the chunks concurrently.
+
+        The first chunk is extracted on its own to seed the labels for the other
+        chunks. Afterwards the labels are reconciled, see _reconcile_labels().
+        When a chunk fails the other chunks are still finished, and passed to
+        on_chunk, before the error is raised.
+
+        Args:
+            chunked_data (List[Document]): The chunked data to extract from.
+            completed (Dict[int, GraphDocument], optional): See run_chunks().
+            on_chunk (Callable[[int, GraphDocument], None], optional): See run_chunks().
+
+        Returns:
+            List[GraphDocument]: The graph document per chunk.
         """
-        chain = (
-            self._extraction_prompt
-            | self.llm
-            | OutputFixingParser.from_llm(parser=KnowledgeGraphParser(), llm=self.llm)
+        result = dict(completed or {})
+        pending = [index for index in range(len(chunked_data)) if index not in result]
+        if self.verbose:
+            print(f"🐇 Working on {len(pending)} chunks, {self.max_workers} at a time.")
+
+        if 0 not in result:
+            result[0] = self._extract_chunk(chunked_data[0], [])
+            if on_chunk is not None:
+                on_chunk(0, result[0])
+            pending.remove(0)
+        labels = sorted({node.type for node in result[0].nodes})
+
+        error = None
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {
+                executor.submit(self._extract_chunk, chunked_data[index], labels): index
+                for index in pending
+            }
+            for future in as_completed(futures):
+                try:
+                    result[futures[future]] = future.result()
+                except Exception as e:
+                    error = error or e
+                    continue
+                if on_chunk is not None:
+                    on_chunk(futures[future], result[futures[future]])
+        if error is not None:
+            raise error
+        result = [result[index] for index in range(len(chunked_data))]
+
+        self._reconcile_labels(result)
+
+        if self.rerun_agreement_threshold is not None:
+            agreement = label_agreement(result)
+            reruns = [
+                index
+                for index, score in enumerate(agreement)
+                if score < self.rerun_agreement_threshold
+            ]
+            if reruns:
+                if self.verbose:
+                    print(f"🔁 Extracting {len(reruns)} low agreement chunks again.")
+
+                labels = sorted(count_labels(result))
+                with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+                    rerun_result = list(
+                        executor.map(
+                            lambda index: self._extract_chunk(
+                                chunked_data[index], labels
+                            ),
+                            reruns,
+                        )
+                    )
+                for index, graph_document in zip(reruns, rerun_result):
+                    result[index] = graph_document
+                self._reconcile_labels(result)
+
+        if self.verbose:
+            print("✨ Done!")
+            print(f"\nResult ({len(result)}):", result)
+
+        return result
+
+    def _reconcile_labels(self, graph_documents: List[GraphDocument]) -> None:
+        """
+        Merges spelling variants of labels and, with reconcile_with_llm, synonymous labels.
+        """
+        apply_label_mapping(graph_documents, local_label_mapping(graph_documents))
+
+        labels = sorted(count_labels(graph_documents))
+        if self.reconcile_with_llm and len(labels) > 1:
+            mapping = llm_label_mapping(self.llm, labels)
+            apply_label_mapping(graph_documents, mapping)
+
+            if self.verbose:
+                merged = {label: to for label, to in mapping.items() if label != to}
+                print("🏷️ Merged labels", merged)
+
+    def _extract_chunk(self, chunk: Document, labels: List[str]) -> GraphDocument:
+        """Extracts the graph document of a single chunk."""
+        llm_output = self._process_with_labels(chunk, labels)
+        return GraphDocument(
+            nodes=llm_output["nodes"],
+            relationships=llm_output["relationships"],
+            source=chunk,
         )
-        output = chain.invoke(
+
+    def _process_with_labels(self, chunk: Document, labels: List[str]) -> dict:
+        """
+        Processes the given chunk with the given labels.
+        """
+        if self.cache is not None:
+            key = ExtractionCache.key(
+                chunk.page_content,
+                self._prompt_text,
+                labels,
+                self._model_name,
+                getattr(self.llm, "temperature", None),
+            )
+            output = self.cache.get(key)
+            if output is not None:
+                with self._cache_hits_lock:
+                    self.cache_hits += 1
+                return output
+
+        output = self._chain.invoke(
             {"input": generate_prompt_with_labels(chunk.page_content, labels)}
         )
+
+        if self.cache is not None:
+            self.cache.set(key, output)
         return output
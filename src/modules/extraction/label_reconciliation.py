@@ -0,0 +1,104 @@
+import re
+import json
+import warnings
+from collections import Counter
+from typing import Dict, List
+from langchain_core.language_models import BaseChatModel
+from langchain_core.output_parsers import StrOutputParser
+from langchain_community.graphs.graph_document import GraphDocument
+from .prompts import label_reconciliation_prompt
+
+
+def label_key(label: str) -> str:
+    """Returns the label without case, spaces, punctuation and a plural ending."""
+    key = re.sub(r"[^0-9a-z]", "", label.casefold())
+    for suffix in ("en", "s"):
+        if len(key) > len(suffix) + 3 and key.endswith(suffix):
+            return key[: -len(suffix)]
+    return key
+
+
+def count_labels(graph_documents: List[GraphDocument]) -> Counter:
+    """Counts the node types of all graph documents."""
+    return Counter(
+        node.type for graph_document in graph_documents for node in graph_document.nodes
+    )
+
+
+def local_label_mapping(graph_documents: List[GraphDocument]) -> Dict[str, str]:
+    """
+    Maps spelling variants of a label ("Persoon", "persoon", "Personen") to the
+    most frequent variant.
+    """
+    counts = count_labels(graph_documents)
+    canonical: Dict[str, str] = {}
+    for label, _ in counts.most_common():
+        canonical.setdefault(label_key(label), label)
+    return {label: canonical[label_key(label)] for label in counts}
+
+
+def llm_label_mapping(llm: BaseChatModel, labels: List[str]) -> Dict[str, str]:
+    """
+    Asks the LLM to map synonymous labels to one of them, for example
+    "Organisatie" and "Instantie". Labels that are left out map to themselves.
+    """
+    chain = label_reconciliation_prompt | llm | StrOutputParser()
+    output = chain.invoke({"labels": json.dumps(labels, ensure_ascii=False)})
+
+    try:
+        mapping = json.loads(output[output.index("{") : output.rindex("}") + 1])
+    except ValueError as e:
+        warnings.warn(f"🔴 Could not parse the label mapping: {e}.")
+        return {label: label for label in labels}
+
+    # Only merge into labels that exist, so the LLM can't invent new ones.
+    mapping = {
+        label: mapping[label] if mapping.get(label) in labels else label
+        for label in labels
+    }
+    return {label: _resolve_label(mapping, label) for label in labels}
+
+
+def _resolve_label(mapping: Dict[str, str], label: str) -> str:
+    """
+    Follows the mapping until a label maps to itself, so "A" -> "B" -> "C" maps
+    "A" to "C". The labels of a cycle all map to the first of them in sorted order.
+    """
+    seen = []
+    while label not in seen:
+        seen.append(label)
+        label = mapping.get(label, label)
+    return min(seen[seen.index(label) :])
+
+
+def apply_label_mapping(
+    graph_documents: List[GraphDocument], mapping: Dict[str, str]
+) -> None:
+    """Renames the node types of the graph documents in place."""
+    for graph_document in graph_documents:
+        for node in graph_document.nodes:
+            node.type = mapping.get(node.type, node.type)
+        for relationship in graph_document.relationships:
+            for node in (relationship.source, relationship.target):
+                node.type = mapping.get(node.type, node.type)
+
+
+def label_agreement(graph_documents: List[GraphDocument]) -> List[float]:
+    """
+    Returns per graph document the share of its node types that other graph
+    documents use as well. A chunk that invented its own labels scores low.
+    """
+    document_labels = [
+        {node.type for node in graph_document.nodes}
+        for graph_document in graph_documents
+    ]
+    usage = Counter(label for labels in document_labels for label in labels)
+
+    return [
+        (
+            sum(1 for label in labels if usage[label] > 1) / len(labels)
+            if labels and len(graph_documents) > 1
+            else 1.0
+        )
+        for labels in document_labels
+    ]
@@ -1,40 +1,143 @@
 import warnings
 import re
 import json
-from typing import List
+from typing import Any, List
 from langchain_core.output_parsers import BaseOutputParser
 from langchain_core.exceptions import OutputParserException
-from langchain_community.graphs.graph_document import GraphDocument, Node, Relationship
+from langchain_community.graphs.graph_document import Node, Relationship
 from src.modules.extraction.prompts import few_shot_prompt_examples, system_prompt
 
-
-class KnowledgeGraphParser(BaseOutputParser):
-    def parse(self, text: str) -> dict:
-        output_pattern = r"\[\s*['\"].+?['\"]\s*,\s*['\"].+?['\"]\s*,\s*\{.*?\}\]"
-
-        try:
-            nodes_text = text.split("Nodes:")[1].split("Relationships:")[0]
-            relationships_text = text.split("Relationships:")[1]
-        except IndexError as e:
-            raise OutputParserException(
-                """Could not parse Nodes and Relationships strings from output. Structure of the answer is not in the correct schema. Expected output schema:
+SCHEMA_ERROR = """Could not parse Nodes and Relationships strings from output. Structure of the answer is not in the correct schema. Expected output schema:
                 Nodes: [[ENTITY_ID_1, RELATIONSHIP, ENTITY_ID_2, PROPERTIES], ...]
                 Relationships: [[ENTITY_ID_1, RELATIONSHIP, ENTITY_ID_2, PROPERTIES], ...]"""
-            ) from e
 
-        if not nodes_text or not relationships_text:
-            raise OutputParserException(
-                """Could not parse Nodes and Relationships strings from output.
-                Structure of the answer is not in the correct schema. Expected output schema:
-                Nodes: [[ENTITY_ID_1, RELATIONSHIP, ENTITY_ID_2, PROPERTIES], ...]
-                Relationships: [[ENTITY_ID_1, RELATIONSHIP, ENTITY_ID_2, PROPERTIES], ...]"""
+_SECTIONS = re.compile(r"Nodes:(.*?)Relationships:(.*)", re.S)
+
+# A quote only closes a string when a delimiter follows, so apostrophes in
+# values ('Disney's tekenaar') don't end the string.
+_TOKENS = re.compile(
+    r"""\s*(?:
+        (?P<open>[\[{(])
+      | (?P<close>[\]})])
+      | (?P<comma>,)
+      | (?P<colon>:)
+      | '(?P<single>(?:[^'\\]|\\.|'(?!\s*(?:[,\]}):]|$)))*)'
+      | "(?P<double>(?:[^"\\]|\\.|"(?!\s*(?:[,\]}):]|$)))*)"
+      | (?P<word>[^\s\[\]{}(),:'"]+)
+      | (?P<error>\S)
+    )""",
+    re.X | re.S,
+)
+_ESCAPE = re.compile(r"\\(.)", re.S)
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r"}
+_WORDS = {
+    "true": True,
+    "True": True,
+    "false": False,
+    "False": False,
+    "null": None,
+    "None": None,
+}
+_JSON = json.JSONDecoder()
+
+
+class _LiteralReader:
+    """
+    Reads one Python or JSON literal, like ast.literal_eval without running code.
+
+    It tolerates what models get wrong: apostrophes in quoted values, unquoted
+    words and missing closing brackets at the end of the text.
+    """
+
+    def __init__(self, text: str, pos: int):
+        # All tokens in one pass, the reader only looks at the tokens it needs.
+        self._tokens = [
+            (match.lastgroup, match.group(match.lastgroup))
+            for match in _TOKENS.finditer(text, pos)
+        ]
+        self._tokens.append((None, None))
+        self._index = -1
+        self._next()
+
+    def _next(self) -> None:
+        self._index += 1
+        self._kind, self._value = self._tokens[self._index]
+
+    def read(self) -> Any:
+        kind, value = self._kind, self._value
+        if kind == "open":
+            self._next()
+            return self._read_dict() if value == "{" else self._read_list()
+        if kind in ("single", "double"):
+            self._next()
+            return _ESCAPE.sub(
+                lambda match: _ESCAPES.get(match.group(1), match.group(1)), value
             )
+        if kind == "word":
+            # Unquoted words up to the next delimiter form one value.
+            words = [value]
+            self._next()
+            while self._kind == "word":
+                words.append(self._value)
+                self._next()
+            return self._word_value(" ".join(words))
+
+        raise OutputParserException(f"🔴 Unexpected {value!r} in the output.")
+
+    @staticmethod
+    def _word_value(word: str) -> Any:
+        if word in _WORDS:
+            return _WORDS[word]
+        for number in (int, float):
+            try:
+                return number(word)
+            except ValueError:
+                pass
+        return word
+
+    def _read_list(self) -> list:
+        items = []
+        while self._kind is not None:
+            if self._kind == "close":
+                self._next()
+                return items
+            if self._kind == "comma":
+                self._next()
+                continue
+            items.append(self.read())
+        return items
+
+    def _read_dict(self) -> dict:
+        items = {}
+        while self._kind is not None:
+            if self._kind == "close":
+                self._next()
+                return items
+            if self._kind == "comma":
+                self._next()
+                continue
+            key = self.read()
+            if self._kind != "colon":
+                raise OutputParserException(f"🔴 Expected ':' after key {key!r}.")
+            self._next()
+            items[str(key)] = self.read()
+        return items
+
+
+class KnowledgeGraphParser(BaseOutputParser):
+    def parse(self, text: str) -> dict:
+        sections = _SECTIONS.search(text)
+        if sections is None:
+            raise OutputParserException(SCHEMA_ERROR)
 
-        nodes_rows = re.findall(output_pattern, nodes_text)
-        nodes = self._parse_nodes(nodes_rows)
+        nodes_text, relationships_text = sections.groups()
+        if not nodes_text or not relationships_text:
+            raise OutputParserException(SCHEMA_ERROR)
 
-        relationship_rows = re.findall(output_pattern, relationships_text)
-        relationships = self._parse_relationships(relationship_rows, nodes)
+        nodes = self._parse_nodes(self._parse_rows(nodes_text))
+        relationships = self._parse_relationships(
+            self._parse_rows(relationships_text), nodes
+        )
 
         return {"nodes": list(nodes.values()), "relationships": relationships}
 
@@ -49,32 +152,47 @@ class KnowledgeGraphParser(BaseOutputParser):
     def _type(self) -> str:
         return "boolean_output_parser"
 
-    def _parse_nodes(self, node_rows: List[str]) -> dict[Node]:
-        node_pattern = r"\[['\"]([^'\"]+)['\"],\s*['\"]([^'\"]+)['\"],\s*(\{.*?\})\]"
+    @staticmethod
+    def _parse_rows(text: str) -> List[Any]:
+        """Returns the rows of the list of a Nodes or Relationships section."""
+        start = text.find("[")
+        if start == -1:
+            return []
+
+        # JSON output is decoded by the C decoder, the rest by the literal reader.
+        try:
+            rows, _ = _JSON.raw_decode(text, start)
+        except ValueError:
+            rows = _LiteralReader(text, start).read()
+
+        # A single row without the surrounding list.
+        if rows and not isinstance(rows[0], (list, dict)):
+            rows = [rows]
+        return rows
 
+    def _parse_nodes(self, node_rows: List[Any]) -> dict[Node]:
         result = {}
         for row in node_rows:
-            node_match = re.match(node_pattern, row)
-
-            if node_match is None:
-                raise OutputParserException(f"🔴 Cound not parse node {row}")
+            if not isinstance(row, list):
+                warnings.warn(f"🔴 Skipping node {row}, it is not a list.")
+                continue
+            if len(row) < 2 or isinstance(row[0], (list, dict)):
+                raise OutputParserException(f"🔴 Could not parse node {row}")
 
-            name = node_match.group(1)
+            name = str(row[0])
             node_id = name.lower().replace(" ", "_")
-            node_type = node_match.group(2).title()
+            node_type = str(row[1]).title()
 
-            properties = node_match.group(3)
-            properties = properties.replace("'", '"')
-            try:
-                properties = json.loads(properties)
+            properties = row[2] if len(row) > 2 else {}
+            if isinstance(properties, dict):
                 if "name" not in properties:
                     if "naam" in properties:
                         properties["name"] = properties["naam"]
                         del properties["naam"]
                     else:
                         properties["name"] = name
-            except ValueError as e:
-                warnings.warn(f"🔴 Error parsing node properties of {row}, error: {e}.")
+            else:
+                warnings.warn(f"🔴 Error parsing node properties of {row}.")
                 properties = {"name": name}
 
             result[node_id] = Node(id=node_id, type=node_type, properties=properties)
@@ -82,17 +200,19 @@ class KnowledgeGraphParser(BaseOutputParser):
         return result
 
     def _parse_relationships(
-        self, rel_rows: List[str], nodes: dict[Node]
+        self, rel_rows: List[Any], nodes: dict[Node]
     ) -> List[Relationship]:
-        rel_pattern = r"\[['\"]([^'\"]+)['\"],\s*['\"]([^'\"]+)['\"],\s*['\"]([^'\"]+)['\"],\s*({[^}]*})"
-
         result = []
         for row in rel_rows:
-            matches = re.search(rel_pattern, row)
-            if matches is None:
-                raise OutputParserException(f"🔴 Cound not parse rel {row}")
+            if not isinstance(row, list):
+                warnings.warn(f"🔴 Skipping relationship {row}, it is not a list.")
+                continue
+            if len(row) < 3 or any(
+                isinstance(value, (list, dict)) for value in row[:3]
+            ):
+                raise OutputParserException(f"🔴 Could not parse rel {row}")
 
-            source_id = matches.group(1).lower().replace(" ", "_")
+            source_id = str(row[0]).lower().replace(" ", "_")
             if source_id not in nodes:
                 warnings.warn(
                     f"🔴 Cound not find relationship {source_id}"
@@ -102,7 +222,7 @@ class KnowledgeGraphParser(BaseOutputParser):
 
             source_node = nodes[source_id]
 
-            target_id = matches.group(3).lower().replace(" ", "_")
+            target_id = str(row[2]).lower().replace(" ", "_")
             if target_id not in nodes:
                 warnings.warn(
                     f"🔴 Cound not find relationship target {target_id}"
@@ -111,14 +231,11 @@ class KnowledgeGraphParser(BaseOutputParser):
                 continue
 
             target_node = nodes[target_id]
-            reltype = matches.group(2)
+            reltype = str(row[1])
 
-            properties = matches.group(4)
-            properties = properties.replace("'", '"')
-            try:
-                properties = json.loads(properties)
-            except ValueError as e:
-                warnings.warn(f"🔴 Error parsing relationship of {row}, error: {e}.")
+            properties = row[3] if len(row) > 3 else {}
+            if not isinstance(properties, dict):
+                warnings.warn(f"🔴 Error parsing relationship of {row}.")
                 properties = {}
 
             result.append(
@@ -172,6 +172,23 @@ def generate_extraction_prompt(prompt: str) -> ChatPromptTemplate:
 
 extraction_prompt = generate_extraction_prompt(system_prompt)
 
+label_reconciliation_prompt = ChatPromptTemplate.from_messages(
+    [
+        (
+            "system",
+            """You are a data scientist cleaning up the node labels of a knowledge graph.
+The labels were extracted from different parts of the same document, so some of them mean the same thing.
+Map every label that is a synonym, translation or spelling variant of another label to the most generic of them.
+Only use labels from the list as targets. Answer with a JSON object from label to label, and nothing else.
+
+Example:
+Labels: ["Persoon", "Personen", "Mens", "Bedrijf", "Organisatie", "Wet"]
+Answer: {{"Persoon": "Persoon", "Personen": "Persoon", "Mens": "Persoon", "Bedrijf": "Bedrijf", "Organisatie": "Organisatie", "Wet": "Wet"}}""",
+        ),
+        ("human", "Labels: {labels}"),
+    ]
+)
+
 # def generate_system_extraction_prompt(
 #     allowed_types: Optional[List[str]] = None,
 #     allowed_rels: Optional[List[str]] = None,
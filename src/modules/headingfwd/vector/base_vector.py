@@ -1,6 +1,6 @@
 import bs4
 import os
-import hashlib
+import logging
 from typing import List
 from langchain_openai import AzureOpenAIEmbeddings
 from langchain_community.vectorstores import Chroma
@@ -12,6 +12,8 @@ from langchain_community.document_loaders import (
 from langchain.embeddings import CacheBackedEmbeddings
 from langchain.storage import LocalFileStore
 from langchain.text_splitter import RecursiveCharacterTextSplitter
+from langchain_core.documents import Document
+from uwv_toolkit.langchain import CachedChroma, ConcurrentEmbeddings
 from modules.utils import Utilities
 from modules.utils.load_env import load_env
 
@@ -76,58 +78,74 @@ class BaseVector:
             openai_api_version=os.environ["AZURE_OPENAI_API_VERSION"],
             azure_endpoint=os.environ["EMBEDDINGS_AZURE_OPENAI_ENDPOINT"],
             deployment=os.environ["EMBEDDINGS_AZURE_OPENAI_DEPLOYMENT"],
+            # ConcurrentEmbeddings retries rate limited requests, the client doesn't.
+            max_retries=0,
         )
+        # Batched, concurrent requests that back off when rate limited.
+        concurrent_embeddings = ConcurrentEmbeddings(azure_embeddings)
         if self._enable_cache:
             store = LocalFileStore(f"{self.persist_dir}/embeddings_cache/")
 
             return CacheBackedEmbeddings.from_bytes_store(
-                azure_embeddings, store, namespace=azure_embeddings.model
+                concurrent_embeddings, store, namespace=azure_embeddings.model
             )
         else:
-            return azure_embeddings
+            return concurrent_embeddings
 
         return embeddings
         # return HuggingFaceEmbeddings(model_name="intfloat/multilingual-e5-small")
 
+    def _load_document(self, doc: str) -> List[Document]:
+        """Loads a single file with the loader for its extension"""
+        # Get the extension of the file
+        ext = os.path.splitext(doc)[1]
+
+        # Get the loader for the file based on the extension
+        if ext == ".html":
+            loader = UnstructuredHTMLLoader(doc)
+        elif ext == ".pdf":
+            loader = PyPDFLoader(doc)
+        elif ext == ".docx":
+            loader = UnstructuredWordDocumentLoader(doc)
+        else:
+            raise ValueError(f"Unknown file extension: {ext}")
+
+        return loader.load()
+
+    def _split_documents(self, docs: List[Document]) -> List[Document]:
+        """Splits the documents into chunks"""
+        text_splitter = RecursiveCharacterTextSplitter(
+            chunk_size=self._chunk_size, chunk_overlap=self._chunk_overlap
+        )
+        return text_splitter.split_documents(docs)
+
     def setup(self):
-        """Method to setup the vector object"""
+        """Method to setup the vector object
+
+        Only new and changed chunks are embedded and stale chunks are removed, so
+        indexing again after editing one document is cheap.
+        """
 
         if len(self.documents) == 0:
             raise ValueError("No documents specified")
 
-        docs = []
-        for doc in self.documents:
-            # Get the extension of the file
-            ext = os.path.splitext(doc)[1]
-
-            # Get the loader for the file based on the extension
-            if ext == ".html":
-                loader = UnstructuredHTMLLoader(doc)
-            elif ext == ".pdf":
-                loader = PyPDFLoader(doc)
-            elif ext == ".docx":
-                loader = UnstructuredWordDocumentLoader(doc)
-            else:
-                raise ValueError(f"Unknown file extension: {ext}")
+        vectordb = CachedChroma(
+            persist_directory=self.persist_dir,
+            embedding_function=self.embeddings(),
+        )
+        self.index(vectordb)
 
-            docs.extend(loader.load())
+        return vectordb
 
-        text_splitter = RecursiveCharacterTextSplitter(
-            chunk_size=1000, chunk_overlap=200
-        )
-        chunks = text_splitter.split_documents(docs)
-
-        ids = []
-        for index, doc in enumerate(chunks):
-            ids.append(
-                hashlib.sha256(
-                    (doc.metadata["source"] + "_" + str(index)).encode()
-                ).hexdigest()
-            )
+    def index(self, vectordb: CachedChroma) -> dict:
+        """
+        Brings the collection in line with the documents, see CachedChroma.index_documents().
 
-        return Chroma.from_documents(
-            chunks,
-            self.embeddings(),
-            persist_directory=self.persist_dir,
-            ids=ids,
+        Returns:
+            dict: The number of unchanged files and added, deleted and unchanged chunks.
+        """
+        stats = vectordb.index_documents(
+            self.documents, self._load_document, self._split_documents
         )
+        logging.info("📚 Indexed documents %s", stats)
+        return stats
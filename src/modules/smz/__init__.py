@@ -1,3 +1,7 @@
 from .smz_doc_chain import SmzDocChain
 from .smz_doc_vector import SmzDocVector
 from .smz_graphqa_chain import SmzGraphQAChain
+from .chain_registry import ChainRegistry
+from .cypher_cache import CypherCache
+from .semantic_answer_cache import SemanticAnswerCache
+from .standalone_question import StandaloneQuestionCheck
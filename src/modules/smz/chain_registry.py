@@ -0,0 +1,103 @@
+import threading
+from typing import Dict, Tuple
+from langchain_community.graphs import Neo4jGraph
+from uwv_toolkit.utils import azure_llm
+from modules.auradb.driver_registry import DriverRegistry
+from modules.auradb.schema_cache import SchemaCache
+from modules.auradb.shared_neo4j_graph import SharedNeo4jGraph
+from modules.smz.smz_graphqa_chain import SmzGraphQAChain
+from modules.smz.cypher_cache import CypherCache
+
+
+class ChainRegistry:
+    """
+    A process-wide registry of SmzGraphQAChain instances, keyed by the graph
+    connection and the LLM settings.
+
+    Building the chain creates the LLM client, the prompts and the Runnable graph,
+    so it is done once and the chain is shared between questions and sessions.
+    A chain is rebuilt when the cached schema of its connection changed, for
+    example after an import in the Graph Manager, or when the password changed.
+    The chain queries a SharedNeo4jGraph on the DriverRegistry driver of the
+    connection, not the graph of the session that happened to build it.
+
+    Example:
+    chain = ChainRegistry.get_graph_qa_chain(
+        graph, (uri, user), password, {"temperature": 0.1}
+    )
+    result = chain.ask(question="Wie is Walter?")
+    """
+
+    _chains: Dict[tuple, SmzGraphQAChain] = {}
+    _key_locks: Dict[tuple, threading.Lock] = {}
+    _lock = threading.RLock()
+
+    @classmethod
+    def get_graph_qa_chain(
+        cls,
+        graph: Neo4jGraph,
+        connection_key: Tuple[str, str],
+        password: str,
+        llm_settings: dict = None,
+        cache_cypher: bool = True,
+    ) -> SmzGraphQAChain:
+        """
+        Returns the shared chain for the connection and LLM settings, building it when needed.
+
+        Args:
+            graph (Neo4jGraph): The graph of the caller, used to check the schema.
+            connection_key (Tuple[str, str]): The (uri, user) of the connection.
+            password (str): The password of the connection.
+            llm_settings (dict, optional): The keyword arguments for azure_llm(),
+                for example {"temperature": 0.1}.
+            cache_cypher (bool, optional): Reuse generated Cypher through the shared
+                CypherCache. Defaults to True.
+
+        Returns:
+            SmzGraphQAChain: The shared chain.
+        """
+        llm_settings = llm_settings or {}
+        key = (
+            connection_key,
+            DriverRegistry.password_hash(password),
+            tuple(sorted(llm_settings.items())),
+            cache_cypher,
+        )
+
+        with cls._lock:
+            key_lock = cls._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            # Cheap when the schema is cached, refreshes it when it was invalidated.
+            SchemaCache.apply(graph, connection_key)
+
+            chain = cls._chains.get(key)
+            if chain is None or chain.schema != graph.schema:
+                chain = SmzGraphQAChain(
+                    llm=azure_llm(**llm_settings),
+                    graph=SharedNeo4jGraph(*connection_key, password),
+                    schema_cache_key=connection_key,
+                    cypher_cache=CypherCache.shared() if cache_cypher else None,
+                )
+                with cls._lock:
+                    cls._chains[key] = chain
+
+        return chain
+
+    @classmethod
+    def clear(cls, connection_key: Tuple[str, str] = None) -> None:
+        """
+        Removes the chains of a connection, or all chains when no connection is given.
+
+        Args:
+            connection_key (Tuple[str, str], optional): The (uri, user) of the connection.
+        """
+        with cls._lock:
+            for key in list(cls._chains.keys()):
+                if connection_key is None or key[0] == connection_key:
+                    del cls._chains[key]
+
+    @classmethod
+    def size(cls) -> int:
+        """Returns the number of registered chains."""
+        return len(cls._chains)
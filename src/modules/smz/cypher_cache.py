@@ -0,0 +1,116 @@
+import os
+import json
+import hashlib
+import threading
+from typing import Any, Dict, Optional
+from langchain.chains import LLMChain
+from langchain_core.callbacks import CallbackManagerForChainRun
+from uwv_toolkit.db import Database, SqliteCache
+from uwv_toolkit.utils import normalise_question, persistent_path
+
+
+class CypherCache:
+    """
+    A persistent cache of generated Cypher, keyed by the normalised standalone
+    question and a hash of the graph schema.
+
+    Because the schema is part of the key, a cached query is never used for a
+    graph with a different schema. Only queries that ran without errors are stored.
+
+    Usage example:
+        cache = CypherCache.shared()
+        cypher = cache.get(question, graph.schema)
+        if cypher is None:
+            ...
+            cache.set(question, graph.schema, cypher)
+    """
+
+    # The maximum number of cached queries.
+    max_entries: int = int(os.getenv("CYPHER_CACHE_MAX_ENTRIES", "1000"))
+    # Seconds after which a cached query is generated again.
+    ttl: float = float(os.getenv("CYPHER_CACHE_TTL", str(7 * 24 * 60 * 60)))
+
+    _shared: "CypherCache" = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, cache: SqliteCache):
+        """
+        Args:
+            cache (SqliteCache): The cache to store the queries in.
+        """
+        self._cache = cache
+
+    @classmethod
+    def shared(cls) -> "CypherCache":
+        """Returns the process-wide cache, stored in the persistent storage."""
+        with cls._shared_lock:
+            if cls._shared is None:
+                db_path = persistent_path("cache", force_create=True)
+                cls._shared = cls(
+                    SqliteCache(
+                        Database(f"{db_path}/cypher_cache.db"),
+                        "cypher_cache",
+                        max_entries=cls.max_entries,
+                        ttl=cls.ttl,
+                    )
+                )
+            return cls._shared
+
+    @staticmethod
+    def schema_hash(schema: str) -> str:
+        """Returns a hash of the graph schema."""
+        return hashlib.sha256(schema.encode("utf-8")).hexdigest()
+
+    def _key(self, question: str, schema: str) -> str:
+        key = json.dumps([normalise_question(question), self.schema_hash(schema)])
+        return hashlib.sha256(key.encode("utf-8")).hexdigest()
+
+    def get(self, question: str, schema: str) -> Optional[str]:
+        """
+        Returns the cached Cypher for the question and schema, or None.
+
+        Args:
+            question (str): The standalone question.
+            schema (str): The graph schema the query was generated for.
+        """
+        return self._cache.get(self._key(question, schema))
+
+    def set(self, question: str, schema: str, cypher: str) -> None:
+        """
+        Stores the Cypher for the question and schema.
+
+        Args:
+            question (str): The standalone question.
+            schema (str): The graph schema the query was generated for.
+            cypher (str): The validated Cypher query.
+        """
+        if cypher:
+            self._cache.set(self._key(question, schema), cypher)
+
+    def clear(self) -> None:
+        """Removes all cached queries."""
+        self._cache.clear()
+
+    def stats(self) -> dict:
+        """Returns the number of cached queries, hits and misses."""
+        return self._cache.stats()
+
+
+class CachedCypherGenerationChain(LLMChain):
+    """
+    The Cypher generation step of GraphCypherQAChain, which returns the cached
+    Cypher for known questions instead of calling the LLM.
+    """
+
+    cypher_cache: Any = None
+
+    def _call(
+        self,
+        inputs: Dict[str, Any],
+        run_manager: Optional[CallbackManagerForChainRun] = None,
+    ) -> Dict[str, str]:
+        cypher = self.cypher_cache.get(inputs["question"], inputs["schema"])
+        if cypher is not None:
+            return {self.output_key: cypher}
+
+        return super()._call(inputs, run_manager=run_manager)
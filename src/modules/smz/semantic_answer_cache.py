@@ -0,0 +1,170 @@
+import os
+import re
+import threading
+import numpy as np
+from collections import OrderedDict
+from typing import List, Optional
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from uwv_toolkit.utils import normalise_question
+
+# Words with two or more capitals (WIA, WAO) and numbers, see SemanticAnswerCache.key_terms().
+_KEY_TERMS = re.compile(r"\b\w*[A-Z]\w*[A-Z]\w*\b|\d+(?:[.,]\d+)*")
+
+
+class SemanticAnswerCache:
+    """
+    An in-memory cache of answers, looked up by the similarity of the standalone question.
+
+    A question whose embedding has a cosine similarity of at least
+    `similarity_threshold` with a previous question gets the previous answer and
+    sources, without retrieving documents or calling the LLM. Questions about
+    different acronyms or numbers, like the WIA and the WAO, embed almost the
+    same, so a hit also needs the same key terms, see key_terms(). When the cache
+    holds more than `max_entries` answers, the least recently used ones are removed.
+
+    The answers depend on the indexed documents, so call clear() (or create a new
+    cache) when the index is rebuilt.
+
+    Usage example:
+        cache = SemanticAnswerCache(vectordb.embeddings)
+        chain = SmzDocChain(vectorstore=vectordb, llm=llm, answer_cache=cache)
+    """
+
+    # The minimal cosine similarity of two questions to share an answer.
+    similarity_threshold: float = float(
+        os.getenv("ANSWER_CACHE_SIMILARITY_THRESHOLD", "0.95")
+    )
+    # The maximum number of cached answers.
+    max_entries: int = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "256"))
+
+    def __init__(
+        self,
+        embeddings: Embeddings,
+        similarity_threshold: float = None,
+        max_entries: int = None,
+    ):
+        """
+        Args:
+            embeddings (Embeddings): The embeddings to compare the questions with.
+            similarity_threshold (float, optional): Overrides the class default.
+            max_entries (int, optional): Overrides the class default.
+        """
+        if similarity_threshold is not None:
+            self.similarity_threshold = similarity_threshold
+        if max_entries is not None:
+            self.max_entries = max_entries
+        if self.max_entries < 1:
+            raise ValueError("The maximum number of entries should be at least 1.")
+
+        self._embeddings = embeddings
+        # Normalised question -> {"embedding", "response", "context"}, oldest first.
+        self._entries: OrderedDict = OrderedDict()
+        # Normalised question -> unit vector, so a missed question isn't embedded twice.
+        self._vectors: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key_terms(question: str) -> frozenset:
+        """Returns the acronyms and numbers in the question, lowercased."""
+        return frozenset(term.lower() for term in _KEY_TERMS.findall(question))
+
+    def _embed(self, question: str) -> np.ndarray:
+        """Returns the unit length embedding of the question."""
+        key = normalise_question(question)
+        with self._lock:
+            vector = self._vectors.get(key)
+            if vector is not None:
+                self._vectors.move_to_end(key)
+                return vector
+
+        vector = np.asarray(self._embeddings.embed_query(key), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector = vector / norm
+
+        with self._lock:
+            self._vectors[key] = vector
+            while len(self._vectors) > self.max_entries:
+                self._vectors.popitem(last=False)
+        return vector
+
+    def lookup(self, question: str) -> Optional[dict]:
+        """
+        Returns the cached answer of the most similar question above the threshold.
+
+        Only questions with the same key terms are compared.
+
+        Args:
+            question (str): The standalone question.
+
+        Returns:
+            dict: The "response", "context" and "similarity", or None on a miss.
+        """
+        vector = self._embed(question)
+        terms = self.key_terms(question)
+
+        with self._lock:
+            keys = [
+                key for key, entry in self._entries.items() if entry["terms"] == terms
+            ]
+            if keys:
+                matrix = np.stack([self._entries[key]["embedding"] for key in keys])
+                similarities = matrix @ vector
+                best = int(np.argmax(similarities))
+
+                if similarities[best] >= self.similarity_threshold:
+                    self._entries.move_to_end(keys[best])
+                    self.hits += 1
+                    entry = self._entries[keys[best]]
+                    return {
+                        "response": entry["response"],
+                        "context": entry["context"],
+                        "similarity": float(similarities[best]),
+                    }
+
+            self.misses += 1
+            return None
+
+    def set(self, question: str, response: str, context: List[Document]) -> None:
+        """
+        Stores the answer and sources for the question.
+
+        Args:
+            question (str): The standalone question.
+            response (str): The answer.
+            context (List[Document]): The retrieved documents the answer is based on.
+        """
+        key = normalise_question(question)
+        vector = self._embed(question)
+
+        with self._lock:
+            self._entries[key] = {
+                "embedding": vector,
+                "terms": self.key_terms(question),
+                "response": response,
+                "context": context,
+            }
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Removes all cached answers, for example after the documents are indexed again."""
+        with self._lock:
+            self._entries.clear()
+
+    def size(self) -> int:
+        """Returns the number of cached answers."""
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        """Returns the number of cached answers, hits and misses."""
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
@@ -3,10 +3,6 @@ from typing import List, Iterator, Dict, Any, Optional
 from uuid import UUID
 from operator import itemgetter
 
-import sys
-from io import StringIO
-from langchain.globals import set_debug
-
 from langchain_core.messages import BaseMessage
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import (
@@ -18,7 +14,11 @@ from langchain_core.runnables import (
     RunnablePassthrough,
     RunnableBranch,
     RunnableParallel,
+    RunnableLambda,
 )
+from uwv_toolkit.langchain import TraceCallbackHandler
+from modules.smz.semantic_answer_cache import SemanticAnswerCache
+from modules.smz.standalone_question import StandaloneQuestionCheck
 
 
 class SmzDocChain:
@@ -27,6 +27,7 @@ class SmzDocChain:
     k = 5
     _retriever: VectorStoreRetriever = None
     _chain: RunnableParallel = None
+    _answer_cache: SemanticAnswerCache = None
 
     def __init__(
         self,
@@ -34,11 +35,22 @@ class SmzDocChain:
         llm,
         score_threshold: float = None,
         k: int = None,
+        answer_cache: SemanticAnswerCache = None,
     ):
+        """
+        Args:
+            vectorstore (VectorStore): The indexed documents.
+            llm: The LLM to contextualise the question and answer it with.
+            score_threshold (float, optional): The minimal relevance of a document.
+            k (int, optional): The maximum number of documents.
+            answer_cache (SemanticAnswerCache, optional): Answer similar standalone
+                questions from the cache, without retrieval or an LLM call.
+        """
         if score_threshold is not None:
             self.score_threshold = score_threshold
         if k is not None:
             self.k = k
+        self._answer_cache = answer_cache
 
         self._retriever = vectorstore.as_retriever(
             search_type="similarity_score_threshold",
@@ -75,16 +87,24 @@ class SmzDocChain:
             ]
         )
 
+        timed_contextualize_q_chain = StandaloneQuestionCheck.timed(
+            contextualize_q_chain
+        )
+
         def contextualized_question(intermediate_result: dict):
-            if intermediate_result.get("chat_history"):
-                return contextualize_q_chain
-            else:
+            if not intermediate_result.get("chat_history"):
                 return intermediate_result["question"]
+            # Skip the LLM round trip when the question doesn't refer to the history.
+            if StandaloneQuestionCheck.is_standalone(intermediate_result["question"]):
+                StandaloneQuestionCheck.record_bypass()
+                return intermediate_result["question"]
+            return timed_contextualize_q_chain
 
-        self._chain = RunnablePassthrough.assign(
-            context=contextualized_question | self._retriever
+        answer_chain = RunnablePassthrough.assign(
+            context=itemgetter("contextualised_question") | self._retriever
         ) | RunnableParallel(
             context=itemgetter("context"),
+            contextualised_question=itemgetter("contextualised_question"),
             response=RunnableBranch(
                 (lambda x: len(x["context"]) == 0, lambda y: self.DEFAULT_ANSWER),
                 (
@@ -96,27 +116,99 @@ class SmzDocChain:
             ),
         )
 
+        chain = RunnablePassthrough.assign(
+            contextualised_question=contextualized_question
+        )
+        if answer_cache is None:
+            self._chain = chain | answer_chain
+        else:
+
+            def cached_answer(intermediate_result: dict) -> dict:
+                return {
+                    "context": intermediate_result["cached"]["context"],
+                    "contextualised_question": intermediate_result[
+                        "contextualised_question"
+                    ],
+                    "response": intermediate_result["cached"]["response"],
+                    "cached": True,
+                }
+
+            self._chain = (
+                chain
+                | RunnablePassthrough.assign(
+                    cached=itemgetter("contextualised_question")
+                    | RunnableLambda(answer_cache.lookup, name="SemanticAnswerCache")
+                )
+                | RunnableBranch(
+                    (lambda x: x["cached"] is not None, RunnableLambda(cached_answer)),
+                    answer_chain,
+                )
+            )
+
+    def _store_answer(self, result: dict) -> None:
+        """Stores a new answer that is based on documents in the answer cache."""
+        if (
+            self._answer_cache is None
+            or result.get("cached")
+            or not result.get("context")
+            or not result.get("response")
+            or result["response"] == self.DEFAULT_ANSWER
+        ):
+            return
+
+        self._answer_cache.set(
+            result["contextualised_question"], result["response"], result["context"]
+        )
+
     def ask(self, question: str, chat_history: List = []) -> Iterator:
         if not self._retriever:
             raise ValueError("Retriever not setup yet")
         if not self._chain:
             raise ValueError("Chain not setup yet")
 
-        # Create a StringIO object to capture stdout
-        stdout_capture = StringIO()
-        sys.stdout = stdout_capture
-
-        set_debug(True)
-
+        # A tracer per call, so concurrent sessions never share their traces.
+        tracer = TraceCallbackHandler()
         result = self._chain.invoke(
-            {"question": question, "chat_history": chat_history}
+            {"question": question, "chat_history": chat_history},
+            config={"callbacks": [tracer]},
         )
-        set_debug(False)
+        self._store_answer(result)
+        result["debug"] = tracer.to_text() + StandaloneQuestionCheck.summary()
+        result["trace"] = tracer.steps()
+        return result
 
-        # Get the captured stdout as a string
-        stdout_string = stdout_capture.getvalue()
+    def ask_stream(self, question: str, chat_history: List = []) -> Iterator[dict]:
+        """
+        Streams the answer as dict chunks: the "context" (sources) arrives first, then
+        the "response" token by token and finally the "debug" and "trace".
 
-        # Reset stdout to its original value
-        sys.stdout = sys.__stdout__
-        result["debug"] = stdout_string
-        return result
+        Args:
+            question (str): The question of the user.
+            chat_history (List): The previous messages.
+
+        Yields:
+            dict: A chunk with one or more of the keys of ask().
+        """
+        if not self._retriever:
+            raise ValueError("Retriever not setup yet")
+        if not self._chain:
+            raise ValueError("Chain not setup yet")
+
+        tracer = TraceCallbackHandler()
+        result = {"response": ""}
+        for chunk in self._chain.stream(
+            {"question": question, "chat_history": chat_history},
+            config={"callbacks": [tracer]},
+        ):
+            for key, value in chunk.items():
+                if key == "response":
+                    result["response"] += value
+                else:
+                    result[key] = value
+            yield chunk
+
+        self._store_answer(result)
+        yield {
+            "debug": tracer.to_text() + StandaloneQuestionCheck.summary(),
+            "trace": tracer.steps(),
+        }
@@ -1,10 +1,7 @@
 import os
 
-import sys
-from io import StringIO
 from operator import itemgetter
-from typing import List
-from langchain.globals import set_debug
+from typing import Iterator, List, Tuple
 from langchain.chains import GraphCypherQAChain
 from langchain_core.output_parsers import StrOutputParser
 from langchain_community.graphs import Neo4jGraph
@@ -16,7 +13,11 @@ from langchain_core.runnables import (
     RunnableBranch,
 )
 from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_core.messages import AIMessage
+from langchain_core.messages import AIMessage, get_buffer_string
+from uwv_toolkit.langchain import TraceCallbackHandler
+from modules.auradb.schema_cache import SchemaCache
+from modules.smz.cypher_cache import CypherCache, CachedCypherGenerationChain
+from modules.smz.standalone_question import StandaloneQuestionCheck
 from modules.smz.prompts import (
     CYPHER_GENERATION_PROMPT,
     CONTEXTUALIZE_QUESTION_GENERATION_PROMPT,
@@ -28,8 +29,27 @@ class SmzGraphQAChain:
     _chain: RunnableParallel = None
     _graph: Neo4jGraph = None
     _capture_output: bool = True
+    schema: str = None
 
-    def __init__(self, llm, graph: Neo4jGraph, capture_output: bool = True):
+    def __init__(
+        self,
+        llm,
+        graph: Neo4jGraph,
+        capture_output: bool = True,
+        schema_cache_key: Tuple[str, str] = None,
+        cypher_cache: CypherCache = None,
+    ):
+        """
+        Args:
+            llm: The LLM to generate the Cypher query and the answer with.
+            graph (Neo4jGraph): The graph to query.
+            capture_output (bool): Capture the debug output of the chain. Defaults to True.
+            schema_cache_key (Tuple[str, str], optional): The (uri, user) of the graph.
+                When given, the schema is taken from the SchemaCache instead of
+                introspected again.
+            cypher_cache (CypherCache, optional): Reuse the Cypher generated for the
+                same standalone question and schema instead of calling the LLM.
+        """
 
         if not isinstance(graph, Neo4jGraph):
             raise ValueError("The graph should be an instance of Neo4jGraph")
@@ -38,6 +58,9 @@ class SmzGraphQAChain:
         self._graph = graph
 
         contextualize_q_chain = self.setup_contextualizing_question_chain(llm)
+        timed_contextualize_q_chain = StandaloneQuestionCheck.timed(
+            contextualize_q_chain
+        )
 
         qa_system_prompt = """You are an assistant for question-answering tasks. \
         Use the following pieces of retrieved context to answer the question. \
@@ -63,9 +86,19 @@ class SmzGraphQAChain:
             ):
                 return intermediate_result["question"]
 
-            return contextualize_q_chain
+            # Skip the LLM round trip when the question doesn't refer to the history.
+            if StandaloneQuestionCheck.is_standalone(intermediate_result["question"]):
+                StandaloneQuestionCheck.record_bypass()
+                return intermediate_result["question"]
 
-        graph.refresh_schema()
+            return timed_contextualize_q_chain
+
+        if schema_cache_key is not None:
+            SchemaCache.apply(graph, schema_cache_key)
+        else:
+            graph.refresh_schema()
+        # The Cypher prompt is built with this schema.
+        self.schema = graph.schema
 
         graph_qa_chain = GraphCypherQAChain.from_llm(
             llm,
@@ -77,6 +110,14 @@ class SmzGraphQAChain:
             verbose=os.getenv("VERBOSE") == "1",
         )
 
+        if cypher_cache is not None:
+            # Skip the Cypher generation LLM call for known questions.
+            graph_qa_chain.cypher_generation_chain = CachedCypherGenerationChain(
+                llm=llm,
+                prompt=CYPHER_GENERATION_PROMPT,
+                cypher_cache=cypher_cache,
+            )
+
         def get_cypher_query(intermediate_result, **kwargs):
             print(intermediate_result)
             if (
@@ -133,6 +174,17 @@ class SmzGraphQAChain:
                 and "query" in intermediate_result["graphqa"]["intermediate_steps"][0]
             ):
                 results = intermediate_result["graphqa"]["intermediate_steps"][0]
+                if (
+                    cypher_cache is not None
+                    and intermediate_result["graphqa"]["result"]
+                ):
+                    # The query ran and returned rows, so it can be reused. A query
+                    # without rows may be wrong, it is generated again next time.
+                    cypher_cache.set(
+                        intermediate_result["graphqa"]["query"],
+                        graph_qa_chain.graph_schema,
+                        results["query"],
+                    )
                 return {
                     "question": intermediate_result["question"],
                     "chat_history": intermediate_result["chat_history"],
@@ -167,32 +219,65 @@ class SmzGraphQAChain:
         if not self._chain:
             raise ValueError("Chain not setup yet")
 
-        # Create a StringIO object to capture stdout
-        if self._capture_output:
-            stdout_capture = StringIO()
-            sys.stdout = stdout_capture
-
-            set_debug(True)
+        if not self._capture_output:
+            result = self._chain.invoke(
+                {"question": question, "chat_history": chat_history}
+            )
+            result["debug"] = "No output captured."
+            return result
 
+        # A tracer per call, so concurrent sessions never share their traces.
+        tracer = TraceCallbackHandler()
         result = self._chain.invoke(
-            {"question": question, "chat_history": chat_history}
+            {"question": question, "chat_history": chat_history},
+            config={"callbacks": [tracer]},
         )
+        result["debug"] = tracer.to_text() + StandaloneQuestionCheck.summary()
+        result["trace"] = tracer.steps()
+        return result
 
-        if self._capture_output:
-            set_debug(False)
+    def ask_stream(self, question: str, chat_history: List = []) -> Iterator[dict]:
+        """
+        Streams the answer as dict chunks: the "cypher", "context" and
+        "contextualised_question" arrive first, then the "response" token by token
+        and finally the "debug" and "trace".
 
-            # Get the captured stdout as a string
-            stdout_string = stdout_capture.getvalue()
+        Args:
+            question (str): The question of the user.
+            chat_history (List): The previous messages.
 
-            # Reset stdout to its original value
-            sys.stdout = sys.__stdout__
+        Yields:
+            dict: A chunk with one or more of the keys of ask().
+        """
+        if not self._chain:
+            raise ValueError("Chain not setup yet")
 
-            result["debug"] = stdout_string
-        else:
-            result["debug"] = "No output captured."
+        if not self._capture_output:
+            yield from self._chain.stream(
+                {"question": question, "chat_history": chat_history}
+            )
+            yield {"debug": "No output captured."}
+            return
 
-        return result
+        tracer = TraceCallbackHandler()
+        yield from self._chain.stream(
+            {"question": question, "chat_history": chat_history},
+            config={"callbacks": [tracer]},
+        )
+        yield {
+            "debug": tracer.to_text() + StandaloneQuestionCheck.summary(),
+            "trace": tracer.steps(),
+        }
 
     def setup_contextualizing_question_chain(self, llm):
 
-        return CONTEXTUALIZE_QUESTION_GENERATION_PROMPT | llm | StrOutputParser()
+        # Format the history like the examples in the prompt, a list of messages
+        # would be interpolated as its repr.
+        return (
+            RunnablePassthrough.assign(
+                chat_history=lambda x: get_buffer_string(x["chat_history"])
+            )
+            | CONTEXTUALIZE_QUESTION_GENERATION_PROMPT
+            | llm
+            | StrOutputParser()
+        )
@@ -0,0 +1,198 @@
+import re
+import time
+import threading
+from langchain_core.runnables import Runnable, RunnableConfig, RunnableLambda
+
+
+class StandaloneQuestionCheck:
+    """
+    A local check whether a follow-up question can be understood without the chat history.
+
+    Contextualising a question costs an LLM round trip before the actual answer.
+    A question without references to earlier turns (pronouns, demonstratives,
+    "en ...?" follow-ups or very short questions) is passed on as is. Demonstratives
+    and function words like "het" and "dan" only count where they stand on their
+    own, so ordinary questions such as "Wat is het WIA-loon?" are still passed on.
+
+    The process-wide stats report how often contextualisation was skipped and
+    estimate the saved latency from the average contextualisation time.
+
+    Example:
+    if StandaloneQuestionCheck.is_standalone(question):
+        StandaloneQuestionCheck.record_bypass()
+        return question
+    return StandaloneQuestionCheck.timed(contextualize_q_chain)
+    """
+
+    # Words that always refer to something mentioned earlier in the conversation:
+    # personal pronouns and the daar-, hier- and er- compounds.
+    REFERENCE_WORDS = frozenset(
+        [
+            # Dutch
+            "hij",
+            "zij",
+            "ze",
+            "hem",
+            "haar",
+            "hen",
+            "hun",
+            "daarvan",
+            "daarover",
+            "daarmee",
+            "daarbij",
+            "daarin",
+            "daarna",
+            "daarvoor",
+            "hiervan",
+            "hierover",
+            "hiermee",
+            "hierbij",
+            "hiervoor",
+            "ervan",
+            "erover",
+            "ermee",
+            "erbij",
+            "eraan",
+            "erin",
+            "erop",
+            "ervoor",
+            "zo'n",
+            "dezelfde",
+            "hetzelfde",
+            "bovenstaande",
+            # English
+            "he",
+            "she",
+            "they",
+            "him",
+            "them",
+            "his",
+            "their",
+            "same",
+        ]
+    )
+    # Demonstratives refer back when they start or end a clause ("Wat betekent
+    # dat?"), not when they belong to a noun ("Wat is dit jaar de WIA-grens?").
+    DEMONSTRATIVES = frozenset(
+        ["die", "dat", "deze", "dit", "daar", "this", "that", "these", "those"]
+    )
+    # Function words that only refer back at the end of a clause or before a
+    # particle, e.g. "Hoeveel krijg ik dan?" and "Geldt het ook voor zzp'ers?",
+    # but not in "Wat is het WIA-loon?".
+    WEAK_REFERENCES = frozenset(["het", "er", "hier", "dan", "it", "then"])
+    PARTICLES = frozenset(
+        ["ook", "dan", "wel", "niet", "nog", "nu", "dus", "also", "too", "then"]
+    )
+    # Openings of elliptical follow-up questions.
+    FOLLOW_UP_STARTS = (
+        "en ",
+        "maar ",
+        "ook ",
+        "hoe zit het met",
+        "wat dacht je van",
+        "and ",
+        "but ",
+        "what about",
+        "how about",
+    )
+    # Shorter questions are almost always follow-ups, e.g. "En Walter?".
+    min_words: int = 4
+
+    _lock = threading.Lock()
+    _bypassed: int = 0
+    _contextualised: int = 0
+    _contextualise_seconds: float = 0.0
+
+    @classmethod
+    def is_standalone(cls, question: str) -> bool:
+        """
+        Returns True if the question doesn't seem to refer to the chat history.
+
+        Args:
+            question (str): The latest question of the user.
+        """
+        text = re.sub(r"\s+", " ", question.lower()).strip()
+        words = re.findall(r"[\w']+", text)
+
+        if len(words) < cls.min_words:
+            return False
+        if text.startswith(cls.FOLLOW_UP_STARTS):
+            return False
+
+        for clause in re.split(r"[,.;:?!]", text):
+            words = re.findall(r"[\w']+", clause)
+            for index, word in enumerate(words):
+                last = index == len(words) - 1
+                if word in cls.REFERENCE_WORDS:
+                    return False
+                if word in cls.DEMONSTRATIVES and (index == 0 or last):
+                    return False
+                if word in cls.WEAK_REFERENCES and (
+                    last or words[index + 1] in cls.PARTICLES
+                ):
+                    return False
+        return True
+
+    @classmethod
+    def record_bypass(cls) -> None:
+        """Counts a question with chat history that wasn't contextualised."""
+        with cls._lock:
+            cls._bypassed += 1
+
+    @classmethod
+    def timed(cls, contextualize_q_chain: Runnable) -> Runnable:
+        """
+        Wraps the contextualisation chain to count it and measure its latency.
+
+        Args:
+            contextualize_q_chain (Runnable): The chain that rewrites the question.
+
+        Returns:
+            Runnable: The wrapped chain.
+        """
+
+        def contextualise(intermediate_result: dict, config: RunnableConfig) -> str:
+            start = time.perf_counter()
+            result = contextualize_q_chain.invoke(intermediate_result, config)
+            with cls._lock:
+                cls._contextualised += 1
+                cls._contextualise_seconds += time.perf_counter() - start
+            return result
+
+        return RunnableLambda(contextualise, name="contextualise_question")
+
+    @classmethod
+    def stats(cls) -> dict:
+        """Returns the bypass rate and the estimated saved latency of questions with chat history."""
+        with cls._lock:
+            total = cls._bypassed + cls._contextualised
+            average = (
+                cls._contextualise_seconds / cls._contextualised
+                if cls._contextualised
+                else 0.0
+            )
+            return {
+                "bypassed": cls._bypassed,
+                "contextualised": cls._contextualised,
+                "bypass_rate": cls._bypassed / total if total else 0.0,
+                "avg_contextualise_ms": round(average * 1000, 1),
+                "saved_ms": round(cls._bypassed * average * 1000, 1),
+            }
+
+    @classmethod
+    def summary(cls) -> str:
+        """Formats the stats as a line for the debug output."""
+        stats = cls.stats()
+        total = stats["bypassed"] + stats["contextualised"]
+        return (
+            f"CONTEXTUALISATION SKIPPED: {stats['bypassed']}/{total} "
+            f"({stats['bypass_rate']:.0%}), ~{stats['saved_ms']:.0f} ms saved"
+        )
+
+    @classmethod
+    def reset(cls) -> None:
+        """Resets the stats."""
+        with cls._lock:
+            cls._bypassed = 0
+            cls._contextualised = 0
+            cls._contextualise_seconds = 0.0
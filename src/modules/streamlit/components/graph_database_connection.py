@@ -1,8 +1,11 @@
+import time
 import streamlit as st
 
 from langchain_community.graphs import Neo4jGraph
 from neo4j import GraphDatabase, exceptions
 from modules.streamlit.components import BaseStreamlitComponent
+from modules.auradb.driver_registry import DriverRegistry
+from modules.auradb.schema_cache import SchemaCache
 from uwv_toolkit.utils import load_env
 
 
@@ -14,6 +17,8 @@ class GraphDatabaseConnection(BaseStreamlitComponent):
     _instance: str
     _connected: bool = False
     _neo4j_graph: Neo4jGraph = None
+    # When the driver of the graph was last checked, see connect().
+    _checked_at: float = 0.0
 
     DEVELOPMENT_DB = "Ontwikkeling"
     PRODUCTION_DB = "Productie"
@@ -121,10 +126,25 @@ class GraphDatabaseConnection(BaseStreamlitComponent):
             bool: True if the connection is established, False otherwise.
         """
         try:
-
-            self._neo4j_graph = Neo4jGraph(
-                url=self._url, username=self._username, password=self._password
-            )
+            if self._connected and self._neo4j_graph is not None:
+                # Reuse the graph from the previous run, and check the driver it
+                # owns once per health check interval.
+                now = time.monotonic()
+                if now - self._checked_at > DriverRegistry.health_check_interval:
+                    try:
+                        self._neo4j_graph.query("RETURN 1")
+                    except Exception:  # pylint: disable=broad-except
+                        # The connection broke, connect again below.
+                        self._neo4j_graph = None
+                    self._checked_at = now
+
+            if not self._connected or self._neo4j_graph is None:
+                self._neo4j_graph = Neo4jGraph(
+                    url=self._url, username=self._username, password=self._password
+                )
+                # Neo4jGraph introspects the schema on connect, share it.
+                SchemaCache.store((self._url, self._username), self._neo4j_graph)
+                self._checked_at = time.monotonic()
 
             self._connected = True
 
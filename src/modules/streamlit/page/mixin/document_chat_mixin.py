@@ -43,7 +43,12 @@ class DocumentChatMixin(ChatMixin):
                 "Je kunt de geindexeerde bronnen verversen, doe dit alleen als de documenten zijn aangepast."
             )
             if st.button("Documenten opnieuw indexeren"):
-                st.cache_resource.clear()
+                with st.spinner("Documenten worden opnieuw geindexeerd..."):
+                    stats = self._reindex_documents()
+                st.success(
+                    f"Documenten geindexeerd: {stats['added']} stukken tekst toegevoegd, "
+                    f"{stats['deleted']} verwijderd en {stats['unchanged']} ongewijzigd."
+                )
 
     def _show_chat(self, chain):
         """
@@ -56,9 +61,11 @@ class DocumentChatMixin(ChatMixin):
 
             st.session_state.logs = ""
 
-            answer = chain.ask(
+            answer = chain.ask_stream(
                 question=user_query,
-                chat_history=self._get_chat_session_state("chat_history"),
+                chat_history=self._get_chat_history_window(
+                    self._get_chat_session_state("chat_history")
+                ),
             )
 
             self.display_msg(answer, "assistant")
@@ -69,6 +76,15 @@ class DocumentChatMixin(ChatMixin):
         """
         raise NotImplementedError("Please implement this method in the subclass.")
 
+    def _reindex_documents(self) -> dict:
+        """
+        Indexes the changed documents of this page's collection again.
+
+        Returns:
+            dict: The stats of CachedChroma.index_documents().
+        """
+        raise NotImplementedError("Please implement this method in the subclass.")
+
     def _show_main(self):
 
         super()._show_main()
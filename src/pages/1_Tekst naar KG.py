@@ -4,7 +4,7 @@ import streamlit as st
 from uwv_toolkit.utils import FileExceptionHandler, load_env, azure_llm
 from modules.extraction import system_prompt
 from modules.streamlit.base_uwv_graph_page import BaseUWVGraphPage
-from modules.extraction import FewShotDataExtractor
+from modules.extraction import FewShotDataExtractor, ExtractionCache
 
 load_env()
 
@@ -54,6 +54,7 @@ class TextToKgPage(BaseUWVGraphPage):
                     llm,
                     system_prompt=st.session_state.prompt,
                     verbose=(os.getenv("VERBOSE") == "1"),
+                    cache=ExtractionCache.shared(),
                 )
 
                 result = extractor.run(text_input)
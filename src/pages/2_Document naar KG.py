@@ -9,7 +9,13 @@ from langchain_community.document_loaders import (
 )
 from modules.streamlit.base_uwv_graph_page import BaseUWVGraphPage
 from modules.utils import GraphFileManager
-from modules.extraction import FewShotDataExtractor, extraction_prompt, system_prompt
+from modules.extraction import (
+    FewShotDataExtractor,
+    ExtractionCache,
+    ExtractionJob,
+    extraction_prompt,
+    system_prompt,
+)
 from uwv_toolkit.utils import FileExceptionHandler, load_env, azure_llm
 
 load_env()
@@ -17,7 +23,18 @@ load_env()
 
 class DocToKgPage(BaseUWVGraphPage):
 
-    def _process_file(self, filepath: str):
+    def _create_extractor(self, settings: dict) -> FewShotDataExtractor:
+        llm = azure_llm(temperature=settings["temperature"])
+        return FewShotDataExtractor(
+            llm,
+            system_prompt=settings["prompt"],
+            verbose=(os.getenv("VERBOSE") == "1"),
+            cache=ExtractionCache.shared(),
+            # Extract the chunks concurrently and reconcile the labels afterwards.
+            max_workers=int(os.getenv("EXTRACTION_MAX_WORKERS", "4")),
+        )
+
+    def _process_file(self, filepath: str, name: str):
 
         if filepath.endswith(".pdf"):
             loader = PyPDFLoader(filepath)
@@ -31,21 +48,94 @@ class DocToKgPage(BaseUWVGraphPage):
 
         data = loader.load()
 
-        llm = azure_llm(temperature=st.session_state.temperature)
-        extractor = FewShotDataExtractor(
-            llm,
-            system_prompt=st.session_state.prompt,
-            verbose=(os.getenv("VERBOSE") == "1"),
+        settings = {
+            "prompt": st.session_state.prompt,
+            "temperature": st.session_state.temperature,
+        }
+        extractor = self._create_extractor(settings)
+
+        # The job checkpoints every chunk, starting the same extraction again resumes it.
+        job = ExtractionJob.create(
+            extractor.chunk_list(data),
+            settings,
+            username=st.session_state.username,
+            name=name,
         )
+        job.start(extractor)
+        st.session_state.extraction_job = job.job_id
+        st.session_state.graph = None
+
+    def _show_resumable_jobs(self, jobs: list):
+        """Shows the other interrupted and failed jobs of the user, with a resume action."""
+        jobs = [
+            state
+            for state in jobs
+            if state["status"] in (ExtractionJob.FAILED, ExtractionJob.INTERRUPTED)
+            and state["job_id"] != st.session_state.extraction_job
+        ]
+        if not jobs:
+            return
 
-        try:
-            graph = extractor.run_list(data)
-        except Exception as e:
-            st.error(
-                f"Er is een fout opgetreden tijdens de extractie. Probeer het nogmaals. \n\n{e}"
+        with st.expander(f"⏸️ Onderbroken extracties ({len(jobs)})"):
+            for state in jobs:
+                name = state["name"] or state["job_id"]
+                text, action = st.columns([4, 1])
+                text.markdown(
+                    f"**{name}** ({state['created_at']}): {state['done']} van de {state['total']} stukken tekst verwerkt."
+                )
+                if action.button("Hervat", key=f"resume_{state['job_id']}"):
+                    ExtractionJob(state["job_id"]).start(
+                        self._create_extractor(state["settings"])
+                    )
+                    st.session_state.extraction_job = state["job_id"]
+                    st.session_state.graph = None
+                    st.rerun()
+
+    def _show_job(self):
+        """Shows the progress of the last extraction job of the user."""
+        jobs = ExtractionJob.list_jobs(username=st.session_state.username)
+        if st.session_state.get("extraction_job") is None:
+            # After a page reload, pick up the last job of the user.
+            if not jobs:
+                return
+            st.session_state.extraction_job = jobs[0]["job_id"]
+
+        self._show_resumable_jobs(jobs)
+
+        job = ExtractionJob(st.session_state.extraction_job)
+        state = job.status()
+        name = state["name"] or state["job_id"]
+        progress = state["done"] / state["total"]
+
+        if state["status"] in (ExtractionJob.PENDING, ExtractionJob.RUNNING):
+            st.progress(
+                progress,
+                text=f"☕️ Bezig met extractie van {name}: {state['done']} van de {state['total']} stukken tekst verwerkt.",
             )
+            st.caption(
+                f"⚡ De extractie cache heeft {state.get('cache_hits', 0)} van de {state['done']} stukken tekst geleverd."
+            )
+            time.sleep(2)
+            st.rerun()
+
+        elif state["status"] in (ExtractionJob.FAILED, ExtractionJob.INTERRUPTED):
+            st.progress(
+                progress,
+                text=f"{state['done']} van de {state['total']} stukken tekst van {name} verwerkt.",
+            )
+            if state["status"] == ExtractionJob.FAILED:
+                st.error(
+                    f"Er is een fout opgetreden tijdens de extractie. Hervat de extractie om het nogmaals te proberen. \n\n{state['error']}"
+                )
+            else:
+                st.warning("De extractie is onderbroken.")
+
+            if st.button("Hervat extractie", key="resume_extraction"):
+                job.start(self._create_extractor(state["settings"]))
+                st.rerun()
 
-        return graph
+        elif st.session_state.graph is None:
+            st.session_state.graph = job.result()
 
     def _show_main(self):
 
@@ -124,10 +214,17 @@ class DocToKgPage(BaseUWVGraphPage):
             else:
                 raise ValueError("Invalid file selected.")
 
-            with st.spinner(
-                "☕️ Bezig met extractie van nodes, relaties en eigenschappen..."
-            ):
-                st.session_state.graph = self._process_file(filepath)
+            with st.spinner("☕️ Bezig met het opknippen van het document..."):
+                self._process_file(
+                    filepath,
+                    (
+                        uploaded_file.name
+                        if file_to_process == "Upload een nieuw document"
+                        else file_to_process
+                    ),
+                )
+
+        self._show_job()
 
         if st.session_state.graph:
             graph = st.session_state.graph
@@ -6,7 +6,7 @@ from typing import Union
 from neo4j import GraphDatabase, exceptions
 from modules.streamlit.base_uwv_graph_page import BaseUWVGraphPage
 from modules.streamlit.components import GraphDatabaseConnection
-from modules.auradb import AuraDB
+from modules.auradb import AuraDB, SchemaCache
 from modules.utils import GraphFileManager, WarningCapture
 from modules.extraction import FewShotDataExtractor
 from uwv_toolkit.utils import FileExceptionHandler, load_env, azure_llm
@@ -99,6 +99,7 @@ class GraphManagerPage(BaseUWVGraphPage):
             "* **Verwijderen**: verwijder de opgeslagen graph.\n"
             "* **Toevoegen aan Neo4J**: laad de graph in de verbonden Neo4J instance. De bestaande graph in de Neo4J instance wordt aangevuld met de graph in dit bestand.\n"
             "* **Reset Neo4J**: laad de graph in Neo4J. De opgeslagen graph in Neo4J wordt eerst verwijderd.\n"
+            "* **Synchroniseer Neo4J**: maak Neo4J gelijk aan de graph in dit bestand. Alleen de toegevoegde, gewijzigde en verwijderde nodes en relaties worden geschreven.\n"
         )
 
         st.markdown("---")
@@ -268,6 +269,15 @@ class GraphManagerPage(BaseUWVGraphPage):
 
             warning_container = st.container()
 
+            auradb = None
+            if graph_db_connection and graph_db_connection.is_connected():
+                # The driver is shared, so one instance serves all rows.
+                auradb = AuraDB(
+                    uri=graph_db_connection.get_url(),
+                    user=graph_db_connection.get_username(),
+                    password=graph_db_connection.get_password(),
+                )
+
             def my_action_column_content(
                 index, row: pd.Series, column: st.delta_generator.DeltaGenerator
             ):
@@ -283,16 +293,21 @@ class GraphManagerPage(BaseUWVGraphPage):
                     warning_container.success("File deleted.")
                     st.rerun()
 
-                auradb = AuraDB(
-                    uri=graph_db_connection.get_url(),
-                    user=graph_db_connection.get_username(),
-                    password=graph_db_connection.get_password(),
-                )
                 if column.button("Toevoegen aan Neo4J", key=f"{index}upload"):
                     graph = file_manager.unpickle_graph(row["Bestandsnaam"])
 
+                    # An interrupted upload resumes from the last committed batch,
+                    # per target database.
+                    checkpoint_path = os.path.join(
+                        file_manager.directory,
+                        f"{row['Bestandsnaam']}.{auradb.target_id()}.checkpoint.json",
+                    )
                     with WarningCapture() as wc:
-                        auradb.import_list(graph["nodes"] + graph["relationships"])
+                        auradb.import_graph(graph, checkpoint_path=checkpoint_path)
+                    SchemaCache.invalidate(
+                        graph_db_connection.get_url(),
+                        graph_db_connection.get_username(),
+                    )
 
                     if len(wc.captured_warnings) == 0:
                         warning_container.success("Graph uploaded successfully.")
@@ -302,9 +317,24 @@ class GraphManagerPage(BaseUWVGraphPage):
 
                 if column.button("Reset Neo4J", key=f"{index}reset"):
                     graph = file_manager.unpickle_graph(row["Bestandsnaam"])
-                    auradb.cleanup()
+                    progress_bar = warning_container.progress(
+                        0.0, text="Neo4J wordt geleegd..."
+                    )
+
+                    def show_cleanup_progress(progress: dict):
+                        progress_bar.progress(
+                            min(progress["deleted"] / max(progress["total"], 1), 1.0),
+                            text=f"Neo4J wordt geleegd: {progress['deleted']} van de {progress['total']} verwijderd.",
+                        )
+
+                    auradb.cleanup(progress_callback=show_cleanup_progress)
+                    progress_bar.empty()
                     with WarningCapture() as wc:
-                        auradb.import_list(graph["nodes"] + graph["relationships"])
+                        auradb.bulk_import_list(graph["nodes"] + graph["relationships"])
+                    SchemaCache.invalidate(
+                        graph_db_connection.get_url(),
+                        graph_db_connection.get_username(),
+                    )
 
                     if len(wc.captured_warnings) == 0:
                         warning_container.success("Graph reset successfully.")
@@ -312,6 +342,29 @@ class GraphManagerPage(BaseUWVGraphPage):
                         for warn in wc.captured_warnings:
                             warning_container.warning(warn)
 
+                if column.button("Synchroniseer Neo4J", key=f"{index}sync"):
+                    graph = file_manager.unpickle_graph(row["Bestandsnaam"])
+                    with WarningCapture() as wc:
+                        summary = auradb.sync_graph(graph)
+                    SchemaCache.invalidate(
+                        graph_db_connection.get_url(),
+                        graph_db_connection.get_username(),
+                    )
+
+                    if len(wc.captured_warnings) == 0:
+                        warning_container.success(
+                            "Graph synchronised successfully: "
+                            f"{summary['inserted_nodes']} nodes toegevoegd, "
+                            f"{summary['updated_nodes']} gewijzigd, "
+                            f"{summary['deleted_nodes']} verwijderd; "
+                            f"{summary['inserted_relationships']} relaties toegevoegd, "
+                            f"{summary['updated_relationships']} gewijzigd, "
+                            f"{summary['deleted_relationships']} verwijderd."
+                        )
+                    else:
+                        for warn in wc.captured_warnings:
+                            warning_container.warning(warn)
+
             table_component = StreamlitTableComponent(
                 df, "Acties", my_action_column_content
             )
@@ -5,22 +5,44 @@ from uwv_toolkit.streamlit.page.mixins import ChatMixin, FooterMixin
 from uwv_toolkit.db.feedback import FeedbackModel
 from modules.streamlit.page.mixin.document_chat_mixin import DocumentChatMixin
 from uwv_toolkit.utils import azure_llm, FileExceptionHandler
-from modules.smz import SmzDocVector as Vector, SmzDocChain as Chain
+from modules.smz import (
+    SmzDocVector as Vector,
+    SmzDocChain as Chain,
+    SemanticAnswerCache,
+)
 from modules.streamlit.base_uwv_graph_page import BaseUWVGraphPage
 
 
+@st.cache_resource(show_spinner="Documenten worden opgehaald en ingeladen...")
+def setup_vector():
+    return Vector(enable_cache=True).setup()
+
+
+# Shared between sessions, "Documenten opnieuw indexeren" clears it.
+@st.cache_resource
+def setup_answer_cache(_vectordb):
+    return SemanticAnswerCache(embeddings=_vectordb.embeddings)
+
+
 class DocChatPage(DocumentChatMixin, FooterMixin, BaseUWVGraphPage):
 
     def _setup_chain(self):
         """Method to setup the chain object"""
         llm = azure_llm()
 
-        @st.cache_resource(show_spinner="Documenten worden opgehaald en ingeladen...")
-        def setup_vector():
-            return Vector(enable_cache=True).setup()
+        vectordb = setup_vector()
+        return Chain(
+            vectorstore=vectordb,
+            llm=llm,
+            answer_cache=setup_answer_cache(vectordb),
+        )
 
+    def _reindex_documents(self) -> dict:
+        """Indexes the changed documents and clears the answers based on the old index."""
         vectordb = setup_vector()
-        return Chain(vectorstore=vectordb, llm=llm)
+        stats = Vector(enable_cache=True).index(vectordb)
+        setup_answer_cache(vectordb).clear()
+        return stats
 
 
 try:
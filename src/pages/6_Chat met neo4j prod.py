@@ -6,15 +6,18 @@ from neo4j.exceptions import ClientError, DriverError
 from langchain_community.graphs import Neo4jGraph
 from uwv_toolkit.streamlit.page.mixins import ChatMixin
 from uwv_toolkit.db.feedback import FeedbackModel
-from uwv_toolkit.utils import azure_llm, FileExceptionHandler, load_env
+from uwv_toolkit.utils import FileExceptionHandler, load_env
 from modules.streamlit.components import GraphDatabaseConnection
-from modules.smz import SmzGraphQAChain as Chain
+from modules.smz import ChainRegistry
 from modules.streamlit.base_uwv_graph_page import BaseUWVGraphPage
 from modules.streamlit.graph_chart import GraphChart
 from modules.auradb.auradb import AuraDB
 
 load_env()
 
+# The chart is rendered in the browser, so only show a part of large graphs.
+GRAPH_CHART_MAX_NODES = 500
+
 
 def get_prod_connection_component():
     if "prod_graph_db_connection" in st.session_state:
@@ -85,6 +88,7 @@ class Neo4JProdChatPage(ChatMixin, BaseUWVGraphPage):
             and st.button("Begin een lege chat", key="clear_chat")
         ):
             self._set_chat_session_state("chat_history", [])
+            self._set_chat_session_state("history_window", {})
             self._set_chat_session_state("messages", [])
             # st.session_state[chat_namespace]["chat_history"] = []
             # st.session_state[chat_namespace]["messages"] = []
@@ -96,7 +100,7 @@ class Neo4JProdChatPage(ChatMixin, BaseUWVGraphPage):
             password=graph_db_connection.get_password(),
         )
 
-        graph_content = db.get_knowledge_graph()
+        graph_content = db.get_knowledge_graph(max_nodes=GRAPH_CHART_MAX_NODES)
         if len(graph_content["nodes"]) > 0:
             chart = GraphChart(
                 nodes=graph_content["nodes"], edges=graph_content["relationships"]
@@ -105,6 +109,10 @@ class Neo4JProdChatPage(ChatMixin, BaseUWVGraphPage):
                 st.info(
                     "Op de nodes en relaties klikken wordt niet ondersteund en geeft een foutmelding."
                 )
+                if len(graph_content["nodes"]) == GRAPH_CHART_MAX_NODES:
+                    st.warning(
+                        f"De graph is te groot, alleen de eerste {GRAPH_CHART_MAX_NODES} nodes worden getoond."
+                    )
                 chart.show(add_container=False)
 
         else:
@@ -133,11 +141,23 @@ class Neo4JProdChatPage(ChatMixin, BaseUWVGraphPage):
                 self.display_msg(user_query, "user")
 
                 with st.spinner("Aan het nadenken..."):
-                    chain = Chain(llm=azure_llm(temperature=0.1), graph=graph)
-                    result = chain.ask(
+                    # The chain is built once per connection and shared.
+                    chain = ChainRegistry.get_graph_qa_chain(
+                        graph,
+                        connection_key=(
+                            graph_db_connection.get_url(),
+                            graph_db_connection.get_username(),
+                        ),
+                        password=graph_db_connection.get_password(),
+                        llm_settings={"temperature": 0.1},
+                    )
+                    # The answer is streamed into the chat message by display_msg.
+                    result = chain.ask_stream(
                         question=user_query,
                         # The user query was already added to the chat history.
-                        chat_history=self._get_chat_session_state("chat_history")[:-1],
+                        chat_history=self._get_chat_history_window(
+                            self._get_chat_session_state("chat_history")[:-1]
+                        ),
                     )
 
                 self.display_msg(result, "assistant")
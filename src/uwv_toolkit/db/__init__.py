@@ -1,2 +1,3 @@
 from .database import Database
 from .base_model import BaseModel
+from .sqlite_cache import SqliteCache
@@ -0,0 +1,147 @@
+import time
+import threading
+from typing import Optional
+from uwv_toolkit.db.database import Database
+
+
+class SqliteCache:
+    """
+    A persistent key-value cache in a SQLite table with LRU and TTL eviction.
+
+    Values are strings, for example JSON. Reading a value marks it as recently
+    used; when the cache holds more than `max_entries` values, the least recently
+    used ones are removed. Values older than `ttl` seconds are never returned.
+
+    Usage example:
+        cache = SqliteCache(Database("cache.db"), "cypher_cache", max_entries=1000)
+        cache.set("key", "value")
+        cache.get("key")
+    """
+
+    def __init__(
+        self,
+        db: Database,
+        table_name: str,
+        max_entries: int = 1000,
+        ttl: Optional[float] = None,
+    ):
+        """
+        Initializes the cache and creates its table when needed.
+
+        Args:
+            db (Database): The database to store the cache in.
+            table_name (str): The name of the table.
+            max_entries (int, optional): The maximum number of values. Defaults to 1000.
+            ttl (float, optional): The time to live of a value in seconds. Defaults to no limit.
+        """
+        if max_entries < 1:
+            raise ValueError("The maximum number of entries should be at least 1.")
+
+        self.db = db
+        self.table_name = table_name
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        # The database shares one cursor, so one statement at a time.
+        self._lock = threading.Lock()
+
+        with self._lock:
+            self.db.execute(
+                f"CREATE TABLE IF NOT EXISTS {self.table_name} "
+                "(key TEXT PRIMARY KEY, value TEXT, created_at REAL, accessed_at REAL)"
+            )
+            self.db.execute(
+                f"CREATE INDEX IF NOT EXISTS {self.table_name}_accessed_at "
+                f"ON {self.table_name} (accessed_at)"
+            )
+
+    def get(self, key: str) -> Optional[str]:
+        """
+        Returns the value for the key, or None when it is missing or expired.
+
+        Args:
+            key (str): The key.
+        """
+        now = time.time()
+        with self._lock:
+            self.db.execute(
+                f"SELECT value, created_at FROM {self.table_name} WHERE key = ?",
+                (key,),
+            )
+            row = self.db.fetchone()
+
+            if row is not None and self.ttl is not None and now - row[1] > self.ttl:
+                self.db.execute(f"DELETE FROM {self.table_name} WHERE key = ?", (key,))
+                row = None
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.db.execute(
+                f"UPDATE {self.table_name} SET accessed_at = ? WHERE key = ?",
+                (now, key),
+            )
+            self.hits += 1
+            return row[0]
+
+    def set(self, key: str, value: str) -> None:
+        """
+        Stores the value for the key and evicts the least recently used values.
+
+        Args:
+            key (str): The key.
+            value (str): The value.
+        """
+        now = time.time()
+        with self._lock:
+            # Storing the same value again doesn't extend its time to live.
+            self.db.execute(
+                f"INSERT INTO {self.table_name} (key, value, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?) ON CONFLICT(key) DO UPDATE SET "
+                "created_at = CASE WHEN value = excluded.value THEN created_at "
+                "ELSE excluded.created_at END, "
+                "value = excluded.value, accessed_at = excluded.accessed_at",
+                (key, value, now, now),
+            )
+            self._evict(now)
+
+    def delete(self, key: str) -> None:
+        """
+        Removes the value for the key.
+
+        Args:
+            key (str): The key.
+        """
+        with self._lock:
+            self.db.execute(f"DELETE FROM {self.table_name} WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        """Removes all values."""
+        with self._lock:
+            self.db.execute(f"DELETE FROM {self.table_name}")
+
+    def size(self) -> int:
+        """Returns the number of stored values."""
+        with self._lock:
+            self.db.execute(f"SELECT count(*) FROM {self.table_name}")
+            return self.db.fetchone()[0]
+
+    def stats(self) -> dict:
+        """Returns the number of stored values, hits and misses."""
+        return {"size": self.size(), "hits": self.hits, "misses": self.misses}
+
+    def _evict(self, now: float) -> None:
+        """Removes expired values and the least recently used values over the maximum."""
+        if self.ttl is not None:
+            self.db.execute(
+                f"DELETE FROM {self.table_name} WHERE created_at < ?",
+                (now - self.ttl,),
+            )
+        self.db.execute(
+            f"DELETE FROM {self.table_name} WHERE key IN ("
+            f"SELECT key FROM {self.table_name} ORDER BY accessed_at DESC LIMIT -1 OFFSET ?"
+            ")",
+            (self.max_entries,),
+        )
@@ -1,2 +1,5 @@
 from .cached_chroma import CachedChroma
+from .concurrent_embeddings import ConcurrentEmbeddings
 from .base_chroma_vector_db import BaseChromaVectorDB
+from .trace_callback_handler import TraceCallbackHandler
+from .chat_history_window import ChatHistoryWindow
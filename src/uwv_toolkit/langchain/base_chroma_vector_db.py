@@ -1,6 +1,6 @@
 import os
 import abc
-import hashlib
+import logging
 from typing import List
 from langchain_community.document_loaders import (
     UnstructuredHTMLLoader,
@@ -9,7 +9,7 @@ from langchain_community.document_loaders import (
 )
 from langchain_core.documents import Document
 from uwv_toolkit.utils import load_env, persistent_path, azure_embeddings
-from uwv_toolkit.langchain import CachedChroma
+from uwv_toolkit.langchain import CachedChroma, ConcurrentEmbeddings
 
 
 load_env()
@@ -68,22 +68,37 @@ class BaseChromaVectorDB(abc.ABC):
 
         docs = []
         for doc in self.documents:
-            # Get the extension of the file
-            ext = os.path.splitext(doc)[1]
+            docs.extend(self._load_document(doc))
 
-            # Get the loader for the file based on the extension
-            if ext == ".html" or ext == ".htm":
-                loader = UnstructuredHTMLLoader(doc)
-            elif ext == ".pdf":
-                loader = PyPDFLoader(doc)
-            elif ext == ".docx":
-                loader = UnstructuredWordDocumentLoader(doc)
-            else:
-                raise ValueError(f"Unknown file extension: {ext}")
+        return docs
 
-            docs.extend(loader.load())
+    def _load_document(self, doc: str) -> List[Document]:
+        """
+        Method that loads a single file with the loader for its extension
 
-        return docs
+        Args:
+            doc (str): The path of the file
+
+        Returns:
+            List[Document]: The documents of the file
+
+        Raises:
+            ValueError: If the extension is not supported
+        """
+        # Get the extension of the file
+        ext = os.path.splitext(doc)[1]
+
+        # Get the loader for the file based on the extension
+        if ext == ".html" or ext == ".htm":
+            loader = UnstructuredHTMLLoader(doc)
+        elif ext == ".pdf":
+            loader = PyPDFLoader(doc)
+        elif ext == ".docx":
+            loader = UnstructuredWordDocumentLoader(doc)
+        else:
+            raise ValueError(f"Unknown file extension: {ext}")
+
+        return loader.load()
 
     @abc.abstractmethod
     def _split_documents(self, docs: List[Document]):
@@ -96,23 +111,34 @@ class BaseChromaVectorDB(abc.ABC):
         """
 
     def setup(self):
-        """Method to setup the vector object"""
+        """
+        Method to setup the vector object.
 
-        docs = self._load_documents()
-        splits = self._split_documents(docs)
+        Only new and changed chunks are embedded, see CachedChroma.index_documents().
+        """
 
-        ids = []
-        for index, doc in enumerate(splits):
-            ids.append(
-                hashlib.sha256(
-                    (doc.metadata["source"] + "_" + str(index)).encode()
-                ).hexdigest()
-            )
+        if len(self.documents) == 0:
+            raise ValueError("No documents specified")
 
-        return CachedChroma.from_documents_with_cache(
-            documents=splits,
+        vectordb = CachedChroma(
             collection_name=self.collection_name,
-            ids=ids,
-            embedding=azure_embeddings(),
+            # The client doesn't retry, ConcurrentEmbeddings handles the rate limits.
+            embedding_function=ConcurrentEmbeddings(azure_embeddings(max_retries=0)),
             persist_directory=self.persist_dir,
         )
+        self.index(vectordb)
+
+        return vectordb
+
+    def index(self, vectordb: CachedChroma) -> dict:
+        """
+        Brings the collection in line with the documents, see CachedChroma.index_documents().
+
+        Returns:
+            dict: The number of unchanged files and added, deleted and unchanged chunks.
+        """
+        stats = vectordb.index_documents(
+            self.documents, self._load_document, self._split_documents
+        )
+        logging.info("📚 Indexed documents %s", stats)
+        return stats
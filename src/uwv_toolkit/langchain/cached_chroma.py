@@ -1,7 +1,9 @@
+import time
+import hashlib
+import logging
 from abc import ABC
-from typing import List, Optional, Any
+from typing import Callable, Dict, List, Optional
 
-import chromadb
 from langchain.docstore.document import Document
 from langchain.embeddings.base import Embeddings
 from langchain_community.vectorstores import Chroma
@@ -11,54 +13,184 @@ class CachedChroma(Chroma, ABC):
     """
     Wrapper around Chroma to make caching embeddings easier.
 
-    It automatically uses a cached version of a specified collection, if available.
+    It automatically reuses the persisted version of a collection and only embeds
+    new and changed chunks, see index_documents().
 
         Example:
             .. code-block:: python
 
-                    from langchain.vectorstores import Chroma
                     from langchain.embeddings.openai import OpenAIEmbeddings
 
-                    embeddings = OpenAIEmbeddings()
-                    vectorstore = CachedChroma.from_documents_with_cache(
-                        ".persisted_data", texts, embeddings, collection_name="fun_experiement"
+                    vectorstore = CachedChroma(
+                        collection_name="fun_experiement",
+                        embedding_function=OpenAIEmbeddings(),
+                        persist_directory=".persisted_data",
                     )
+                    vectorstore.index_documents(paths, load, split)
+                    saved_seconds = vectorstore.cache_stats["saved_seconds"]
         """
 
-    @classmethod
-    def from_documents_with_cache(
-            cls,
-            persist_directory: str,
-            documents: List[Document],
-            embedding: Optional[Embeddings] = None,
-            ids: Optional[List[str]] = None,
-            collection_name: str = Chroma._LANGCHAIN_DEFAULT_COLLECTION_NAME,
-            client_settings: Optional[chromadb.config.Settings] = None,
-            **kwargs: Any,
-    ) -> Chroma:
-        settings = chromadb.config.Settings(
-            persist_directory=persist_directory
-        )
+    def _set_cache_stats(
+        self, loaded_from_cache: bool, load_seconds: float, build_seconds: float
+    ) -> None:
+        """Sets `cache_stats`: the load time and the time saved compared to the last build."""
+        self.cache_stats = {
+            "loaded_from_cache": loaded_from_cache,
+            "load_seconds": load_seconds,
+            "build_seconds": build_seconds,
+            "saved_seconds": (
+                max(build_seconds - load_seconds, 0.0) if loaded_from_cache else 0.0
+            ),
+        }
+        if loaded_from_cache:
+            logging.info(
+                "⚡ Loaded collection %s in %.2fs, saved ~%.1fs",
+                self._collection.name,
+                load_seconds,
+                self.cache_stats["saved_seconds"],
+            )
+
+    @staticmethod
+    def embedding_model_name(embedding: Optional[Embeddings]) -> str:
+        """Returns a name of the embedding model, to detect vectors of another model."""
+        if embedding is None:
+            return ""
+        # CacheBackedEmbeddings and ConcurrentEmbeddings wrap the actual model.
+        while hasattr(embedding, "underlying_embeddings"):
+            embedding = embedding.underlying_embeddings
+        parts = [type(embedding).__name__]
+        for attribute in ("model", "deployment", "model_name"):
+            value = getattr(embedding, attribute, None)
+            if isinstance(value, str) and value not in parts:
+                parts.append(value)
+        return "/".join(parts)
+
+    @staticmethod
+    def file_hash(path: str) -> str:
+        """Returns the sha256 of the contents of the file."""
+        digest = hashlib.sha256()
+        with open(path, "rb") as file:
+            for block in iter(lambda: file.read(1 << 20), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @staticmethod
+    def chunk_id(document: Document) -> str:
+        """Returns the id of a chunk, based on its source and content.
+
+        Unlike an id based on the position of the chunk, it doesn't change when
+        an earlier paragraph of the document is edited.
+        """
+        return hashlib.sha256(
+            (document.metadata["source"] + "\0" + document.page_content).encode()
+        ).hexdigest()
+
+    def index_documents(
+            self,
+            paths: List[str],
+            load: Callable[[str], List[Document]],
+            split: Callable[[List[Document]], List[Document]],
+    ) -> Dict[str, int]:
+        """
+        Brings the collection in line with the files, embedding only new chunks.
+
+        Files with the same content hash as the indexed version are not loaded
+        again. The chunks of changed files are compared by content hash: new
+        chunks are embedded and added, chunks that no longer exist (also of
+        removed files) are deleted.
+
+        On a cold start with unchanged files the persisted collection is reused
+        as is. `cache_stats` then reports the time saved compared to building
+        the collection from scratch.
 
-        client = chromadb.Client(settings)
-        collection_names = [c.name for c in client.list_collections()]
+        Args:
+            paths (List[str]): The files that should be indexed.
+            load (Callable): Loads the documents of a file.
+            split (Callable): Splits the documents into chunks.
 
-        if collection_name in collection_names:
-            return Chroma(
-                collection_name=collection_name,
-                embedding_function=embedding,
-                persist_directory=persist_directory,
-                client_settings=client_settings,
+        Returns:
+            Dict[str, int]: The number of unchanged files and added, deleted and unchanged chunks.
+        """
+        start = time.perf_counter()
+
+        # Vectors of another embedding model can't be compared, embed everything again.
+        model = self.embedding_model_name(self._embedding_function)
+        collection_metadata = self._collection.metadata or {}
+        if collection_metadata.get("embedding_model") != model:
+            indexed_ids = self.get(include=[])["ids"]
+            if indexed_ids:
+                self.delete(ids=indexed_ids)
+            self._collection.modify(
+                metadata={**collection_metadata, "embedding_model": model}
             )
 
-        ## TODO NEVER LOADED FROM CACHE
-
-        return Chroma.from_documents(
-            documents=documents,
-            embedding=embedding,
-            ids=ids,
-            collection_name=collection_name,
-            persist_directory=persist_directory,
-            client_settings=client_settings,
-            **kwargs
-        )
\ No newline at end of file
+        indexed = self.get(include=["metadatas"])
+        indexed_ids = set(indexed["ids"])
+        ids_by_source: Dict[str, List[str]] = {}
+        hashes_by_source: Dict[str, set] = {}
+        for id, metadata in zip(indexed["ids"], indexed["metadatas"]):
+            metadata = metadata or {}
+            source = metadata.get("source")
+            ids_by_source.setdefault(source, []).append(id)
+            hashes_by_source.setdefault(source, set()).add(metadata.get("file_hash"))
+
+        keep_ids = set()
+        new_chunks: Dict[str, Document] = {}
+        unchanged_files = 0
+        for path in paths:
+            file_hash = self.file_hash(path)
+            if hashes_by_source.get(path) == {file_hash}:
+                keep_ids.update(ids_by_source[path])
+                unchanged_files += 1
+                continue
+
+            chunks = split(load(path))
+            retagged = []
+            for chunk in chunks:
+                chunk.metadata["file_hash"] = file_hash
+                id = self.chunk_id(chunk)
+                if id in indexed_ids:
+                    retagged.append(id)
+                    keep_ids.add(id)
+                elif id not in new_chunks:
+                    new_chunks[id] = chunk
+
+            # Unchanged chunks of a changed file get the new file hash.
+            if retagged:
+                indexed_metadatas = self.get(ids=retagged, include=["metadatas"])
+                self._collection.update(
+                    ids=indexed_metadatas["ids"],
+                    metadatas=[
+                        {**(metadata or {}), "file_hash": file_hash}
+                        for metadata in indexed_metadatas["metadatas"]
+                    ],
+                )
+
+        stale_ids = list(indexed_ids - keep_ids)
+        if stale_ids:
+            self.delete(ids=stale_ids)
+        if new_chunks:
+            self.add_documents(list(new_chunks.values()), ids=list(new_chunks.keys()))
+
+        seconds = time.perf_counter() - start
+        collection_metadata = self._collection.metadata or {}
+        if not indexed_ids and new_chunks:
+            # Built from scratch, the reference for the time saved by later runs.
+            collection_metadata = {**collection_metadata, "build_seconds": seconds}
+            self._collection.modify(metadata=collection_metadata)
+        self._set_cache_stats(
+            not new_chunks and not stale_ids,
+            seconds,
+            float(collection_metadata.get("build_seconds", 0.0)),
+        )
+
+        # Chroma < 0.4 only writes to disk on persist(), in-memory clients can't.
+        if getattr(self._client_settings, "chroma_db_impl", None) == "duckdb+parquet":
+            self.persist()
+
+        return {
+            "unchanged_files": unchanged_files,
+            "added": len(new_chunks),
+            "deleted": len(stale_ids),
+            "unchanged": len(keep_ids),
+        }
@@ -0,0 +1,179 @@
+import tiktoken
+from typing import Callable, List, Tuple
+from langchain_core.language_models import BaseLanguageModel
+from langchain_core.messages import BaseMessage, SystemMessage, get_buffer_string
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import PromptTemplate
+
+SUMMARY_PROMPT = PromptTemplate.from_template(
+    """Progressively summarize the lines of conversation provided, adding onto the \
+previous summary and returning a new summary. Keep the names, numbers and other facts \
+that later questions may refer to. Write the summary in Dutch.
+
+Current summary:
+{summary}
+
+New lines of conversation:
+{new_lines}
+
+New summary:"""
+)
+
+
+class ChatHistoryWindow:
+    """
+    Limits the chat history passed to a chain to the last turns within a token budget.
+
+    Messages that fall out of the window are folded into a running summary by the
+    LLM, so the prompt size stays constant however long the conversation gets.
+    The summary is updated incrementally: only the newly dropped messages are sent
+    to the LLM. The state (summary and number of summarised messages) is kept by
+    the caller, for example in the Streamlit session state.
+
+    Building the history doesn't call the LLM, the summary is updated after the
+    answer is shown, so it doesn't add to the response time.
+
+    Example:
+    window = ChatHistoryWindow(llm, max_tokens=1000)
+    state = {}
+    history = window.build(chat_history, state)
+    answer = chain.ask(question, chat_history=history)
+    chat_history += [HumanMessage(content=question), AIMessage(content=answer)]
+    window.update(chat_history, state)
+    """
+
+    SUMMARY_PREFIX = "Samenvatting van het eerdere gesprek: "
+
+    def __init__(
+        self,
+        llm: BaseLanguageModel = None,
+        max_tokens: int = 1000,
+        max_messages: int = 10,
+        encoding_name: str = "cl100k_base",
+        length_function: Callable[[str], int] = None,
+    ):
+        """
+        Args:
+            llm (BaseLanguageModel, optional): The LLM to summarise older messages
+                with. Without an LLM older messages are dropped.
+            max_tokens (int, optional): The token budget of the history, including
+                the summary. Defaults to 1000.
+            max_messages (int, optional): The maximum number of recent messages.
+                Defaults to 10.
+            encoding_name (str, optional): The tiktoken encoding. Defaults to "cl100k_base".
+            length_function (Callable[[str], int], optional): Counts the tokens of a
+                text instead of tiktoken.
+        """
+        if max_tokens < 1 or max_messages < 1:
+            raise ValueError(
+                "The token budget and number of messages should be positive."
+            )
+
+        self._summary_chain = (
+            SUMMARY_PROMPT | llm | StrOutputParser() if llm is not None else None
+        )
+        self.max_tokens = max_tokens
+        self.max_messages = max_messages
+        if length_function is None:
+            encoding = tiktoken.get_encoding(encoding_name)
+            length_function = lambda text: len(encoding.encode(text))
+        self._length_function = length_function
+
+    def count_tokens(self, message: BaseMessage) -> int:
+        """Returns the number of tokens of the message, including the role overhead."""
+        # Every chat message costs about 4 tokens for its role and separators.
+        return self._length_function(message.content) + 4
+
+    def window(self, messages: List[BaseMessage], max_tokens: int = None) -> int:
+        """
+        Returns the number of most recent messages that fit the budget.
+
+        Args:
+            messages (List[BaseMessage]): The chat history.
+            max_tokens (int, optional): The token budget. Defaults to max_tokens.
+        """
+        budget = self.max_tokens if max_tokens is None else max_tokens
+        count = 0
+        for message in reversed(messages[-self.max_messages :]):
+            budget -= self.count_tokens(message)
+            if budget < 0:
+                break
+            count += 1
+        return count
+
+    def summarise(self, summary: str, messages: List[BaseMessage]) -> str:
+        """
+        Returns the summary extended with the messages.
+
+        Args:
+            summary (str): The current summary.
+            messages (List[BaseMessage]): The messages to add to the summary.
+        """
+        if self._summary_chain is None or not messages:
+            return summary
+
+        return self._summary_chain.invoke(
+            {"summary": summary, "new_lines": get_buffer_string(messages)}
+        ).strip()
+
+    def _restore(self, messages: List[BaseMessage], state: dict) -> Tuple[str, int]:
+        """Returns the summary and number of summarised messages of the state."""
+        summary = state.get("summary", "")
+        summarised = state.get("summarised", 0)
+        if summarised > len(messages):
+            # The history was reset.
+            return "", 0
+        return summary, summarised
+
+    def _recent(self, pending: List[BaseMessage], summary: str) -> int:
+        """Returns the number of pending messages that fit the budget next to the summary."""
+        summary_tokens = (
+            self.count_tokens(SystemMessage(content=self.SUMMARY_PREFIX + summary))
+            if summary
+            else 0
+        )
+        return self.window(pending, self.max_tokens - summary_tokens)
+
+    def update(self, messages: List[BaseMessage], state: dict) -> None:
+        """
+        Folds the messages that fall out of the window into the summary.
+
+        Call it after the answer is shown, it calls the LLM when messages were dropped.
+
+        Args:
+            messages (List[BaseMessage]): The full chat history, including the answer.
+            state (dict): The "summary" and "summarised" count, updated in place.
+                Pass an empty dict for a new conversation.
+        """
+        summary, summarised = self._restore(messages, state)
+
+        pending = messages[summarised:]
+        dropped = pending[: len(pending) - self._recent(pending, summary)]
+        if dropped:
+            summary = self.summarise(summary, dropped)
+            summarised += len(dropped)
+
+        state["summary"] = summary
+        state["summarised"] = summarised
+
+    def build(self, messages: List[BaseMessage], state: dict) -> List[BaseMessage]:
+        """
+        Returns the history for the chain: the summary followed by the recent messages.
+
+        Doesn't call the LLM. Messages that aren't summarised yet and don't fit the
+        budget are left out, until update() adds them to the summary.
+
+        Args:
+            messages (List[BaseMessage]): The full chat history.
+            state (dict): The "summary" and "summarised" count of update().
+
+        Returns:
+            List[BaseMessage]: The windowed history.
+        """
+        summary, summarised = self._restore(messages, state)
+
+        pending = messages[summarised:]
+        history = list(pending[len(pending) - self._recent(pending, summary) :])
+        if summary:
+            history.insert(0, SystemMessage(content=self.SUMMARY_PREFIX + summary))
+        return history
@@ -0,0 +1,153 @@
+import os
+import time
+import logging
+import random
+import openai
+import tiktoken
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
+from langchain_core.embeddings import Embeddings
+
+
+class ConcurrentEmbeddings(Embeddings):
+    """
+    Embeds documents in token-limited batches with a bounded pool of concurrent requests.
+
+    Rate limited (HTTP 429) and other transient errors are retried after the
+    Retry-After of the response, or with exponential backoff when it is missing.
+    Create the underlying embeddings with max_retries=0, so their client doesn't
+    retry on top of that.
+    Wrap it in CacheBackedEmbeddings to store the results, the cache then only
+    sends the missing texts here.
+
+    Example:
+    embeddings = CacheBackedEmbeddings.from_bytes_store(
+        ConcurrentEmbeddings(azure_embeddings(max_retries=0)), store, namespace=model
+    )
+    """
+
+    # The maximum number of tokens and texts in one request.
+    max_batch_tokens: int = int(os.getenv("EMBEDDINGS_MAX_BATCH_TOKENS", "8000"))
+    max_batch_size: int = int(os.getenv("EMBEDDINGS_MAX_BATCH_SIZE", "16"))
+    # The maximum number of concurrent requests.
+    max_workers: int = int(os.getenv("EMBEDDINGS_MAX_WORKERS", "4"))
+    # The number of retries of a rate limited or failed request.
+    max_retries: int = 6
+
+    def __init__(
+        self,
+        underlying_embeddings: Embeddings,
+        max_batch_tokens: int = None,
+        max_batch_size: int = None,
+        max_workers: int = None,
+        length_function: Callable[[str], int] = None,
+    ):
+        """
+        Args:
+            underlying_embeddings (Embeddings): The embeddings that call the API.
+            max_batch_tokens (int, optional): Overrides the class default.
+            max_batch_size (int, optional): Overrides the class default.
+            max_workers (int, optional): Overrides the class default.
+            length_function (Callable[[str], int], optional): Counts the tokens of
+                a text instead of tiktoken.
+        """
+        self.underlying_embeddings = underlying_embeddings
+        if max_batch_tokens is not None:
+            self.max_batch_tokens = max_batch_tokens
+        if max_batch_size is not None:
+            self.max_batch_size = max_batch_size
+        if max_workers is not None:
+            self.max_workers = max_workers
+
+        if length_function is None:
+            encoding = tiktoken.get_encoding("cl100k_base")
+            length_function = lambda text: len(encoding.encode(text))
+        self._length_function = length_function
+
+    def batches(self, texts: List[str]) -> List[List[int]]:
+        """Returns the indexes of the texts grouped in batches within the limits."""
+        batches = []
+        batch, batch_tokens = [], 0
+        for index, text in enumerate(texts):
+            tokens = self._length_function(text)
+            if batch and (
+                batch_tokens + tokens > self.max_batch_tokens
+                or len(batch) >= self.max_batch_size
+            ):
+                batches.append(batch)
+                batch, batch_tokens = [], 0
+            batch.append(index)
+            batch_tokens += tokens
+        if batch:
+            batches.append(batch)
+        return batches
+
+    @staticmethod
+    def _retry_after(error: Exception) -> Optional[float]:
+        """
+        Returns the seconds to wait before retrying, 0 to back off, or None when the
+        error shouldn't be retried. Retries the same errors as the OpenAI client.
+        """
+        if isinstance(error, openai.APIConnectionError):
+            return 0.0
+        status_code = getattr(error, "status_code", None)
+        if status_code not in (408, 409, 429) and (status_code or 0) < 500:
+            return None
+
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None) or {}
+        try:
+            if "retry-after-ms" in headers:
+                return float(headers["retry-after-ms"]) / 1000
+            if "retry-after" in headers:
+                return float(headers["retry-after"])
+        except ValueError:
+            pass
+        return 0.0
+
+    def _embed_batch(self, texts: List[str]) -> List[List[float]]:
+        for attempt in range(self.max_retries + 1):
+            try:
+                return self.underlying_embeddings.embed_documents(texts)
+            except Exception as e:
+                retry_after = self._retry_after(e)
+                if retry_after is None or attempt == self.max_retries:
+                    raise
+                # Without a Retry-After, back off exponentially with jitter.
+                wait = retry_after or min(2**attempt, 60) * (0.5 + random.random())
+                logging.warning(
+                    "🐢 Embeddings request failed (%s), retrying in %.1fs", e, wait
+                )
+                time.sleep(wait)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embeds the texts with concurrent batched requests, in the order of the texts.
+
+        Args:
+            texts (List[str]): The texts to embed.
+        """
+        batches = self.batches(texts)
+        if len(batches) <= 1 or self.max_workers <= 1:
+            results = [
+                self._embed_batch([texts[i] for i in batch]) for batch in batches
+            ]
+        else:
+            with ThreadPoolExecutor(
+                max_workers=min(self.max_workers, len(batches))
+            ) as executor:
+                results = list(
+                    executor.map(
+                        lambda batch: self._embed_batch([texts[i] for i in batch]),
+                        batches,
+                    )
+                )
+
+        embeddings: List[List[float]] = [None] * len(texts)
+        for batch, vectors in zip(batches, results):
+            for index, vector in zip(batch, vectors):
+                embeddings[index] = vector
+        return embeddings
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.underlying_embeddings.embed_query(text)
@@ -0,0 +1,268 @@
+import time
+import threading
+from uuid import UUID
+from typing import Any, Dict, List, Optional
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.documents import Document
+from langchain_core.messages import BaseMessage, get_buffer_string
+from langchain_core.outputs import LLMResult
+
+
+class TraceCallbackHandler(BaseCallbackHandler):
+    """
+    Records the steps of a single chain invocation as structured events.
+
+    Pass a new handler to every invoke(), so traces of concurrent sessions never mix.
+    The events only keep references to the inputs and outputs; formatting is done
+    when the trace is displayed.
+
+    Every event is a dict with the "type" (chain, llm, retriever), the "name", the
+    "run_id" and "parent_run_id", the "latency" in seconds and, depending on the
+    type, the "prompt", "output", "token_usage", "query", "documents", "cypher" or
+    "error".
+
+    Example:
+    tracer = TraceCallbackHandler()
+    chain.invoke({"question": question}, config={"callbacks": [tracer]})
+    print(tracer.to_text())
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.events: List[dict] = []
+        self._runs: Dict[UUID, dict] = {}
+        self._lock = threading.Lock()
+
+    def _start(
+        self,
+        event_type: str,
+        serialized: Optional[Dict[str, Any]],
+        run_id: UUID,
+        parent_run_id: Optional[UUID],
+        name: Optional[str] = None,
+        **fields,
+    ) -> None:
+        if name is None and serialized:
+            name = serialized.get("name") or (serialized.get("id") or ["?"])[-1]
+
+        event = {
+            "type": event_type,
+            "name": name or event_type,
+            "run_id": run_id,
+            "parent_run_id": parent_run_id,
+            "start": time.perf_counter(),
+            "latency": None,
+            **fields,
+        }
+        with self._lock:
+            self._runs[run_id] = event
+            self.events.append(event)
+
+    def _end(self, run_id: UUID, **fields) -> None:
+        with self._lock:
+            event = self._runs.pop(run_id, None)
+        if event is not None:
+            event["latency"] = time.perf_counter() - event["start"]
+            event.update(fields)
+
+    def on_chain_start(
+        self,
+        serialized: Dict[str, Any],
+        inputs: Dict[str, Any],
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        **kwargs: Any,
+    ) -> None:
+        self._start("chain", serialized, run_id, parent_run_id, kwargs.get("name"))
+
+    def on_chain_end(
+        self,
+        outputs: Dict[str, Any],
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        **kwargs: Any,
+    ) -> None:
+        fields = {}
+        # GraphCypherQAChain returns the generated Cypher in its intermediate steps.
+        if isinstance(outputs, dict) and outputs.get("intermediate_steps"):
+            step = outputs["intermediate_steps"][0]
+            if isinstance(step, dict) and "query" in step:
+                fields["cypher"] = step["query"]
+        self._end(run_id, **fields)
+
+    def on_chain_error(
+        self,
+        error: BaseException,
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        **kwargs: Any,
+    ) -> None:
+        self._end(run_id, error=repr(error))
+
+    def on_llm_start(
+        self,
+        serialized: Dict[str, Any],
+        prompts: List[str],
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        **kwargs: Any,
+    ) -> None:
+        self._start(
+            "llm",
+            serialized,
+            run_id,
+            parent_run_id,
+            kwargs.get("name"),
+            prompt=prompts,
+        )
+
+    def on_chat_model_start(
+        self,
+        serialized: Dict[str, Any],
+        messages: List[List[BaseMessage]],
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        **kwargs: Any,
+    ) -> None:
+        self._start(
+            "llm",
+            serialized,
+            run_id,
+            parent_run_id,
+            kwargs.get("name"),
+            prompt=messages,
+        )
+
+    def on_llm_end(
+        self,
+        response: LLMResult,
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        **kwargs: Any,
+    ) -> None:
+        self._end(
+            run_id,
+            output=[
+                generation.text
+                for generations in response.generations
+                for generation in generations
+            ],
+            token_usage=(response.llm_output or {}).get("token_usage"),
+        )
+
+    def on_llm_error(
+        self,
+        error: BaseException,
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        **kwargs: Any,
+    ) -> None:
+        self._end(run_id, error=repr(error))
+
+    def on_retriever_start(
+        self,
+        serialized: Dict[str, Any],
+        query: str,
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        **kwargs: Any,
+    ) -> None:
+        self._start(
+            "retriever",
+            serialized,
+            run_id,
+            parent_run_id,
+            kwargs.get("name"),
+            query=query,
+        )
+
+    def on_retriever_end(
+        self,
+        documents: List[Document],
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        **kwargs: Any,
+    ) -> None:
+        self._end(run_id, documents=documents)
+
+    def on_retriever_error(
+        self,
+        error: BaseException,
+        *,
+        run_id: UUID,
+        parent_run_id: Optional[UUID] = None,
+        **kwargs: Any,
+    ) -> None:
+        self._end(run_id, error=repr(error))
+
+    def token_usage(self) -> dict:
+        """Returns the summed token usage of all LLM calls."""
+        total = {}
+        for event in self.events:
+            for key, value in (event.get("token_usage") or {}).items():
+                if isinstance(value, (int, float)):
+                    total[key] = total.get(key, 0) + value
+        return total
+
+    def steps(self) -> List[dict]:
+        """Returns one row per event with the name, type, latency and tokens, in start order."""
+        depth = {}
+        rows = []
+        for event in self.events:
+            depth[event["run_id"]] = depth.get(event["parent_run_id"], -1) + 1
+            rows.append(
+                {
+                    "step": "  " * depth[event["run_id"]] + event["name"],
+                    "type": event["type"],
+                    "latency_ms": (
+                        None
+                        if event["latency"] is None
+                        else round(event["latency"] * 1000, 1)
+                    ),
+                    "tokens": (event.get("token_usage") or {}).get("total_tokens"),
+                }
+            )
+        return rows
+
+    def to_text(self) -> str:
+        """Formats the prompts, Cypher, documents, outputs and errors of the trace."""
+        lines = []
+        for event in self.events:
+            if event["type"] == "chain" and not ("cypher" in event or "error" in event):
+                continue
+
+            latency = (
+                "-" if event["latency"] is None else f"{event['latency'] * 1000:.0f} ms"
+            )
+            lines.append(f"[{event['type']}] {event['name']} ({latency})")
+
+            for prompt in event.get("prompt") or []:
+                if isinstance(prompt, list):
+                    prompt = get_buffer_string(prompt)
+                lines.append(f"PROMPT:\n{prompt}")
+            if "query" in event:
+                lines.append(f"QUERY: {event['query']}")
+            for document in event.get("documents") or []:
+                lines.append(
+                    f"DOCUMENT ({document.metadata.get('source', '?')}):\n{document.page_content}"
+                )
+            for output in event.get("output") or []:
+                lines.append(f"OUTPUT:\n{output}")
+            if event.get("token_usage"):
+                lines.append(f"TOKENS: {event['token_usage']}")
+            if "cypher" in event:
+                lines.append(f"CYPHER:\n{event['cypher']}")
+            if "error" in event:
+                lines.append(f"ERROR: {event['error']}")
+            lines.append("")
+
+        return "\n".join(lines)
@@ -7,7 +7,8 @@ from uwv_toolkit.db.feedback import FeedbackModel
 from uwv_toolkit.streamlit.components import (
     ChatMessageFeedback,
 )
-from uwv_toolkit.utils import deep_update
+from uwv_toolkit.utils import deep_update, azure_llm
+from uwv_toolkit.langchain import ChatHistoryWindow
 
 
 class ChatMixin:
@@ -18,6 +19,10 @@ class ChatMixin:
             "feedback_model": None,
             "chat_history_namespace": "default_chat_history",
             "chat_type": None,
+            # The token budget and maximum number of messages of the history
+            # passed to the chain, older messages are summarised.
+            "history_max_tokens": 1000,
+            "history_max_messages": 10,
         }
     }
 
@@ -54,6 +59,54 @@ class ChatMixin:
         else:
             return st.session_state[self._config["chat"]["chat_history_namespace"]][key]
 
+    def _chat_history_window(self) -> ChatHistoryWindow:
+        """Returns the shared ChatHistoryWindow for the configured budget."""
+
+        @st.cache_resource
+        def chat_history_window(max_tokens: int, max_messages: int):
+            return ChatHistoryWindow(
+                llm=azure_llm(temperature=0),
+                max_tokens=max_tokens,
+                max_messages=max_messages,
+            )
+
+        return chat_history_window(
+            self._config["chat"]["history_max_tokens"],
+            self._config["chat"]["history_max_messages"],
+        )
+
+    def _get_chat_history_window(self, chat_history: list) -> list:
+        """
+        Returns the chat history to pass to the chain: a summary of the older
+        messages followed by the most recent messages within the token budget.
+
+        Args:
+            chat_history: the full chat history
+
+        Returns:
+            list: the windowed chat history
+        """
+        if "history_window" not in self._get_chat_session_state():
+            self._set_chat_session_state("history_window", {})
+
+        return self._chat_history_window().build(
+            chat_history, self._get_chat_session_state("history_window")
+        )
+
+    def _update_chat_history_summary(self) -> None:
+        """
+        Summarises the messages that fell out of the history window.
+
+        Called after the answer is shown, so the LLM call doesn't delay the answer.
+        """
+        if "history_window" not in self._get_chat_session_state():
+            self._set_chat_session_state("history_window", {})
+
+        self._chat_history_window().update(
+            self._get_chat_session_state("chat_history"),
+            self._get_chat_session_state("history_window"),
+        )
+
     def init_history(self):
         if "messages" not in self._get_chat_session_state():
             self._set_chat_session_state(
@@ -121,13 +174,16 @@ class ChatMixin:
                             st.markdown(f"**Bron:** {source.metadata['source']}")
                             st.markdown(f"**Paragraaf:** {source.page_content}")
 
-    def _display_debug(self, container: DeltaGenerator, debug: str) -> None:
+    def _display_debug(
+        self, container: DeltaGenerator, debug: str, trace: list = None
+    ) -> None:
         """
         Method to display debug information in an expander.
 
         Args:
             container: the chat message block
-            debug: dict of debug information
+            debug: the formatted trace of the chain
+            trace: the steps of the chain with their latency and tokens (optional)
 
         Returns:
             None
@@ -135,8 +191,36 @@ class ChatMixin:
         if container is not None and debug is not None:
             with container:
                 with st.expander("🔍 Debug informatie"):
+                    if trace:
+                        st.dataframe(trace, use_container_width=True)
                     st.code(debug)
 
+    def _display_stream(self, container: DeltaGenerator, stream: Iterator) -> dict:
+        """
+        Method to display a streamed answer token by token.
+
+        Args:
+            container: the chat message block
+            stream: the dict chunks of the chain, see SmzDocChain.ask_stream()
+
+        Returns:
+            dict: the chunks combined, like the result of ask()
+        """
+        result = {}
+
+        def response_tokens():
+            for chunk in stream:
+                for key, value in chunk.items():
+                    if key == "response":
+                        yield value
+                    else:
+                        result[key] = value
+
+        with container:
+            result["response"] = st.write_stream(response_tokens())
+
+        return result
+
     def display_history(self):
         self.init_history()
 
@@ -174,7 +258,10 @@ class ChatMixin:
         # Handle the assistance message.
         chat_message_block = st.chat_message("assistant")
 
-        chat_message_block.write(msg["response"])
+        if isinstance(msg, dict):
+            chat_message_block.write(msg["response"])
+        else:
+            msg = self._display_stream(chat_message_block, msg)
         st.session_state[self._config["chat"]["chat_history_namespace"]][
             "chat_history"
         ].append(AIMessage(content=msg["response"]))
@@ -199,6 +286,8 @@ class ChatMixin:
             debug_information += "\n\n##################\nCONTEXTUALISED QUESTION:\n"
             debug_information += msg.get("contextualised_question")
 
-        self._display_debug(chat_message_block, debug_information)
+        self._display_debug(chat_message_block, debug_information, msg.get("trace"))
+
+        self._update_chat_history_summary()
 
         return msg
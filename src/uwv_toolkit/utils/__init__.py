@@ -4,3 +4,4 @@ from .persistent_path import persistent_path
 from .llm import *
 from .auth import *
 from .deep_update import deep_update
+from .normalise_question import normalise_question
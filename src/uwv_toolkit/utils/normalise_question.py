@@ -0,0 +1,10 @@
+import re
+
+
+def normalise_question(question: str) -> str:
+    """
+    Lowercases the question and removes the surrounding punctuation and extra whitespace,
+    so the caches see small variations of a question as the same question.
+    """
+    question = re.sub(r"\s+", " ", question.lower()).strip()
+    return question.strip(" ?!.")
@@ -1,5 +1,7 @@
 # pylint: disable=E1129
 import os
+import gzip
+import json
 import random
 import pytest
 import warnings
@@ -67,6 +69,35 @@ def test_auradb_export_json(auradb):
     os.remove(filename)
 
 
+def test_auradb_export_jsonl_gzip(auradb):
+    """Test the streaming, compressed export"""
+    auradb.cleanup()
+    auradb.import_list(
+        [
+            Node(id="walter", type="Person", properties={"name": "Walter"}),
+            Node(id="bob", type="Person", properties={"name": "Bob"}),
+        ]
+    )
+
+    filename = f"tmp/export_test_{random.randint(1, 1000000)}.jsonl.gz"
+    progress = []
+    stats = auradb.export_jsonl(
+        filename=filename,
+        batch_size=1,
+        compression="gzip",
+        progress_callback=progress.append,
+    )
+
+    with gzip.open(filename, "rt", encoding="utf-8") as file:
+        lines = [json.loads(line) for line in file]
+
+    assert len(lines) == 2
+    assert stats["lines"] == 2
+    assert len(progress) == stats["batches"]
+
+    os.remove(filename)
+
+
 def test_auradb_cleanup(auradb):
     """Clean up test data
 
@@ -90,3 +121,35 @@ def test_auradb_cleanup(auradb):
     export = auradb.get_knowledge_graph()
     assert len(export["nodes"]) == 0, "Exported node count is not 0"
     assert len(export["relationships"]) == 0, "Exported relationship count is not 0"
+
+
+def test_auradb_cleanup_scoped(auradb):
+    """Only the given labels and relationship types are removed"""
+    auradb.cleanup()
+
+    walter = Node(id="walter", type="Person", properties={"name": "Walter"})
+    delft = Node(id="delft", type="City", properties={"name": "Delft"})
+    amsterdam = Node(id="amsterdam", type="City", properties={"name": "Amsterdam"})
+    auradb.bulk_import_list(
+        [
+            walter,
+            delft,
+            amsterdam,
+            Relationship(source=walter, type="LIVES_IN", target=delft),
+            Relationship(source=walter, type="WORKS_IN", target=amsterdam),
+        ]
+    )
+
+    progress = []
+    deleted = auradb.cleanup(
+        relationship_types=["WORKS_IN"], progress_callback=progress.append
+    )
+    assert deleted == {"nodes": 0, "relationships": 1}
+    assert progress[-1] == {"phase": "relationships", "deleted": 1, "total": 1}
+
+    deleted = auradb.cleanup(labels=["City"], batch_size=1)
+    assert deleted == {"nodes": 2, "relationships": 0}
+
+    export = auradb.get_knowledge_graph()
+    assert [node.id for node in export["nodes"]] == ["walter"]
+    assert len(export["relationships"]) == 0
@@ -0,0 +1,110 @@
+import os
+import pytest
+import threading
+import warnings
+
+warnings.filterwarnings("ignore", category=DeprecationWarning)
+from src.modules.auradb.driver_registry import DriverRegistry
+from src.modules.auradb.auradb import AuraDB
+
+URI = "neo4j://localhost:7687"
+
+
+@pytest.fixture(autouse=True)
+def fixture_close_drivers():
+    yield
+    DriverRegistry.close_all()
+
+
+def test_driver_is_shared():
+    driver = DriverRegistry.get_driver(URI, "neo4j", "secret")
+
+    assert DriverRegistry.get_driver(URI, "neo4j", "secret") is driver
+    assert DriverRegistry.get_driver(URI, "other", "secret") is not driver
+    assert DriverRegistry.size() == 2
+
+
+def test_changed_password_creates_new_driver():
+    driver = DriverRegistry.get_driver(URI, "neo4j", "secret")
+
+    assert DriverRegistry.get_driver(URI, "neo4j", "changed") is not driver
+    assert DriverRegistry.size() == 1
+
+
+def test_evict_idle():
+    DriverRegistry.get_driver(URI, "neo4j", "secret")
+
+    assert DriverRegistry.evict_idle(max_idle_time=3600) == 0
+    assert DriverRegistry.evict_idle(max_idle_time=-1) == 1
+    assert DriverRegistry.size() == 0
+
+
+def test_auradb_survives_eviction():
+    auradb = AuraDB(URI, "neo4j", "secret")
+    driver = auradb._driver
+
+    # An evicted driver is closed, the instance gets a new one on the next use.
+    assert DriverRegistry.evict_idle(max_idle_time=-1) == 1
+    assert auradb._driver is not driver
+    assert DriverRegistry.size() == 1
+
+
+def test_leased_driver_is_not_evicted():
+    with DriverRegistry.lease(URI, "neo4j", "secret") as driver:
+        assert DriverRegistry.evict_idle(max_idle_time=-1) == 0
+
+        # A password change retires the leased driver, it is closed afterwards.
+        assert DriverRegistry.get_driver(URI, "neo4j", "changed") is not driver
+        assert not driver._closed
+
+    assert driver._closed
+    assert DriverRegistry.evict_idle(max_idle_time=-1) == 1
+
+
+def test_password_is_not_stored():
+    DriverRegistry.get_driver(URI, "neo4j", "secret")
+
+    assert "secret" not in DriverRegistry._drivers[(URI, "neo4j")].values()
+
+
+def test_health_check_only_blocks_its_own_key(monkeypatch):
+    slow = DriverRegistry.get_driver(URI, "slow", "secret")
+    started, release = threading.Event(), threading.Event()
+
+    def verify_connectivity():
+        started.set()
+        release.wait(5)
+
+    monkeypatch.setattr(slow, "verify_connectivity", verify_connectivity)
+    monkeypatch.setattr(DriverRegistry, "health_check_interval", -1)
+    thread = threading.Thread(
+        target=DriverRegistry.get_driver, args=(URI, "slow", "secret")
+    )
+    thread.start()
+    try:
+        assert started.wait(5)
+        # Another database and user doesn't wait for the slow health check.
+        monkeypatch.setattr(DriverRegistry, "health_check_interval", 3600)
+        assert DriverRegistry.get_driver(URI, "other", "secret") is not None
+        assert thread.is_alive()
+    finally:
+        release.set()
+        thread.join()
+
+
+def test_auradb_uses_shared_driver():
+    auradb = AuraDB(
+        os.getenv("NEO4J_CONNECTION_URI"),
+        os.getenv("NEO4J_USER"),
+        os.getenv("NEO4J_PASSWORD"),
+    )
+    auradb.check_status()
+
+    # The driver stays open after a call, so the next instance reuses the pool.
+    other = AuraDB(
+        os.getenv("NEO4J_CONNECTION_URI"),
+        os.getenv("NEO4J_USER"),
+        os.getenv("NEO4J_PASSWORD"),
+    )
+    assert other._driver is auradb._driver
+    other.check_status()
@@ -46,3 +46,55 @@ def test_get_knowledge_graph_empty(auradb):
 
     assert len(kg["nodes"]) == 0
     assert len(kg["relationships"]) == 0
+
+
+def test_iter_knowledge_graph_pages(auradb):
+    auradb.cleanup()
+
+    people = [
+        Node(id=f"person_{i}", type="Person", properties={"name": f"Person {i}"})
+        for i in range(5)
+    ]
+    city = Node(id="delft", type="City", properties={"name": "Delft"})
+    auradb.bulk_import_list(
+        people
+        + [city]
+        + [Relationship(type="lives_in", source=p, target=city) for p in people]
+    )
+
+    objs = list(auradb.iter_knowledge_graph(page_size=2))
+    nodes = [obj for obj in objs if isinstance(obj, Node)]
+    relationships = [obj for obj in objs if isinstance(obj, Relationship)]
+
+    assert len(nodes) == 6
+    assert len(relationships) == 5
+    assert all("_created" not in node.properties for node in nodes)
+
+
+def test_get_knowledge_graph_filters(auradb):
+    auradb.cleanup()
+
+    alice = Node(id="alice", type="Person", properties={"name": "Alice"})
+    bob = Node(id="bob", type="Person", properties={"name": "Bob"})
+    delft = Node(id="delft", type="City", properties={"name": "Delft"})
+    auradb.bulk_import_list(
+        [
+            alice,
+            bob,
+            delft,
+            Relationship(type="knows", source=alice, target=bob),
+            Relationship(type="lives_in", source=alice, target=delft),
+        ]
+    )
+
+    kg = auradb.get_knowledge_graph(labels=["Person"])
+    assert len(kg["nodes"]) == 2
+    assert len(kg["relationships"]) == 1
+
+    kg = auradb.get_knowledge_graph(relationship_types=["lives_in"])
+    assert len(kg["nodes"]) == 3
+    assert [rel.type for rel in kg["relationships"]] == ["lives_in"]
+
+    kg = auradb.get_knowledge_graph(max_nodes=1)
+    assert len(kg["nodes"]) == 1
+    assert len(kg["relationships"]) == 0
@@ -0,0 +1,127 @@
+from langchain_community.graphs.graph_document import Node, Relationship
+from src.modules.auradb.graph_diff import GraphDiff
+
+
+def _graph(nodes, relationships):
+    return {"nodes": nodes, "relationships": relationships}
+
+
+def _live_node(id: str, type: str, properties: dict = None) -> Node:
+    """A node as get_knowledge_graph() returns it: the import stores the id as property."""
+    return Node(id=id, type=type, properties={**(properties or {}), "id": id})
+
+
+def test_unchanged_graph_is_empty():
+    walter = Node(id="Walter", type="Person", properties={"age": 50})
+    bob = Node(id="Bob", type="Person")
+    knows = Relationship(source=walter, target=bob, type="KNOWS")
+
+    source = _graph([walter, bob], [knows])
+    target = _graph(
+        [
+            _live_node("Walter", "Person", {"age": 50}),
+            _live_node("Bob", "Person"),
+        ],
+        [
+            Relationship(
+                source=_live_node("Walter", "Person", {"age": 50}),
+                target=_live_node("Bob", "Person"),
+                type="KNOWS",
+            )
+        ],
+    )
+
+    diff = GraphDiff.compare(source, target)
+    assert diff.is_empty()
+
+
+def test_inserts_updates_and_deletes():
+    walter = Node(id="Walter", type="Person", properties={"age": 51})
+    bob = Node(id="Bob", type="Person")
+    disney = Node(id="Disney", type="Company")
+    source = _graph(
+        [walter, bob, disney],
+        [
+            Relationship(source=walter, target=bob, type="KNOWS"),
+            Relationship(source=walter, target=disney, type="WORKS_AT"),
+        ],
+    )
+
+    old_walter = _live_node("Walter", "Person", {"age": 50})
+    old_bob = _live_node("Bob", "Person")
+    alice = _live_node("Alice", "Person")
+    target = _graph(
+        [old_walter, old_bob, alice],
+        [
+            Relationship(source=old_walter, target=old_bob, type="LIKES"),
+            Relationship(source=alice, target=old_bob, type="KNOWS"),
+        ],
+    )
+
+    diff = GraphDiff.compare(source, target)
+
+    assert [node.id for node in diff.inserted_nodes] == ["Disney"]
+    assert [node.id for node in diff.updated_nodes] == ["Walter"]
+    assert [node.id for node in diff.deleted_nodes] == ["Alice"]
+    assert sorted(rel.type for rel in diff.inserted_relationships) == [
+        "KNOWS",
+        "WORKS_AT",
+    ]
+    # The KNOWS relationship of Alice is removed with Alice herself.
+    assert [rel.type for rel in diff.deleted_relationships] == ["LIKES"]
+    assert diff.summary()["updated_relationships"] == 0
+
+
+def test_label_change_replaces_node_and_relationships():
+    walter = Node(id="Walter", type="Employee")
+    bob = Node(id="Bob", type="Person")
+    knows = Relationship(source=walter, target=bob, type="KNOWS")
+
+    old_walter = Node(id="Walter", type="Person")
+    old_knows = Relationship(source=old_walter, target=bob, type="KNOWS")
+
+    diff = GraphDiff.compare(
+        _graph([walter, bob], [knows]), _graph([old_walter, bob], [old_knows])
+    )
+
+    assert [node.type for node in diff.deleted_nodes] == ["Person"]
+    assert [node.type for node in diff.inserted_nodes] == ["Employee"]
+    assert diff.inserted_relationships == [knows]
+    assert diff.deleted_relationships == []
+
+
+def test_relationship_property_update():
+    walter = Node(id="Walter", type="Person")
+    bob = Node(id="Bob", type="Person")
+
+    diff = GraphDiff.compare(
+        _graph(
+            [walter, bob],
+            [
+                Relationship(
+                    source=walter, target=bob, type="KNOWS", properties={"since": 2020}
+                )
+            ],
+        ),
+        _graph([walter, bob], [Relationship(source=walter, target=bob, type="KNOWS")]),
+    )
+
+    assert diff.summary() == {
+        "inserted_nodes": 0,
+        "updated_nodes": 0,
+        "deleted_nodes": 0,
+        "inserted_relationships": 0,
+        "updated_relationships": 1,
+        "deleted_relationships": 0,
+    }
+
+
+def test_import_properties_are_ignored():
+    walter = Node(id="Walter", type="Person", properties={"age": 50})
+
+    diff = GraphDiff.compare(
+        _graph([walter], []),
+        _graph([_live_node("Walter", "Person", {"age": 50, "_created": True})], []),
+    )
+
+    assert diff.is_empty()
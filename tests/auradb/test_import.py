@@ -7,6 +7,7 @@ from langchain_community.graphs.neo4j_graph import Neo4jGraph
 from langchain_community.graphs.graph_document import Node, Relationship
 from src.modules.utils import WarningCapture
 from src.modules.auradb.auradb import AuraDB
+from src.modules.auradb.import_checkpoint import ImportCheckpoint
 
 
 @pytest.fixture(name="neo4j_graph")
@@ -152,3 +153,113 @@ def test_import_list_relationship(neo4j_graph):
         )
 
     assert len(wc.captured_warnings) == 0
+
+
+def test_bulk_import_list(auradb):
+    auradb.cleanup()
+
+    alice = Node(id="alice", type="Person", properties={"name": "Alice"})
+    bob = Node(id="bob", type="Person", properties={"name": "Bob"})
+    delft = Node(id="delft", type="City", properties={"name": "Delft"})
+
+    with WarningCapture() as wc:
+        result = auradb.bulk_import_list(
+            [
+                alice,
+                bob,
+                delft,
+                Relationship(type="knows", source=alice, target=bob),
+                Relationship(type="lives_in", source=alice, target=delft),
+            ],
+            batch_size=1,
+        )
+
+    assert len(wc.captured_warnings) == 0
+    assert result["node_count"] == 3
+    assert result["relationship_count"] == 2
+    assert len(result["batches"]) == 5
+
+    # Importing the same graph again only matches the existing entities.
+    result = auradb.bulk_import_list([alice, bob, delft])
+    assert result["node_count"] == 0
+    assert sum(batch["matched"] for batch in result["batches"]) == 3
+
+    kg = auradb.get_knowledge_graph()
+    assert len(kg["nodes"]) == 3
+    assert len(kg["relationships"]) == 2
+
+
+def test_bulk_import_list_relationship_warning(auradb):
+    auradb.cleanup()
+
+    alice = Node(id="alice", type="Person", properties={"name": "Alice"})
+    bob = Node(id="bob", type="Person", properties={"name": "Bob"})
+
+    with WarningCapture() as wc:
+        result = auradb.bulk_import_list(
+            [Relationship(type="knows", source=alice, target=bob, properties={})]
+        )
+
+    assert result["relationship_count"] == 0
+    assert len(wc.captured_warnings) == 1
+    assert "Cannot create 1 relationship(s)" in wc.captured_warnings[0]
+
+
+def test_prepare_schema(auradb):
+    result = auradb.prepare_schema(["Person", "City"])
+
+    assert result.keys() == {"Person", "City"}
+
+    # Preparing the schema twice is a no-op.
+    assert auradb.prepare_schema(["Person"]) == {"Person": result["Person"]}
+
+
+def test_import_jsonl_roundtrip(auradb, tmp_path):
+    auradb.cleanup()
+
+    alice = Node(id="alice", type="Person", properties={"name": "Alice"})
+    bob = Node(id="bob", type="Person", properties={"name": "Bob"})
+    auradb.bulk_import_list(
+        [alice, bob, Relationship(type="knows", source=alice, target=bob)]
+    )
+
+    filename = os.path.join(tmp_path, "export.jsonl")
+    auradb.export_jsonl(filename=filename)
+    auradb.cleanup()
+
+    with WarningCapture() as wc:
+        result = auradb.import_jsonl(filename, batch_size=1, workers=2)
+
+    assert len(wc.captured_warnings) == 0
+    assert result["node_count"] == 2
+    assert result["relationship_count"] == 1
+    assert not os.path.exists(f"{filename}.{auradb.target_id()}.checkpoint.json")
+
+    kg = auradb.get_knowledge_graph()
+    assert len(kg["nodes"]) == 2
+    assert len(kg["relationships"]) == 1
+
+
+def test_import_graph_resumes_from_checkpoint(auradb, tmp_path):
+    auradb.cleanup()
+
+    nodes = [
+        Node(id=f"person_{i}", type="Person", properties={"name": f"Person {i}"})
+        for i in range(4)
+    ]
+    graph = {"nodes": nodes, "relationships": []}
+    checkpoint_path = os.path.join(tmp_path, "graph.checkpoint.json")
+
+    # Pretend an earlier run committed the first batch.
+    checkpoint = ImportCheckpoint(
+        checkpoint_path, fingerprint=auradb._graph_fingerprint(graph, batch_size=2)
+    )
+    checkpoint.mark_done("nodes", 0, created=2)
+
+    result = auradb.import_graph(
+        graph, batch_size=2, workers=2, checkpoint_path=checkpoint_path
+    )
+
+    assert result["skipped_batches"] == 1
+    assert result["batches"] == 1
+    assert len(auradb.get_knowledge_graph()["nodes"]) == 2
@@ -0,0 +1,149 @@
+import os
+import pytest
+from contextlib import contextmanager
+from langchain_community.graphs.graph_document import Node
+from src.modules.auradb.auradb import AuraDB
+from src.modules.auradb.import_checkpoint import ImportCheckpoint
+
+
+@pytest.fixture(name="checkpoint_path")
+def fixture_checkpoint_path(tmp_path):
+    return os.path.join(tmp_path, "import.checkpoint.json")
+
+
+def test_checkpoint_resumes(checkpoint_path):
+    checkpoint = ImportCheckpoint(checkpoint_path, {"source": "export.jsonl"})
+    checkpoint.mark_done("nodes", 0, created=10)
+    checkpoint.mark_done("nodes", 2, created=5)
+
+    resumed = ImportCheckpoint(checkpoint_path, {"source": "export.jsonl"})
+    assert resumed.is_done("nodes", 0)
+    assert not resumed.is_done("nodes", 1)
+    assert resumed.is_done("nodes", 2)
+    assert not resumed.is_done("relationships", 0)
+    assert resumed.done_count("nodes") == 2
+    assert resumed.created_count("nodes") == 15
+
+
+def test_checkpoint_fingerprint_mismatch(checkpoint_path):
+    checkpoint = ImportCheckpoint(checkpoint_path, {"source": "export.jsonl"})
+    checkpoint.mark_done("nodes", 0)
+
+    other = ImportCheckpoint(checkpoint_path, {"source": "other.jsonl"})
+    assert not other.is_done("nodes", 0)
+
+
+def test_checkpoint_remove(checkpoint_path):
+    checkpoint = ImportCheckpoint(checkpoint_path, {"source": "export.jsonl"})
+    checkpoint.mark_done("nodes", 0)
+    assert os.path.exists(checkpoint_path)
+
+    checkpoint.remove()
+    assert not os.path.exists(checkpoint_path)
+
+
+def test_checkpoint_in_memory():
+    checkpoint = ImportCheckpoint(None, {"source": "export.jsonl"})
+    checkpoint.mark_done("nodes", 0)
+
+    assert checkpoint.is_done("nodes", 0)
+    checkpoint.remove()
+
+
+class FakeSession:
+    def __init__(self, written: list):
+        self._written = written
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def execute_write(self, write_function, batch):
+        self._written.append([node.id for node in batch])
+        return len(batch)
+
+
+class FakeDriver:
+    def __init__(self):
+        self.written = []
+
+    def session(self):
+        return FakeSession(self.written)
+
+
+class FakeAuraDB(AuraDB):
+    """An AuraDB that records the written batches instead of connecting."""
+
+    _driver = None
+
+    def __init__(self, uri: str, user: str):
+        self._uri = uri
+        self._user = user
+        self._driver = FakeDriver()
+
+    @contextmanager
+    def _session(self):
+        with self._driver.session() as session:
+            yield session
+
+    def prepare_schema(self, labels):
+        return {}
+
+
+def create_graph(names: str) -> dict:
+    return {
+        "nodes": [Node(id=name, type="Person") for name in names],
+        "relationships": [],
+    }
+
+
+def interrupted_import(auradb: AuraDB, graph: dict, checkpoint_path: str) -> None:
+    """Marks the first batch as committed, like an import that was interrupted."""
+    checkpoint = ImportCheckpoint(
+        checkpoint_path, auradb._graph_fingerprint(graph, batch_size=2)
+    )
+    checkpoint.mark_done("nodes", 0, created=2)
+
+
+def test_import_graph_resumes_same_target(checkpoint_path):
+    auradb = FakeAuraDB("neo4j://a", "neo4j")
+    graph = create_graph("abcd")
+    interrupted_import(auradb, graph, checkpoint_path)
+
+    result = auradb.import_graph(
+        graph, batch_size=2, workers=1, checkpoint_path=checkpoint_path
+    )
+
+    assert result["skipped_batches"] == 1
+    assert auradb._driver.written == [["c", "d"]]
+
+
+@pytest.mark.parametrize(
+    "uri,user,names",
+    [
+        ("neo4j://b", "neo4j", "abcd"),
+        ("neo4j://a", "other", "abcd"),
+        # The same counts, but edited contents.
+        ("neo4j://a", "neo4j", "abce"),
+    ],
+)
+def test_import_graph_restarts_for_other_target(checkpoint_path, uri, user, names):
+    interrupted_import(
+        FakeAuraDB("neo4j://a", "neo4j"), create_graph("abcd"), checkpoint_path
+    )
+
+    auradb = FakeAuraDB(uri, user)
+    result = auradb.import_graph(
+        create_graph(names), batch_size=2, workers=1, checkpoint_path=checkpoint_path
+    )
+
+    assert result["skipped_batches"] == 0
+    assert auradb._driver.written == [list(names[:2]), list(names[2:])]
+
+
+def test_target_id():
+    assert FakeAuraDB("neo4j://a", "neo4j").target_id() != (
+        FakeAuraDB("neo4j://b", "neo4j").target_id()
+    )
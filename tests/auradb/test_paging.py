@@ -0,0 +1,129 @@
+import re
+import warnings
+from contextlib import nullcontext
+from types import SimpleNamespace
+
+warnings.filterwarnings("ignore", category=DeprecationWarning)
+from langchain_community.graphs.graph_document import Node, Relationship
+from src.modules.auradb.auradb import AuraDB
+
+
+def _record(data: dict) -> SimpleNamespace:
+    return SimpleNamespace(data=lambda: data)
+
+
+class OrderedSession:
+    """Answers the page queries from a list of nodes, ordered by id like the id index."""
+
+    def __init__(self, nodes: list, relationships: list):
+        self.nodes = nodes
+        self.relationships = relationships
+        self.pages = []
+
+    def execute_read(self, read_function, *args):
+        return read_function(SimpleNamespace(run=self.run), *args)
+
+    def run(self, query: str, **params):
+        if query.startswith("CALL db.labels()"):
+            labels = sorted({label for node in self.nodes for label in node["labels"]})
+            return [{"label": label} for label in labels]
+
+        label = re.search(r"\(\w:`((?:[^`]|``)*)`\)", query).group(1).replace("``", "`")
+        assert label == params["label"]
+        assert "id > $cursor" in query and "ORDER BY" in query
+        self.pages.append((label, params["cursor"]))
+
+        page = sorted(
+            (
+                node
+                for node in self.nodes
+                if node["id"] > params["cursor"]
+                and [l for l in node["labels"] if l in params["labels"]][:1] == [label]
+            ),
+            key=lambda node: node["id"],
+        )[: params["limit"]]
+
+        if "OPTIONAL MATCH" not in query:
+            return [_record(self._node(node, node["id"])) for node in page]
+        return [_record(self._outgoing(node, params)) for node in page]
+
+    @staticmethod
+    def _node(node: dict, cursor: str = None) -> dict:
+        data = {"id": node["id"], "type": node["labels"][0], "properties": {}}
+        if cursor is not None:
+            data["cursor"] = cursor
+        return data
+
+    def _outgoing(self, node: dict, params: dict) -> dict:
+        targets = {target["id"]: target for target in self.nodes}
+        relationships = [
+            {"type": rel_type, "properties": {}, "target": self._node(targets[end])}
+            for start, rel_type, end in self.relationships
+            if start == node["id"]
+            and (params["types"] is None or rel_type in params["types"])
+            and (
+                params["target_labels"] is None
+                or set(targets[end]["labels"]) & set(params["target_labels"])
+            )
+        ]
+        return {
+            "cursor": node["id"],
+            "source": self._node(node),
+            "relationships": relationships,
+        }
+
+
+class FakeAuraDB(AuraDB):
+    def __init__(self, session: OrderedSession):
+        self.session = session
+
+    def _session(self):
+        return nullcontext(self.session)
+
+
+def _graph() -> OrderedSession:
+    nodes = [{"id": f"person_{i}", "labels": ["Persoon"]} for i in range(7)]
+    nodes += [
+        {"id": "delft", "labels": ["Stad"]},
+        {"id": "leiden", "labels": ["Stad"]},
+        {"id": "walter", "labels": ["Persoon", "Medewerker`"]},
+    ]
+    relationships = [(f"person_{i}", "woont_in", "delft") for i in range(7)]
+    relationships += [("walter", "woont_in", "leiden"), ("walter", "kent", "person_0")]
+    return OrderedSession(list(reversed(nodes)), relationships)
+
+
+def test_pages_every_node_once_in_id_order():
+    session = _graph()
+
+    objs = list(FakeAuraDB(session).iter_knowledge_graph(page_size=3))
+    nodes = [obj for obj in objs if isinstance(obj, Node)]
+    relationships = [obj for obj in objs if isinstance(obj, Relationship)]
+
+    assert [node.id for node in nodes] == sorted(
+        node["id"] for node in session.nodes if node["labels"][0] != "Stad"
+    ) + ["delft", "leiden"]
+    assert len(relationships) == 9
+    assert {(rel.source.id, rel.type, rel.target.id) for rel in relationships} == set(
+        session.relationships
+    )
+    assert ("Persoon", "person_2") in session.pages
+    assert ("Medewerker`", "") in session.pages
+
+
+def test_pages_are_filtered_and_limited():
+    session = _graph()
+    auradb = FakeAuraDB(session)
+
+    graph = auradb.get_knowledge_graph(labels=["Persoon"])
+    assert len(graph["nodes"]) == 8
+    assert [(rel.source.id, rel.target.id) for rel in graph["relationships"]] == [
+        ("walter", "person_0")
+    ]
+
+    graph = auradb.get_knowledge_graph(relationship_types=["kent"], max_nodes=100)
+    assert [rel.type for rel in graph["relationships"]] == ["kent"]
+
+    objs = list(auradb.iter_knowledge_graph(max_nodes=2, max_relationships=1))
+    assert [obj.id for obj in objs[:2]] == ["person_0", "person_1"]
+    assert len(objs) == 3
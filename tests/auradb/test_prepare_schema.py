@@ -0,0 +1,98 @@
+import pytest
+import warnings
+from contextlib import nullcontext
+from types import SimpleNamespace
+
+warnings.filterwarnings("ignore", category=DeprecationWarning)
+from neo4j.exceptions import Neo4jError
+from langchain_community.graphs.graph_document import Node, Relationship
+from src.modules.auradb.auradb import AuraDB
+
+
+class FakeSession:
+    """Runs the schema queries, raises the error of a label and counts what was created."""
+
+    def __init__(self, errors: dict = None, existing: set = ()):
+        self.errors = errors or {}
+        self.existing = set(existing)
+        self.queries = []
+
+    def run(self, query: str):
+        self.queries.append(query)
+        label = query.split("`")[1] if "`" in query else None
+        added = {"constraints_added": 0, "indexes_added": 0}
+        if query.startswith("CREATE CONSTRAINT"):
+            if label in self.errors:
+                raise Neo4jError.hydrate(code=self.errors[label], message="failed")
+            added["constraints_added"] = int(label not in self.existing)
+        elif query.startswith("CREATE INDEX"):
+            added["indexes_added"] = int(label not in self.existing)
+        summary = SimpleNamespace(counters=SimpleNamespace(**added))
+        return SimpleNamespace(consume=lambda: summary)
+
+
+class FakeAuraDB(AuraDB):
+    def __init__(self):
+        pass
+
+
+def _awaited(session: FakeSession) -> bool:
+    return "CALL db.awaitIndexes(300)" in session.queries
+
+
+def test_falls_back_to_index():
+    session = FakeSession(
+        errors={"Person": "Neo.DatabaseError.Schema.ConstraintCreationFailed"}
+    )
+
+    result = FakeAuraDB()._prepare_schema(session, ["Person", "City"])
+
+    assert result == {"City": "constraint", "Person": "index"}
+    assert _awaited(session)
+
+
+def test_other_errors_are_raised():
+    session = FakeSession(errors={"Person": "Neo.ClientError.Security.Forbidden"})
+
+    with pytest.raises(Neo4jError):
+        FakeAuraDB()._prepare_schema(session, ["Person"])
+
+
+def test_existing_schema_is_not_awaited():
+    session = FakeSession(existing={"Person", "City"})
+
+    result = FakeAuraDB()._prepare_schema(session, ["Person", "City"])
+
+    assert result == {"City": "constraint", "Person": "constraint"}
+    assert not _awaited(session)
+
+
+class RecordingSession:
+    """Records the queries of execute_write."""
+
+    def __init__(self):
+        self.queries = []
+
+    def execute_write(self, write_function, obj):
+        def run(query, **params):
+            self.queries.append(query)
+            return SimpleNamespace(single=lambda: None)
+
+        return write_function(SimpleNamespace(run=run), obj)
+
+
+def test_import_list_escapes_relationship_types():
+    session = RecordingSession()
+    auradb = FakeAuraDB()
+    auradb._session = lambda: nullcontext(session)
+    walter = Node(id="walter", type="Persoon")
+    bob = Node(id="bob", type="Persoon")
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        auradb.import_list(
+            [Relationship(source=walter, target=bob, type="werkt met`] DELETE a //")],
+            prepare_schema=False,
+        )
+
+    assert "MERGE (a)-[r:`werkt met``] DELETE a //`]->(b)" in session.queries[0]
@@ -0,0 +1,66 @@
+import pytest
+from src.modules.auradb.schema_cache import SchemaCache
+
+KEY = ("neo4j://localhost:7687", "neo4j")
+
+
+class CountingGraph:
+    """Stands in for a Neo4jGraph and counts the schema introspections."""
+
+    def __init__(self):
+        self.refreshes = 0
+        self.schema = ""
+        self.structured_schema = {}
+
+    def refresh_schema(self):
+        self.refreshes += 1
+        self.schema = f"schema {self.refreshes}"
+        self.structured_schema = {"relationships": [], "version": self.refreshes}
+
+
+@pytest.fixture(autouse=True)
+def fixture_clear_cache():
+    SchemaCache.invalidate()
+    yield
+    SchemaCache.invalidate()
+
+
+def test_schema_is_reused():
+    first, second = CountingGraph(), CountingGraph()
+
+    assert SchemaCache.apply(first, KEY) is False
+    assert SchemaCache.apply(second, KEY) is True
+
+    assert first.refreshes == 1
+    assert second.refreshes == 0
+    assert second.schema == "schema 1"
+    assert second.structured_schema == first.structured_schema
+
+
+def test_invalidate():
+    graph = CountingGraph()
+    SchemaCache.apply(graph, KEY)
+    SchemaCache.invalidate(*KEY)
+    SchemaCache.apply(graph, KEY)
+
+    assert graph.refreshes == 2
+    assert graph.schema == "schema 2"
+
+
+def test_ttl(monkeypatch):
+    graph = CountingGraph()
+    SchemaCache.apply(graph, KEY)
+
+    monkeypatch.setattr(SchemaCache, "ttl", 0)
+    SchemaCache.apply(graph, KEY)
+
+    assert graph.refreshes == 2
+
+
+def test_keyed_by_connection():
+    graph = CountingGraph()
+    SchemaCache.apply(graph, KEY)
+    SchemaCache.apply(graph, ("neo4j://localhost:7687", "other"))
+
+    assert graph.refreshes == 2
+    assert SchemaCache.stats()["size"] == 2
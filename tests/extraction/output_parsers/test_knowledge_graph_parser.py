@@ -135,3 +135,37 @@ def test_parsing_node_nam(parser):
     )
     nodes = result["nodes"]
     assert nodes[0].properties["name"] == "Walter Disney"
+
+
+def test_parsing_apostrophes(parser):
+    result = parser.parse(
+        """
+    Nodes: [['Walter', 'Person', {'occupation': 'Disney's cartoonist'}]]
+    Relationships: []"""
+    )
+    assert result["nodes"][0].properties["occupation"] == "Disney's cartoonist"
+
+
+def test_parsing_literals(parser):
+    result = parser.parse(
+        """
+    Nodes: [['Walter', 'Person', {'age': 65, 'active': False, 'partner': None, 'address': {'city': 'Delft'}}]]
+    Relationships: []"""
+    )
+    assert result["nodes"][0].properties == {
+        "age": 65,
+        "active": False,
+        "partner": None,
+        "address": {"city": "Delft"},
+        "name": "Walter",
+    }
+
+
+def test_parsing_json(parser):
+    result = parser.parse(
+        """
+    Nodes: [["Walter", "Person", {"active": true}], ["Bob", "Person", {}]]
+    Relationships: [["Walter", "KNOWS", "Bob", {"since": 2021}]]"""
+    )
+    assert result["nodes"][0].properties == {"active": True, "name": "Walter"}
+    assert result["relationships"][0].properties == {"since": 2021}
@@ -0,0 +1,48 @@
+import os
+import json
+import time
+import warnings
+import pytest
+from src.modules.extraction.output_parsers import KnowledgeGraphParser
+
+DATA_PATH = os.path.join(os.path.dirname(__file__), "data", "model_outputs.jsonl")
+
+with open(DATA_PATH, encoding="utf-8") as file:
+    MODEL_OUTPUTS = [json.loads(line) for line in file]
+
+# The seconds parsing one output may take, a retry costs an LLM call of seconds.
+PARSE_BUDGET = 0.001
+
+# Timings depend on the machine, run the benchmarks with BENCHMARK=1.
+benchmark = pytest.mark.skipif(
+    os.getenv("BENCHMARK") != "1", reason="Set BENCHMARK=1 to run the benchmarks."
+)
+
+
+@pytest.mark.parametrize("recorded", MODEL_OUTPUTS)
+def test_model_output(recorded):
+    """Every recorded output parses without a retry through the fixing LLM."""
+    with warnings.catch_warnings():
+        # Lost properties or relationships are warnings, fail on them.
+        warnings.simplefilter("error", UserWarning)
+        result = KnowledgeGraphParser().parse(recorded["output"])
+
+    assert len(result["nodes"]) == recorded["nodes"]
+    assert len(result["relationships"]) == recorded["relationships"]
+
+
+@benchmark
+def test_parse_time():
+    """Parsing stays far below the cost of a retry through the fixing LLM."""
+    parser = KnowledgeGraphParser()
+    rounds = 100
+
+    timings = []
+    for _ in range(3):
+        start = time.perf_counter()
+        for _ in range(rounds):
+            for recorded in MODEL_OUTPUTS:
+                parser.parse(recorded["output"])
+        timings.append((time.perf_counter() - start) / (rounds * len(MODEL_OUTPUTS)))
+
+    assert min(timings) < PARSE_BUDGET, f"{min(timings) * 1_000_000:.0f} µs per output."
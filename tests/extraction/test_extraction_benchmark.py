@@ -0,0 +1,74 @@
+import os
+import time
+import pytest
+from langchain.output_parsers import OutputFixingParser
+from langchain_core.documents import Document
+from langchain_core.runnables import RunnableLambda
+from src.modules.extraction import FewShotDataExtractor, generate_prompt_with_labels
+from src.modules.extraction.output_parsers import KnowledgeGraphParser
+
+CHUNKS = 500
+LLM_OUTPUT = "Nodes: [['Walter', 'Persoon', {}]]\nRelationships: []"
+
+# Timings depend on the machine, run the benchmarks with BENCHMARK=1.
+benchmark = pytest.mark.skipif(
+    os.getenv("BENCHMARK") != "1", reason="Set BENCHMARK=1 to run the benchmarks."
+)
+
+
+def synthetic_document() -> list:
+    return [
+        Document(page_content=f"Walter werkt sinds {2000 + index % 24} bij UWV.")
+        for index in range(CHUNKS)
+    ]
+
+
+def best_per_chunk(run, chunks: list, repeat: int = 3) -> float:
+    """Returns the fastest of the repeated runs over the chunks, in seconds per chunk."""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for chunk in chunks:
+            run(chunk)
+        timings.append((time.perf_counter() - start) / len(chunks))
+    return min(timings)
+
+
+@benchmark
+def test_per_chunk_overhead():
+    """The prebuilt chain is at least as fast as building the chain for every chunk."""
+    llm = RunnableLambda(lambda prompt: LLM_OUTPUT)
+    extractor = FewShotDataExtractor(llm)
+    chunks = synthetic_document()
+
+    def rebuilt(chunk: Document) -> dict:
+        return (
+            extractor._extraction_prompt
+            | llm
+            | OutputFixingParser.from_llm(parser=KnowledgeGraphParser(), llm=llm)
+        ).invoke({"input": generate_prompt_with_labels(chunk.page_content, [])})
+
+    prebuilt_seconds = best_per_chunk(
+        lambda chunk: extractor._process_with_labels(chunk, []), chunks
+    )
+    rebuilt_seconds = best_per_chunk(rebuilt, chunks)
+
+    assert prebuilt_seconds <= rebuilt_seconds, (
+        f"{prebuilt_seconds * 1000:.3f} ms per chunk with the prebuilt chain, "
+        f"{rebuilt_seconds * 1000:.3f} ms when building the chain per chunk."
+    )
+
+
+def test_prompt_tokens_are_counted_once():
+    class CountingLLM(RunnableLambda):
+        calls: int = 0
+
+        def get_num_tokens_from_messages(self, messages) -> int:
+            CountingLLM.calls += 1
+            return 1000
+
+    extractor = FewShotDataExtractor(CountingLLM(lambda prompt: LLM_OUTPUT))
+
+    assert extractor._prompt_tokens() == 1000
+    assert extractor._prompt_tokens() == 1000
+    assert CountingLLM.calls == 1
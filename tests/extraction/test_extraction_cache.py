@@ -0,0 +1,64 @@
+from langchain_core.documents import Document
+from langchain_core.prompt_values import ChatPromptValue
+from langchain_core.runnables import RunnableLambda
+from langchain_community.graphs.graph_document import Node, Relationship
+from src.uwv_toolkit.db import Database, SqliteCache
+from src.modules.extraction import FewShotDataExtractor, ExtractionCache
+
+
+def create_cache(max_entries: int = 100) -> ExtractionCache:
+    return ExtractionCache(
+        SqliteCache(Database(":memory:"), "extraction_cache", max_entries=max_entries)
+    )
+
+
+def test_key_covers_the_settings():
+    key = ExtractionCache.key("tekst", "prompt", ["B", "A"], "gpt-4", 0.0)
+
+    assert key == ExtractionCache.key("tekst", "prompt", ["A", "B"], "gpt-4", 0.0)
+    assert key != ExtractionCache.key("tekst 2", "prompt", ["A", "B"], "gpt-4", 0.0)
+    assert key != ExtractionCache.key("tekst", "prompt 2", ["A", "B"], "gpt-4", 0.0)
+    assert key != ExtractionCache.key("tekst", "prompt", ["A"], "gpt-4", 0.0)
+    assert key != ExtractionCache.key("tekst", "prompt", ["A", "B"], "gpt-35", 0.0)
+    assert key != ExtractionCache.key("tekst", "prompt", ["A", "B"], "gpt-4", 0.5)
+
+
+def test_output_round_trip():
+    cache = create_cache()
+    walter = Node(id="walter", type="Persoon", properties={"name": "Walter"})
+    bob = Node(id="bob", type="Persoon", properties={"name": "Bob"})
+    output = {
+        "nodes": [walter, bob],
+        "relationships": [
+            Relationship(source=walter, target=bob, type="kent", properties={})
+        ],
+    }
+
+    cache.set("key", output)
+    cached = cache.get("key")
+
+    assert cached == output
+    assert cache.get("other") is None
+    assert cache.stats() == {"size": 1, "hits": 1, "misses": 1}
+
+
+def test_extractor_reuses_cached_chunks():
+    calls = []
+
+    def fake_llm(prompt: ChatPromptValue) -> str:
+        calls.append(prompt)
+        chunk = prompt.messages[-1].content.split("Data: ")[1].split("\n")[0]
+        return f"Nodes: [['{chunk}', 'Persoon', {{}}]]\nRelationships: []"
+
+    cache = create_cache()
+    extractor = FewShotDataExtractor(RunnableLambda(fake_llm), cache=cache)
+    chunks = [Document(page_content=content) for content in "abc"]
+
+    first = extractor._run_chunked_data(chunks)
+    second = extractor._run_chunked_data(chunks)
+
+    assert len(calls) == 3
+    assert [document.nodes for document in second] == [
+        document.nodes for document in first
+    ]
+    assert cache.stats() == {"size": 3, "hits": 3, "misses": 3}
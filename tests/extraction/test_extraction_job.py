@@ -0,0 +1,149 @@
+import pytest
+import threading
+from langchain_core.documents import Document
+from langchain_core.prompt_values import ChatPromptValue
+from langchain_core.runnables import RunnableLambda
+from src.modules.extraction import (
+    FewShotDataExtractor,
+    ExtractionJob,
+    ExtractionCache,
+)
+from uwv_toolkit.db import Database, SqliteCache
+
+
+class FlakyLLM:
+    """Extracts one node per chunk and fails the first time it sees the chunk "c"."""
+
+    def __init__(self):
+        self.chunks = []
+        self.failed = False
+        self.lock = threading.Lock()
+
+    def __call__(self, prompt: ChatPromptValue) -> str:
+        chunk = prompt.messages[-1].content.split("Data: ")[1].split("\n")[0]
+        with self.lock:
+            self.chunks.append(chunk)
+            if chunk == "c" and not self.failed:
+                self.failed = True
+                raise RuntimeError("Rate limit")
+        return f"Nodes: [['{chunk}', 'Persoon', {{}}]]\nRelationships: []"
+
+
+@pytest.mark.parametrize("max_workers", [1, 3])
+def test_resume_failed_job(tmp_path, max_workers):
+    llm = FlakyLLM()
+    extractor = FewShotDataExtractor(
+        RunnableLambda(llm), max_workers=max_workers, reconcile_with_llm=False
+    )
+    chunks = [Document(page_content=content) for content in "abcd"]
+
+    job = ExtractionJob.create(
+        chunks, {"temperature": 0}, "walter", directory=str(tmp_path)
+    )
+    assert job.status()["status"] == ExtractionJob.PENDING
+
+    assert job.start(extractor)
+    job.wait()
+
+    state = job.status()
+    assert state["status"] == ExtractionJob.FAILED
+    assert state["error"] == "Rate limit"
+    finished = [document.nodes[0].id for document in job.result()]
+    assert "c" not in finished and len(finished) == state["done"]
+
+    # Creating the same extraction again returns the stored job, which resumes.
+    job = ExtractionJob.create(
+        chunks, {"temperature": 0}, "walter", directory=str(tmp_path)
+    )
+    llm.chunks.clear()
+    assert job.start(extractor)
+    job.wait()
+
+    assert job.status()["status"] == ExtractionJob.DONE
+    assert [document.nodes[0].id for document in job.result()] == list("abcd")
+    assert sorted(llm.chunks) == sorted(set("abcd") - set(finished))
+    # A finished job isn't started again.
+    assert not job.start(extractor)
+
+
+def test_list_jobs(tmp_path):
+    chunks = [Document(page_content="a")]
+    ExtractionJob.create(chunks, {"temperature": 0}, "walter", directory=str(tmp_path))
+    ExtractionJob.create(chunks, {"temperature": 1}, "bob", directory=str(tmp_path))
+
+    jobs = ExtractionJob.list_jobs(username="walter", directory=str(tmp_path))
+
+    assert len(jobs) == 1
+    assert jobs[0]["settings"] == {"temperature": 0}
+    assert jobs[0]["total"] == 1 and jobs[0]["done"] == 0
+    assert len(ExtractionJob.list_jobs(directory=str(tmp_path))) == 2
+
+
+def test_jobs_are_per_user(tmp_path):
+    chunks = [Document(page_content="a")]
+    walter = ExtractionJob.create(
+        chunks, {"temperature": 0}, "walter", directory=str(tmp_path)
+    )
+    bob = ExtractionJob.create(
+        chunks, {"temperature": 0}, "bob", directory=str(tmp_path)
+    )
+
+    assert walter.job_id != bob.job_id
+    jobs = ExtractionJob.list_jobs(username="bob", directory=str(tmp_path))
+    assert [job["job_id"] for job in jobs] == [bob.job_id]
+
+
+def test_cache_hits_per_job(tmp_path):
+    cache = ExtractionCache(
+        SqliteCache(Database(str(tmp_path / "cache.db")), "extraction_cache")
+    )
+    chunks = [Document(page_content=content) for content in "ab"]
+
+    def extractor() -> FewShotDataExtractor:
+        return FewShotDataExtractor(
+            RunnableLambda(FlakyLLM()), cache=cache, reconcile_with_llm=False
+        )
+
+    first = ExtractionJob.create(
+        chunks, {"temperature": 0}, "walter", directory=str(tmp_path)
+    )
+    first.run(extractor())
+    second = ExtractionJob.create(
+        chunks, {"temperature": 0}, "bob", directory=str(tmp_path)
+    )
+    second.run(extractor())
+
+    assert first.status()["cache_hits"] == 0
+    assert second.status()["cache_hits"] == 2
+
+
+def test_job_is_stored_as_json(tmp_path):
+    def llm(prompt: ChatPromptValue) -> str:
+        chunk = prompt.messages[-1].content.split("Data: ")[1].split("\n")[0]
+        return (
+            f"Nodes: [['{chunk}', 'Persoon', {{'leeftijd': 30}}], ['uwv', 'Organisatie', {{}}]]\n"
+            f"Relationships: [['{chunk}', 'WERKT_BIJ', 'uwv', {{'sinds': 2019}}]]"
+        )
+
+    extractor = FewShotDataExtractor(RunnableLambda(llm), reconcile_with_llm=False)
+    chunks = [
+        Document(page_content=content, metadata={"source": "test.pdf", "page": 1})
+        for content in "ab"
+    ]
+    job = ExtractionJob.create(
+        chunks, {"temperature": 0}, "walter", directory=str(tmp_path)
+    )
+    expected = job.run(extractor)
+
+    files = sorted(path.name for path in (tmp_path / job.job_id).rglob("*.*"))
+    assert files == [
+        "00000.json",
+        "00001.json",
+        "input.json",
+        "result.json",
+        "state.json",
+    ]
+    assert job.chunks() == chunks
+    assert job.result() == expected
+    assert job.completed()[1] == expected[1]
+    assert job.result()[0].relationships[0].properties == {"sinds": 2019}
@@ -0,0 +1,144 @@
+import json
+import threading
+from langchain_core.documents import Document
+from langchain_core.prompt_values import ChatPromptValue
+from langchain_core.runnables import RunnableLambda
+from langchain_community.graphs.graph_document import GraphDocument, Node, Relationship
+from src.modules.extraction import FewShotDataExtractor
+from src.modules.extraction.label_reconciliation import (
+    apply_label_mapping,
+    label_agreement,
+    llm_label_mapping,
+    local_label_mapping,
+)
+
+
+def graph_document(*types: str) -> GraphDocument:
+    nodes = [Node(id=f"{type}_{index}", type=type) for index, type in enumerate(types)]
+    relationships = [
+        Relationship(
+            source=Node(id=nodes[0].id, type=nodes[0].type),
+            target=Node(id=nodes[-1].id, type=nodes[-1].type),
+            type="relatie",
+        )
+    ]
+    return GraphDocument(
+        nodes=nodes, relationships=relationships, source=Document(page_content="")
+    )
+
+
+def test_local_label_mapping():
+    documents = [
+        graph_document("Persoon", "Regel"),
+        graph_document("persoon", "Regels"),
+        graph_document("Persoon", "Wet"),
+    ]
+
+    mapping = local_label_mapping(documents)
+    assert mapping == {
+        "Persoon": "Persoon",
+        "persoon": "Persoon",
+        "Regel": "Regel",
+        "Regels": "Regel",
+        "Wet": "Wet",
+    }
+
+    apply_label_mapping(documents, mapping)
+    assert documents[1].nodes[0].type == "Persoon"
+    assert documents[1].relationships[0].target.type == "Regel"
+
+
+def test_llm_label_mapping_is_collapsed():
+    # A chain, a cycle and a label that doesn't exist.
+    mapping = {
+        "Instantie": "Organisatie",
+        "Organisatie": "Bedrijf",
+        "Regel": "Wet",
+        "Wet": "Regel",
+        "Persoon": "Mens",
+    }
+    llm = RunnableLambda(lambda prompt: json.dumps(mapping))
+    labels = ["Bedrijf", "Instantie", "Organisatie", "Persoon", "Regel", "Wet"]
+
+    assert llm_label_mapping(llm, labels) == {
+        "Bedrijf": "Bedrijf",
+        "Instantie": "Bedrijf",
+        "Organisatie": "Bedrijf",
+        "Persoon": "Persoon",
+        "Regel": "Regel",
+        "Wet": "Regel",
+    }
+
+
+def test_label_agreement():
+    documents = [
+        graph_document("Persoon", "Wet"),
+        graph_document("Persoon", "Wet"),
+        graph_document("Persoon", "Ding", "Zaak", "Iets"),
+    ]
+
+    assert label_agreement(documents) == [1.0, 1.0, 0.25]
+
+
+def test_parallel_extraction():
+    """Chunk "b" uses a synonym, which the label reconciliation merges."""
+    calls = []
+    lock = threading.Lock()
+
+    def fake_llm(prompt: ChatPromptValue) -> str:
+        text = prompt.messages[-1].content
+        with lock:
+            calls.append(text)
+        if text.startswith("Labels:"):
+            labels = json.loads(text[len("Labels:") :])
+            return json.dumps(
+                {label: "Persoon" if label == "Mens" else label for label in labels}
+            )
+
+        chunk = text.split("Data: ")[1].split("\n")[0]
+        label = "Mens" if chunk == "b" else "Persoon"
+        return f"Nodes: [['{chunk}', '{label}', {{}}]]\nRelationships: []"
+
+    extractor = FewShotDataExtractor(RunnableLambda(fake_llm), max_workers=3)
+    chunks = [Document(page_content=content) for content in "abcd"]
+
+    result = extractor._run_chunked_data(chunks)
+
+    assert [document.nodes[0].id for document in result] == ["a", "b", "c", "d"]
+    assert {node.type for document in result for node in document.nodes} == {"Persoon"}
+    # One call per chunk and one to reconcile the labels.
+    assert len(calls) == 5
+    # The other chunks got the labels of the first chunk.
+    assert all("Types: ['Persoon']" in call for call in calls[1:4])
+
+
+def test_rerun_labels_are_reconciled():
+    """The rerun of chunk "c" uses a synonym, which is merged like the first run."""
+    calls = []
+    lock = threading.Lock()
+
+    def fake_llm(prompt: ChatPromptValue) -> str:
+        text = prompt.messages[-1].content
+        if text.startswith("Labels:"):
+            labels = json.loads(text[len("Labels:") :])
+            return json.dumps(
+                {label: "Persoon" if label == "Mens" else label for label in labels}
+            )
+
+        chunk = text.split("Data: ")[1].split("\n")[0]
+        with lock:
+            calls.append(chunk)
+        label = "Persoon"
+        if chunk == "c":
+            label = "Ding" if calls.count("c") == 1 else "Mens"
+        return f"Nodes: [['{chunk}', '{label}', {{}}]]\nRelationships: []"
+
+    extractor = FewShotDataExtractor(
+        RunnableLambda(fake_llm), max_workers=3, rerun_agreement_threshold=0.5
+    )
+    chunks = [Document(page_content=content) for content in "abc"]
+
+    result = extractor._run_chunked_data(chunks)
+
+    assert calls.count("c") == 2
+    assert [document.nodes[0].type for document in result] == ["Persoon"] * 3
@@ -0,0 +1,102 @@
+from typing import List
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from uwv_toolkit.langchain import CachedChroma
+
+
+class CountingEmbeddings(Embeddings):
+    """Embeds texts by their length and counts the embedded texts."""
+
+    def __init__(self, model: str = "length-v1"):
+        self.model = model
+        self.embedded = 0
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        self.embedded += len(texts)
+        return [[float(len(text)), 1.0] for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return [float(len(text)), 1.0]
+
+
+def load(path: str) -> List[Document]:
+    with open(path) as file:
+        return [Document(page_content=file.read(), metadata={"source": path})]
+
+
+def split(docs: List[Document]) -> List[Document]:
+    return [
+        Document(page_content=paragraph, metadata=dict(doc.metadata))
+        for doc in docs
+        for paragraph in doc.page_content.split("\n\n")
+    ]
+
+
+def test_index_documents_incrementally(tmp_path):
+    first, second = tmp_path / "first.txt", tmp_path / "second.txt"
+    first.write_text("Alinea een.\n\nAlinea twee.\n\nAlinea drie.")
+    second.write_text("Andere alinea.")
+    paths = [str(first), str(second)]
+
+    embeddings = CountingEmbeddings()
+    vectordb = CachedChroma(
+        collection_name="test_incremental",
+        embedding_function=embeddings,
+        persist_directory=str(tmp_path / "chroma"),
+    )
+
+    stats = vectordb.index_documents(paths, load, split)
+    assert stats == {"unchanged_files": 0, "added": 4, "deleted": 0, "unchanged": 0}
+    assert embeddings.embedded == 4
+
+    # Nothing changed, nothing is loaded or embedded.
+    stats = vectordb.index_documents(paths, load, split)
+    assert stats == {"unchanged_files": 2, "added": 0, "deleted": 0, "unchanged": 4}
+    assert embeddings.embedded == 4
+
+    # Editing the first paragraph only embeds that paragraph.
+    first.write_text("Alinea een, aangepast.\n\nAlinea twee.\n\nAlinea drie.")
+    stats = vectordb.index_documents(paths, load, split)
+    assert stats == {"unchanged_files": 1, "added": 1, "deleted": 1, "unchanged": 3}
+    assert embeddings.embedded == 5
+
+    # The unchanged paragraphs got the new file hash.
+    stats = vectordb.index_documents(paths, load, split)
+    assert stats["unchanged_files"] == 2
+
+    # A removed file's chunks are deleted.
+    stats = vectordb.index_documents([str(first)], load, split)
+    assert stats["deleted"] == 1
+    assert len(vectordb.get()["ids"]) == 3
+
+    # Another embedding model embeds everything again.
+    vectordb._embedding_function = CountingEmbeddings(model="length-v2")
+    stats = vectordb.index_documents([str(first)], load, split)
+    assert stats["added"] == 3
+    assert vectordb._embedding_function.embedded == 3
+
+
+def test_index_documents_reuses_persisted_collection(tmp_path):
+    path = tmp_path / "first.txt"
+    path.write_text("Alinea een.\n\nAlinea twee.")
+    persist_dir = str(tmp_path / "chroma")
+
+    vectordb = CachedChroma(
+        collection_name="test_cold_start",
+        embedding_function=CountingEmbeddings(),
+        persist_directory=persist_dir,
+    )
+    vectordb.index_documents([str(path)], load, split)
+    assert vectordb.cache_stats["loaded_from_cache"] is False
+    assert vectordb.cache_stats["build_seconds"] > 0
+
+    # A cold start, as in BaseVector.setup(), reuses the persisted collection.
+    embeddings = CountingEmbeddings()
+    vectordb = CachedChroma(
+        collection_name="test_cold_start",
+        embedding_function=embeddings,
+        persist_directory=persist_dir,
+    )
+    vectordb.index_documents([str(path)], load, split)
+    assert vectordb.cache_stats["loaded_from_cache"] is True
+    assert embeddings.embedded == 0
@@ -0,0 +1,87 @@
+from langchain_community.llms.fake import FakeListLLM
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
+from uwv_toolkit.langchain import ChatHistoryWindow
+
+
+def count_words(text: str) -> int:
+    return len(text.split())
+
+
+def conversation(turns: int) -> list:
+    messages = []
+    for turn in range(turns):
+        messages.append(HumanMessage(content=f"Vraag {turn} over Walter en Bob?"))
+        messages.append(AIMessage(content=f"Antwoord {turn}: " + "bla " * 20))
+    return messages
+
+
+def test_short_history_is_kept():
+    window = ChatHistoryWindow(
+        max_tokens=1000, max_messages=10, length_function=count_words
+    )
+    messages = conversation(2)
+    state = {}
+
+    assert window.build(messages, state) == messages
+    window.update(messages, state)
+    assert state == {"summary": "", "summarised": 0}
+
+
+def test_history_stays_within_budget():
+    window = ChatHistoryWindow(
+        max_tokens=100, max_messages=10, length_function=count_words
+    )
+    messages = conversation(10)
+
+    history = window.build(messages, {})
+
+    assert history == messages[-len(history) :]
+    assert 0 < len(history) < len(messages)
+    assert sum(window.count_tokens(message) for message in history) <= 100
+
+
+def test_older_messages_are_summarised_incrementally():
+    llm = FakeListLLM(responses=["Samenvatting 1", "Samenvatting 2"])
+    window = ChatHistoryWindow(
+        llm=llm, max_tokens=1000, max_messages=2, length_function=count_words
+    )
+    messages = conversation(2)
+    state = {}
+
+    window.update(messages, state)
+    history = window.build(messages, state)
+    assert history[0] == SystemMessage(
+        content=ChatHistoryWindow.SUMMARY_PREFIX + "Samenvatting 1"
+    )
+    assert history[1:] == messages[-2:]
+    assert state["summarised"] == 2
+
+    # Only the newly dropped messages are summarised.
+    messages += conversation(1)
+    window.update(messages, state)
+    history = window.build(messages, state)
+    assert history[0].content.endswith("Samenvatting 2")
+    assert history[1:] == messages[-2:]
+    assert state["summarised"] == 4
+    assert llm.i == 0  # Both responses were used.
+
+    # A cleared chat starts without a summary.
+    assert window.build(conversation(1), state) == conversation(1)
+
+
+def test_build_does_not_call_the_llm():
+    # Without the LLM cache, so every call reaches the fake LLM.
+    llm = FakeListLLM(responses=["Samenvatting 1", "Samenvatting 2"], cache=False)
+    window = ChatHistoryWindow(
+        llm=llm, max_tokens=1000, max_messages=2, length_function=count_words
+    )
+    messages = conversation(2)
+    state = {}
+
+    # Before update() the dropped messages are left out without a summary.
+    assert window.build(messages, state) == messages[-2:]
+    assert state == {}
+    assert llm.i == 0
+
+    window.update(messages, state)
+    assert llm.i == 1
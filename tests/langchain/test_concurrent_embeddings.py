@@ -0,0 +1,95 @@
+import threading
+from typing import List
+from langchain.embeddings import CacheBackedEmbeddings
+from langchain.storage import InMemoryByteStore
+from langchain_core.embeddings import Embeddings
+from uwv_toolkit.langchain import ConcurrentEmbeddings
+
+
+def count_words(text: str) -> int:
+    return len(text.split())
+
+
+class RateLimitError(Exception):
+    status_code = 429
+
+    class response:
+        headers = {"retry-after-ms": "10"}
+
+
+class FlakyEmbeddings(Embeddings):
+    """Rate limits every first request of a batch and records the batches."""
+
+    def __init__(self):
+        self.batches = []
+        self.limited = set()
+        self._lock = threading.Lock()
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        with self._lock:
+            if texts[0] not in self.limited:
+                self.limited.add(texts[0])
+                raise RateLimitError()
+            self.batches.append(texts)
+        return [[float(len(text))] for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return [float(len(text))]
+
+
+def test_batches_within_limits():
+    embeddings = ConcurrentEmbeddings(
+        FlakyEmbeddings(),
+        max_batch_tokens=4,
+        max_batch_size=3,
+        length_function=count_words,
+    )
+    texts = ["een", "twee woorden", "drie losse woorden", "a", "b", "c", "d"]
+
+    assert embeddings.batches(texts) == [[0, 1], [2, 3], [4, 5, 6]]
+
+
+def test_embed_documents_in_order_after_rate_limits():
+    underlying = FlakyEmbeddings()
+    embeddings = ConcurrentEmbeddings(
+        underlying, max_batch_size=2, max_workers=3, length_function=count_words
+    )
+    texts = [f"tekst {'x' * index}" for index in range(7)]
+
+    assert embeddings.embed_documents(texts) == [[float(len(text))] for text in texts]
+    assert len(underlying.batches) == 4
+    assert len(underlying.limited) == 4
+
+
+def test_feeds_cache_backed_embeddings():
+    underlying = FlakyEmbeddings()
+    store = InMemoryByteStore()
+    embeddings = CacheBackedEmbeddings.from_bytes_store(
+        ConcurrentEmbeddings(underlying, max_batch_size=2, length_function=count_words),
+        store,
+        namespace="test",
+    )
+
+    embeddings.embed_documents(["a", "b", "c"])
+    embeddings.embed_documents(["a", "b", "c", "d"])
+
+    # Only the missing text was embedded the second time, batches finish in any order.
+    assert sorted(text for batch in underlying.batches for text in batch) == [
+        "a",
+        "b",
+        "c",
+        "d",
+    ]
+
+
+def test_retries_transient_errors_only():
+    class ServerError(Exception):
+        status_code = 503
+
+    class BadRequestError(Exception):
+        status_code = 400
+
+    assert ConcurrentEmbeddings._retry_after(RateLimitError()) == 0.01
+    assert ConcurrentEmbeddings._retry_after(ServerError()) == 0.0
+    assert ConcurrentEmbeddings._retry_after(BadRequestError()) is None
+    assert ConcurrentEmbeddings._retry_after(ValueError()) is None
@@ -0,0 +1,60 @@
+from concurrent.futures import ThreadPoolExecutor
+from langchain_community.llms.fake import FakeListLLM
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.prompts import PromptTemplate
+from uwv_toolkit.langchain import TraceCallbackHandler
+
+
+def _chain(answer: str):
+    prompt = PromptTemplate.from_template("What is a good name for {product}?")
+    return prompt | FakeListLLM(responses=[answer], cache=False) | StrOutputParser()
+
+
+def test_trace_events():
+    tracer = TraceCallbackHandler()
+    _chain("Socks & Co").invoke(
+        {"product": "colorful socks"}, config={"callbacks": [tracer]}
+    )
+
+    llm_events = [event for event in tracer.events if event["type"] == "llm"]
+    assert len(llm_events) == 1
+    assert llm_events[0]["prompt"] == ["What is a good name for colorful socks?"]
+    assert llm_events[0]["output"] == ["Socks & Co"]
+    assert all(event["latency"] is not None for event in tracer.events)
+
+    steps = tracer.steps()
+    assert steps[0]["type"] == "chain"
+    assert [step["type"] for step in steps].count("llm") == 1
+
+    text = tracer.to_text()
+    assert "PROMPT:\nWhat is a good name for colorful socks?" in text
+    assert "OUTPUT:\nSocks & Co" in text
+
+
+def test_traces_are_scoped_per_invocation():
+    def ask(product: str) -> TraceCallbackHandler:
+        tracer = TraceCallbackHandler()
+        _chain(f"{product} Inc").invoke(
+            {"product": product}, config={"callbacks": [tracer]}
+        )
+        return tracer
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        tracers = list(executor.map(ask, [f"product {i}" for i in range(8)]))
+
+    for i, tracer in enumerate(tracers):
+        assert f"product {i} Inc" in tracer.to_text()
+        assert f"product {i + 1} Inc" not in tracer.to_text()
+
+
+def test_error_is_recorded():
+    tracer = TraceCallbackHandler()
+    prompt = PromptTemplate.from_template("{missing}")
+
+    try:
+        prompt.invoke({}, config={"callbacks": [tracer]})
+    except KeyError:
+        pass
+
+    assert "error" in tracer.events[0]
+    assert "ERROR" in tracer.to_text()
@@ -0,0 +1,145 @@
+import os
+import pytest
+from contextlib import contextmanager
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
+from langchain_community.graphs.graph_document import Node
+from langchain_community.llms.fake import FakeListLLM
+from modules.auradb import DriverRegistry, SchemaCache, SharedNeo4jGraph
+from modules.smz import ChainRegistry
+from modules.smz import chain_registry
+
+CONNECTION_KEY = (os.getenv("NEO4J_CONNECTION_URI"), os.getenv("NEO4J_USER"))
+PASSWORD = os.getenv("NEO4J_PASSWORD")
+
+
+@pytest.fixture(autouse=True)
+def fixture_clear_registry():
+    ChainRegistry.clear()
+    SchemaCache.invalidate()
+    yield
+    ChainRegistry.clear()
+
+
+def test_chain_is_reused(neo4j_graph):
+    first = ChainRegistry.get_graph_qa_chain(
+        neo4j_graph, CONNECTION_KEY, PASSWORD, {"temperature": 0}
+    )
+    second = ChainRegistry.get_graph_qa_chain(
+        neo4j_graph, CONNECTION_KEY, PASSWORD, {"temperature": 0}
+    )
+    other = ChainRegistry.get_graph_qa_chain(
+        neo4j_graph, CONNECTION_KEY, PASSWORD, {"temperature": 0.5}
+    )
+
+    assert first is second
+    assert first is not other
+    assert ChainRegistry.size() == 2
+
+
+def test_chain_is_rebuilt_after_schema_change(neo4j_graph, auradb):
+    auradb.cleanup()
+    SchemaCache.invalidate()
+    first = ChainRegistry.get_graph_qa_chain(neo4j_graph, CONNECTION_KEY, PASSWORD)
+
+    auradb.bulk_import_list([Node(id="walter", type="Person")])
+    SchemaCache.invalidate(*CONNECTION_KEY)
+    second = ChainRegistry.get_graph_qa_chain(neo4j_graph, CONNECTION_KEY, PASSWORD)
+
+    assert first is not second
+    assert "Person" in second.schema
+
+
+def test_concurrent_asks(walterbob_graph, neo4j_graph):
+    chain = ChainRegistry.get_graph_qa_chain(
+        neo4j_graph, CONNECTION_KEY, PASSWORD, {"temperature": 0}
+    )
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        answers = list(
+            executor.map(
+                lambda question: chain.ask(question=question, chat_history=[]),
+                ["Who is Walter?", "Who is Bob?"],
+            )
+        )
+
+    assert "Walter" in answers[0]["response"]
+    assert "Bob" in answers[1]["response"]
+    assert all(answer["debug"] for answer in answers)
+
+
+class FakeDriver:
+    """Records the queries and returns a row with Walter."""
+
+    def __init__(self):
+        self.queries = []
+
+    @contextmanager
+    def session(self, **kwargs):
+        yield self
+
+    def run(self, query, params=None):
+        self.queries.append(str(query.text))
+        return [SimpleNamespace(data=lambda: {"name": "Walter"})]
+
+
+class CallerGraph:
+    """The graph of a session, only its schema may be used."""
+
+    schema = ""
+    structured_schema = {}
+
+    def refresh_schema(self):
+        self.schema = "Node properties:\nPerson {name: STRING}"
+        self.structured_schema = {
+            "node_props": {},
+            "rel_props": {},
+            "relationships": [],
+        }
+
+    def query(self, query, params={}):
+        raise AssertionError("The chain queried the graph of a session.")
+
+
+def test_chain_queries_the_registry_driver(monkeypatch):
+    drivers = {}
+
+    def get_driver(uri, user, password):
+        return drivers.setdefault((uri, user, password), FakeDriver())
+
+    monkeypatch.setattr(DriverRegistry, "get_driver", get_driver)
+    monkeypatch.setattr(
+        chain_registry,
+        "azure_llm",
+        lambda **kwargs: FakeListLLM(
+            responses=["MATCH (p:Person) RETURN p.name AS name", "Walter."],
+            cache=False,
+        ),
+    )
+    key = ("neo4j://localhost:7687", "neo4j")
+
+    first = ChainRegistry.get_graph_qa_chain(
+        CallerGraph(), key, "secret", cache_cypher=False
+    )
+    second = ChainRegistry.get_graph_qa_chain(
+        CallerGraph(), key, "secret", cache_cypher=False
+    )
+    assert first is second
+    assert isinstance(first._graph, SharedNeo4jGraph)
+
+    # Both callers' questions run on the registry driver of the connection.
+    for chain in (first, second):
+        result = chain.ask(question="Wie is Walter?", chat_history=[])
+        assert result["context"] == [{"name": "Walter"}]
+    assert (
+        drivers[(*key, "secret")].queries
+        == ["MATCH (p:Person) RETURN p.name AS name"] * 2
+    )
+
+    # Other credentials get their own chain and driver.
+    other = ChainRegistry.get_graph_qa_chain(
+        CallerGraph(), key, "changed", cache_cypher=False
+    )
+    assert other is not first
+    other.ask(question="Wie is Walter?", chat_history=[])
+    assert len(drivers[(*key, "changed")].queries) == 1
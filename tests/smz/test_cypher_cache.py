@@ -0,0 +1,50 @@
+import time
+from src.uwv_toolkit.db import Database, SqliteCache
+from src.modules.smz.cypher_cache import CypherCache
+
+SCHEMA = "Node properties: Person {name: STRING}"
+CYPHER = "MATCH (p:Person) RETURN p.name"
+
+
+def create_cache(max_entries: int = 10, ttl: float = None) -> CypherCache:
+    return CypherCache(
+        SqliteCache(
+            Database(":memory:"), "cypher_cache", max_entries=max_entries, ttl=ttl
+        )
+    )
+
+
+def test_normalised_question_hits():
+    cache = create_cache()
+    cache.set("Wie is Walter?", SCHEMA, CYPHER)
+
+    assert cache.get("  wie is   walter ", SCHEMA) == CYPHER
+    assert cache.stats() == {"size": 1, "hits": 1, "misses": 0}
+
+
+def test_schema_change_misses():
+    cache = create_cache()
+    cache.set("Wie is Walter?", SCHEMA, CYPHER)
+
+    assert cache.get("Wie is Walter?", SCHEMA + "\nPlace {name: STRING}") is None
+    assert cache.stats()["misses"] == 1
+
+
+def test_least_recently_used_is_evicted():
+    cache = create_cache(max_entries=2)
+    cache.set("eerste", SCHEMA, "RETURN 1")
+    cache.set("tweede", SCHEMA, "RETURN 2")
+    cache.get("eerste", SCHEMA)
+    cache.set("derde", SCHEMA, "RETURN 3")
+
+    assert cache.get("eerste", SCHEMA) == "RETURN 1"
+    assert cache.get("tweede", SCHEMA) is None
+    assert cache.get("derde", SCHEMA) == "RETURN 3"
+
+
+def test_expired_query_misses():
+    cache = create_cache(ttl=0.01)
+    cache.set("Wie is Walter?", SCHEMA, CYPHER)
+    time.sleep(0.02)
+
+    assert cache.get("Wie is Walter?", SCHEMA) is None
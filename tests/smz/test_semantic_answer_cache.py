@@ -0,0 +1,126 @@
+import pytest
+from typing import List
+from langchain_community.llms.fake import FakeListLLM
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+from src.modules.smz.semantic_answer_cache import SemanticAnswerCache
+from src.modules.smz.smz_doc_chain import SmzDocChain
+
+DOCUMENT = Document(page_content="Walt Disney was een tekenaar.", metadata={})
+
+
+class WordEmbeddings(Embeddings):
+    """Embeds a text as the counts of a few known words."""
+
+    words = ["wie", "is", "disney", "walt", "waar", "woonde"]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self.embed_query(text) for text in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        tokens = text.lower().split()
+        return [float(tokens.count(word)) for word in self.words]
+
+
+class StaticVectorStore(VectorStore):
+    """Returns the same relevant document for every question."""
+
+    @property
+    def embeddings(self):
+        return WordEmbeddings()
+
+    def add_texts(self, texts, metadatas=None, **kwargs):
+        return []
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, **kwargs):
+        return cls()
+
+    def similarity_search(self, query, k=4, **kwargs):
+        return [DOCUMENT]
+
+    def similarity_search_with_relevance_scores(self, query, k=4, **kwargs):
+        return [(DOCUMENT, 0.9)]
+
+
+def test_similar_question_hits():
+    cache = SemanticAnswerCache(WordEmbeddings(), similarity_threshold=0.9)
+    cache.set("Wie is Walt Disney?", "Een tekenaar.", [DOCUMENT])
+
+    hit = cache.lookup("wie is walt disney")
+    assert hit["response"] == "Een tekenaar."
+    assert hit["context"] == [DOCUMENT]
+
+    assert cache.lookup("Waar woonde Disney?") is None
+    assert cache.stats() == {"size": 1, "hits": 1, "misses": 1}
+
+
+@pytest.mark.parametrize(
+    "question, other",
+    [
+        ("Wie is de WIA?", "Wie is de WAO?"),
+        ("Wie is de WIA?", "Wie is de WW?"),
+        ("Wie is Disney in 1950?", "Wie is Disney in 1960?"),
+    ],
+)
+def test_different_key_terms_miss(question, other):
+    # The embeddings don't know these words, so the questions embed the same.
+    cache = SemanticAnswerCache(WordEmbeddings(), similarity_threshold=0.9)
+    cache.set(question, "1", [DOCUMENT])
+
+    assert cache.lookup(other) is None
+    assert cache.lookup(question)["response"] == "1"
+
+
+def test_key_terms():
+    assert SemanticAnswerCache.key_terms("Krijg ik WIA of WAO na 104 weken?") == {
+        "wia",
+        "wao",
+        "104",
+    }
+    assert SemanticAnswerCache.key_terms("Wat is de oWajong?") == frozenset()
+
+
+def test_least_recently_used_is_evicted():
+    cache = SemanticAnswerCache(
+        WordEmbeddings(), similarity_threshold=0.99, max_entries=2
+    )
+    cache.set("wie is walt", "1", [DOCUMENT])
+    cache.set("waar woonde disney", "2", [DOCUMENT])
+    cache.lookup("wie is walt")
+    cache.set("disney", "3", [DOCUMENT])
+
+    assert cache.size() == 2
+    assert cache.lookup("waar woonde disney") is None
+    assert cache.lookup("wie is walt")["response"] == "1"
+
+
+def test_clear():
+    cache = SemanticAnswerCache(WordEmbeddings())
+    cache.set("wie is walt", "1", [DOCUMENT])
+    cache.clear()
+
+    assert cache.lookup("wie is walt") is None
+
+
+def test_chain_answers_from_cache():
+    llm = FakeListLLM(
+        responses=["Walt Disney was een tekenaar.", "Geen idee."], cache=False
+    )
+    cache = SemanticAnswerCache(WordEmbeddings(), similarity_threshold=0.9)
+    chain = SmzDocChain(vectorstore=StaticVectorStore(), llm=llm, answer_cache=cache)
+
+    first = chain.ask(question="Wie is Walt Disney?")
+    second = chain.ask(question="wie is walt disney")
+
+    assert second["response"] == first["response"]
+    assert second["context"] == [DOCUMENT]
+    assert second["cached"] is True
+    # The second answer didn't call the LLM.
+    assert llm.i == 1
+    assert not any(step["type"] == "llm" for step in second["trace"])
+
+    chunks = list(chain.ask_stream(question="Wie is Walt Disney"))
+    assert "".join(chunk.get("response", "") for chunk in chunks) == first["response"]
+    assert llm.i == 1
@@ -14,3 +14,21 @@ def test_callbacks():
 
     x = chain.ask(question="wie is disney")
     # print(x)
+
+
+def test_ask_stream():
+    llm = azure_llm()
+
+    vectordb = Vector(documents=["data/test/disney_test_2p.pdf"]).setup()
+    chain = Chain(vectorstore=vectordb, llm=llm)
+
+    chunks = list(chain.ask_stream(question="wie is disney"))
+
+    # The sources arrive before the first token of the answer.
+    keys = [key for chunk in chunks for key in chunk]
+    assert keys.index("context") < keys.index("response")
+    assert keys.count("response") > 1
+    assert "debug" in chunks[-1] and "trace" in chunks[-1]
+
+    response = "".join(chunk.get("response", "") for chunk in chunks)
+    assert "Disney" in response
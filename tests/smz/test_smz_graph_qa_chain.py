@@ -73,3 +73,16 @@ def test_disney_chain(chain, waltdisney_graph):
     )
     print(answer)
     assert "Walt Disney" in answer["response"]
+
+
+def test_ask_stream(walterbob_graph, neo4j_graph):
+    chain = SmzGraphQAChain(llm=azure_llm(temperature=0), graph=neo4j_graph)
+
+    chunks = list(chain.ask_stream(question="Who is Walter?", chat_history=[]))
+
+    keys = [key for chunk in chunks for key in chunk]
+    assert keys.index("cypher") < keys.index("response")
+    assert "debug" in chunks[-1]
+
+    response = "".join(chunk.get("response", "") for chunk in chunks)
+    assert "Walter" in response
@@ -0,0 +1,89 @@
+import pytest
+from langchain_community.llms.fake import FakeListLLM
+from langchain_core.messages import AIMessage, HumanMessage
+from modules.smz.standalone_question import StandaloneQuestionCheck
+from modules.smz.smz_doc_chain import SmzDocChain
+from tests.smz.test_semantic_answer_cache import StaticVectorStore
+
+CHAT_HISTORY = [
+    HumanMessage(content="Wie is Walt Disney?"),
+    AIMessage(content="Walt Disney was een tekenaar."),
+]
+
+
+@pytest.fixture(autouse=True)
+def fixture_reset_stats():
+    StandaloneQuestionCheck.reset()
+    yield
+    StandaloneQuestionCheck.reset()
+
+
+@pytest.mark.parametrize(
+    "question",
+    [
+        "Welke films heeft Walt Disney gemaakt?",
+        "Wanneer is het UWV opgericht?",
+        "What is the capital of the Netherlands?",
+        "Wat is het WIA-loon?",
+        "Hoe hoog is de WW-uitkering dit jaar?",
+        "Is er een wachttijd voor de WIA-uitkering?",
+        "Welke regels gelden hier voor werkgevers?",
+        "Hoeveel dagen vakantie heb ik dan recht op bij de WW?",
+        "Moet ik ook een aanvraag doen voor de Ziektewet?",
+        "Kan ik die regeling aanvragen als zzp'er?",
+    ],
+)
+def test_standalone_questions(question):
+    assert StandaloneQuestionCheck.is_standalone(question)
+
+
+@pytest.mark.parametrize(
+    "question",
+    [
+        "Waar woonde hij?",
+        "Welke films heeft hij gemaakt?",
+        "Wat is daarvan de reden?",
+        "En Mickey Mouse?",
+        "En wat deed zijn broer Roy?",
+        "Where did she grow up?",
+        "Hoeveel krijg ik dan?",
+        "Geldt het ook voor zzp'ers?",
+        "Wanneer dan wel?",
+        "Voor wie geldt dat?",
+        "Dat is te weinig, wat kan ik nu doen?",
+        "Wat betekent dat?",
+        "Kan ik daarvoor bezwaar maken?",
+    ],
+)
+def test_follow_up_questions(question):
+    assert not StandaloneQuestionCheck.is_standalone(question)
+
+
+def test_chain_skips_contextualisation():
+    # Without the bypass the first response would be used as the standalone question.
+    llm = FakeListLLM(responses=["Het antwoord.", "Nog een antwoord."])
+    chain = SmzDocChain(vectorstore=StaticVectorStore(), llm=llm)
+
+    result = chain.ask(
+        question="Welke films heeft Walt Disney gemaakt?", chat_history=CHAT_HISTORY
+    )
+
+    assert result["contextualised_question"] == "Welke films heeft Walt Disney gemaakt?"
+    assert result["response"] == "Het antwoord."
+    assert StandaloneQuestionCheck.stats()["bypassed"] == 1
+    assert "CONTEXTUALISATION SKIPPED: 1/1" in result["debug"]
+
+
+def test_chain_contextualises_follow_up():
+    llm = FakeListLLM(responses=["Welke films heeft Walt Disney gemaakt?", "Veel."])
+    chain = SmzDocChain(vectorstore=StaticVectorStore(), llm=llm)
+
+    result = chain.ask(
+        question="Welke films heeft hij gemaakt?", chat_history=CHAT_HISTORY
+    )
+
+    assert result["contextualised_question"] == "Welke films heeft Walt Disney gemaakt?"
+    stats = StandaloneQuestionCheck.stats()
+    assert stats["bypassed"] == 0
+    assert stats["contextualised"] == 1
+    assert stats["bypass_rate"] == 0.0
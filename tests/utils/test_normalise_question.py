@@ -0,0 +1,6 @@
+from uwv_toolkit.utils import normalise_question
+
+
+def test_normalise_question():
+    assert normalise_question("  Wat is de  WIA?\n") == "wat is de wia"
+    assert normalise_question("Wat is de WIA!?.") == normalise_question("wat is de wia")